@@ -42,6 +42,8 @@ Memory
     pdpy_lib.memory.types.Symbol
     pdpy_lib.memory.types.List
     pdpy_lib.memory.data.Data
+    pdpy_lib.memory.buffer.ArrayBuffer
+    pdpy_lib.memory.buffer.ArrayTokens
     pdpy_lib.memory.scalar.Scalar
     pdpy_lib.memory.struct.Struct
     pdpy_lib.memory.array.Array
@@ -74,7 +76,12 @@ Extra
 .. autosummary::
   
     pdpy_lib.extra.arranger.Arranger
+    pdpy_lib.extra.layout.Layout
+    pdpy_lib.extra.placement.Placement
+    pdpy_lib.extra.scheduler.Scheduler
     pdpy_lib.extra.translator.Translator
+    pdpy_lib.extra.batch.Batch
+    pdpy_lib.extra.cache.ParseCache
 
 
 Primitives
@@ -98,6 +105,7 @@ Core
     pdpy_lib.core.canvasbase.CanvasBase
     pdpy_lib.core.object.Object
     pdpy_lib.core.message.Message
+    pdpy_lib.core.primitive.Primitive
 
 
 Utilities
@@ -111,6 +119,8 @@ Utilities
     pdpy_lib.utilities.exceptions.MalformedName
     pdpy_lib.utilities.utils
     pdpy_lib.utilities.regex
+    pdpy_lib.utilities.wavfile
+    pdpy_lib.utilities.spatial.SpatialGrid
 
 Encoding
 --------
@@ -120,6 +130,12 @@ Encoding
     pdpy_lib.encoding.pdpyencoder.PdPyEncoder
     pdpy_lib.encoding.xmltagconvert.XmlTagConvert
     pdpy_lib.encoding.xmlbuilder.XmlBuilder
+    pdpy_lib.encoding.pdwriter.PdWriter
+    pdpy_lib.encoding.pdwriter.PdRecorder
+    pdpy_lib.encoding.jsonwriter.JsonWriter
+    pdpy_lib.encoding.xmlwriter.XmlWriter
+    pdpy_lib.encoding.binformat.BinWriter
+    pdpy_lib.encoding.binformat.BinReader
 
 
 Parsing
@@ -133,52 +149,165 @@ Parsing
 
 """
 
-from .core.base import *
-from .core.canvasbase import *
-from .core.object import *
-from .core.message import *
-from .primitives.point import *
-from .primitives.size import *
-from .primitives.area import *
-from .primitives.bounds import *
-from .primitives.coords import *
-from .objects.comment import *
-from .objects.obj import *
-from .objects.msg import *
-from .objects.gui import *
-from .iemgui.iemfont import *
-from .iemgui.iemlabel import *
-from .iemgui.bng import *
-from .iemgui.cnv import *
-from .iemgui.nbx import *
-from .iemgui.radio import *
-from .iemgui.slider import *
-from .iemgui.toggle import *
-from .iemgui.vu import *
-from .memory.data import *
-from .memory.scalar import *
-from .memory.array import *
-from .memory.struct import *
-from .memory.goparray import *
-from .memory.graph import *
-from .memory.types import *
-from .patching.pdpy import *
-from .patching.patch import *
-from .patching.canvas import *
-from .patching.dependencies import *
-from .patching.comm import *
-from .encoding.pdpyencoder import *
-from .encoding.xmltagconvert import *
-from .encoding.xmlbuilder import *
-from .utilities.utils import *
-from .utilities.regex import *
-from .utilities.namespace import *
-from .utilities.default import *
-from .utilities.exceptions import *
-from .parse.pdpy2json import *
-from .parse.pdpyxmlparser import *
-from .parse.pdpyparser import *
-from .connections.edge import *
-from .connections.iolet import *
-from .extra.arranger import *
-from .extra.translator import *
+import importlib as _importlib
+
+__all__ = []
+
+__exports__ = {
+  ".core.base" : ( "Base", ),
+  ".core.canvasbase" : ( "CanvasBase", ),
+  ".core.object" : ( "Object", ),
+  ".core.message" : ( "Message", ),
+  ".core.primitive" : ( "Primitive", ),
+  ".primitives.point" : ( "Point", ),
+  ".primitives.size" : ( "Size", ),
+  ".primitives.area" : ( "Area", ),
+  ".primitives.bounds" : ( "Bounds", ),
+  ".primitives.coords" : ( "Coords", ),
+  ".objects.comment" : ( "Comment", ),
+  ".objects.obj" : ( "Obj", ),
+  ".objects.msg" : ( "Msg", ),
+  ".objects.gui" : ( "Gui", ),
+  ".iemgui.iemfont" : ( "IEMFont", ),
+  ".iemgui.iemlabel" : ( "IEMLabel", ),
+  ".iemgui.bng" : ( "Bng", ),
+  ".iemgui.cnv" : ( "Cnv", ),
+  ".iemgui.nbx" : ( "Nbx", ),
+  ".iemgui.radio" : ( "Radio", ),
+  ".iemgui.slider" : ( "Slider", ),
+  ".iemgui.toggle" : ( "Toggle", ),
+  ".iemgui.vu" : ( "Vu", ),
+  ".memory.data" : ( "Data", ),
+  ".memory.buffer" : ( "ArrayBuffer", "ArrayTokens" ),
+  ".memory.scalar" : ( "Scalar", ),
+  ".memory.array" : ( "Array", ),
+  ".memory.struct" : ( "Struct", ),
+  ".memory.goparray" : ( "GOPArray", ),
+  ".memory.graph" : ( "Graph", ),
+  ".memory.types" : ( "Int", "Float", "Symbol", "List" ),
+  ".patching.pdpy" : ( "PdPy", ),
+  ".patching.patch" : ( "Patch", ),
+  ".patching.canvas" : ( "Canvas", ),
+  ".patching.dependencies" : ( "Dependencies", ),
+  ".patching.comm" : ( "Comm", ),
+  ".encoding.pdpyencoder" : ( "PdPyEncoder", ),
+  ".encoding.xmltagconvert" : ( "XmlTagConvert", ),
+  ".encoding.xmlbuilder" : ( "XmlBuilder", ),
+  ".encoding.pdwriter" : ( "PdWriter", "PdRecorder" ),
+  ".encoding.jsonwriter" : ( "JsonWriter", ),
+  ".encoding.xmlwriter" : ( "XmlWriter", ),
+  ".encoding.binformat" : ( "BinWriter", "BinReader" ),
+  ".utilities.utils" : (
+    "log",
+    "logger",
+    "LOG_LEVELS",
+    "splitAtChar",
+    "splitByEscapedChar",
+    "parsePdBinBuf",
+    "parsePdFileLines",
+    "iterPdLines",
+    "printer",
+    "checknum",
+    "quit_help",
+    "loadPdData",
+    "loadPdFile",
+    "detectEncoding",
+    "iterPdFile",
+  ),
+  ".utilities.regex" : (
+    "is_ignored",
+    "is_root",
+    "is_subpatch",
+    "is_root_end",
+    "is_pdtext",
+    "is_piped",
+    "is_subpatch_end",
+    "is_pdobj",
+  ),
+  ".utilities.namespace" : ( "Namespace", ),
+  ".utilities.default" : (
+    "Default",
+    "GOPArrayFlags",
+    "IEMGuiNames",
+    "PdNativeGuiNames",
+    "PdFonts",
+    "Formats",
+    "getFormat",
+  ),
+  ".utilities.exceptions" : ( "ArgumentException", "MalformedName" ),
+  ".utilities.wavfile" : ( "readWav", "writeWav" ),
+  ".utilities.spatial" : ( "SpatialGrid", ),
+  ".parse.pdpy2json" : ( "PdPyLoad", ),
+  ".parse.pdpyxmlparser" : ( "PdPyXMLParser", ),
+  ".parse.pdpyparser" : ( "PdPyParser", ),
+  ".connections.edge" : ( "Edge", ),
+  ".connections.iolet" : ( "Iolet", ),
+  ".extra.arranger" : ( "Arranger", ),
+  ".extra.layout" : ( "Layout", ),
+  ".extra.placement" : ( "Placement", ),
+  ".extra.scheduler" : ( "Scheduler", ),
+  ".extra.translator" : ( "Translator", ),
+  ".extra.batch" : ( "Batch", ),
+  ".extra.cache" : ( "ParseCache", ),
+}
+""" The public names of the package, by the submodule that defines them
+
+The submodules are only imported when one of their names is used,
+see :func:`__getattr__`, so ``import pdpy_lib`` does not import
+the audio backends of :class:`pdpy_lib.patching.patch.Patch`.
+"""
+
+__deferred__ = ( ".patching.patch", )
+""" The submodules that are only imported when one of their names is used
+
+The class registries of :class:`pdpy_lib.encoding.pdpyencoder.PdPyEncoder`
+and :class:`pdpy_lib.utilities.namespace.Namespace` leave them out, so
+decoding a patch does not import the audio backends.
+"""
+
+__names__ = {}
+""" The submodule of each public name """
+
+for __module, __exported in __exports__.items():
+  __all__.extend(__exported)
+  __names__.update(dict.fromkeys(__exported, __module))
+del __module, __exported
+
+__subpackages__ = frozenset(m.split('.')[1] for m in __exports__)
+""" The subpackages, imported when they are used as attributes of the package """
+
+def __lazy__(package):
+  """ Return a module ``__getattr__`` that imports the submodules of ``package`` on first use
+
+  The subpackages use it, so ``pdpy_lib.utilities.utils`` works without
+  importing ``pdpy_lib.utilities.utils`` first, as when the package
+  imported every submodule.
+  """
+  def __getattr__(name):
+    if name[:2] != '__':
+      try:
+        # importing a submodule sets it on its package
+        return _importlib.import_module('.' + name, package)
+      except ModuleNotFoundError as e:
+        if e.name != package + '.' + name:
+          raise
+    raise AttributeError("module " + repr(package) + " has no attribute " + repr(name))
+  return __getattr__
+
+def __getattr__(name):
+  """ Import the submodule that defines ``name`` and return its value """
+  if name in __subpackages__:
+    return _importlib.import_module('.' + name, __name__)
+  if name == 're':
+    # the package used to expose the re module, through its utilities
+    return _importlib.import_module(name)
+  module = __names__.get(name)
+  if module is None:
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+  value = getattr(_importlib.import_module(module, __name__), name)
+  globals()[name] = value
+  return value
+
+def __dir__():
+  """ Return the names of the package, including the ones not imported yet """
+  return sorted(name for name in set(globals()) | set(__names__) | __subpackages__ if name[0] != '_' or name[:2] == '__')
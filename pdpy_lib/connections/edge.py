@@ -10,12 +10,12 @@ Edge
 """
 
 from .iolet import Iolet
-from ..core.base import Base
+from ..core.primitive import Primitive
 from ..utilities.utils import log
 
 __all__ = [ 'Edge' ]
 
-class Edge(Base):
+class Edge(Primitive):
   """ A Pd Connection 
 
   A Pd Connection object is a connection between two objects.
@@ -27,9 +27,13 @@ class Edge(Base):
   3. `target`: The target id of the connection
   4. `port`: The port inlet of the target
   """
+
+  __slots__ = ( 'source', 'sink', '__p__' )
+
+  __cls__ = 'connect'
+
   def __init__(self, pd_lines=None, json=None, xml=None):
-    self.__pdpy__ = self.__class__.__name__
-    super().__init__(cls="connect", json=json, xml=xml)
+    super().__init__(json=json, xml=xml)
     if pd_lines is not None and json is None and xml is None:
       self.source = Iolet(id=pd_lines[0], port=pd_lines[1]) 
       self.sink = Iolet(id=pd_lines[2], port=pd_lines[3])
@@ -56,5 +60,9 @@ class Edge(Base):
     super().__subelement__(x, self.sink.__xml__(o, tag='sink'))
     return x
 
+  def __key__(self):
+    """ Return the ``(source id, source port, sink id, sink port)`` tuple """
+    return (self.source.id, self.source.port, self.sink.id, self.sink.port)
+
   def __eq__(self, edge):
     return (self.source == edge.source) and (self.sink == edge.sink)
\ No newline at end of file
@@ -9,14 +9,15 @@ Iolet
 =====
 """
 
-from ..core.base import Base
+from ..core.primitive import Primitive
 from ..utilities.utils import log
 
 __all__ = [ 'Iolet' ]
 
-class Iolet(Base):
+class Iolet(Primitive):
+  __slots__ = ( 'id', 'port', '__obj__' )
+
   def __init__(self, id=None, port=None, json=None, xml=None):
-    self.__pdpy__ = self.__class__.__name__
     super().__init__(json=json, xml=xml)
     if json is None and xml is None:
       self.id = id
@@ -25,11 +26,21 @@ class Iolet(Base):
     self.id = int(self.id)
     self.port = int(self.port)
   
+  @classmethod
+  def __from_json__(cls, json):
+    """ Return an iolet filled from a json dictionary, see :class:`Primitive` """
+    self = super().__from_json__(json)
+    # cast to int
+    self.id = int(self.id)
+    self.port = int(self.port)
+    return self
+
   def setobj(self, parent):
     """ Locates the node in the parent (Canvas) object """
-    for obj in getattr(parent, 'nodes', []):
-      if getattr(obj, 'id') == self.id:
-        setattr(self, '__obj__', obj) # update with a new attribute
+    # the canvas keeps an id index of its nodes
+    obj = parent.get(self.id) if hasattr(parent, 'get') else None
+    if obj is not None:
+      setattr(self, '__obj__', obj) # update with a new attribute
     # log(1, f"setobj()::{self.__dict__}")
     
 
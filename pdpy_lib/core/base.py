@@ -9,16 +9,29 @@ Base
 ====
 """
 
-from json import dumps as json_dumps
+import logging
+
 from ..encoding.xmltagconvert import XmlTagConvert
 from ..encoding.xmlbuilder import XmlBuilder
-from ..utilities.utils import log, parsePdBinBuf
+from ..encoding.jsonwriter import JsonWriter
+from ..utilities.utils import log, logger, parsePdBinBuf
 from ..utilities.exceptions import ArgumentException, MalformedName
 from ..utilities.default import Default
 from ..utilities.namespace import Namespace
+from ..utilities.metrics import boxSize
 
 __all__ = [ 'Base' ]
 
+NAMESPACE = Namespace()
+
+# the attributes that change the box of an object: True for its text
+# (see Base.__get_obj_size__), False for its position or graphical size
+BOX = { k : True for k in ('className', 'args', 'targets', 'text', 'name', 'border') }
+BOX.update({ k : False for k in ('position', 'size', 'area', 'number') })
+
+# the types that json decodes numbers (and booleans) into
+NUMBERS = frozenset((int, float, bool))
+
 class Base(XmlBuilder, XmlTagConvert):
   """ The base class for all pdpy objects
 
@@ -53,6 +66,29 @@ class Base(XmlBuilder, XmlTagConvert):
   
 
   """
+
+  __slots__ = ()
+
+  __type__ = 'X'
+  """ The pd type of the object, unless set at :func:`__init__` """
+
+  __cls__ = 'obj'
+  """ The pd class of the object, unless set at :func:`__init__` """
+
+  __arr_idx__ = 0
+  """ The array index """
+
+  __d__ = Default.shared()
+  """ The object defaults, shared and read-only (see :func:`__setdefault__`) """
+
+  __end__ = ';\r\n'
+  """ The pd line end character sequence """
+
+  __semi__ = ' \\;'
+  """ The pd end symbol for data structures """
+
+  __strnums__ = {}
+  """ The memoized results of :func:`__num__` on strings, see :func:`__strnum__` """
   
   def __init__(self,
                 patchname=None,
@@ -62,20 +98,25 @@ class Base(XmlBuilder, XmlTagConvert):
                 xml=None,
                 default=None):
     """ Initialize the object """
-    self.patchname = self.__sane_name__(patchname) # the name of the patch
-    self.__type__ = pdtype if pdtype is not None else 'X' # pd's type
-    self.__cls__ = cls if cls is not None else 'obj' # pd's class
-    self.__d__ = Default() if default is None else default # object defaults
-    self.__n__ = Namespace() # pdpy module namespace
-    self.__end__ = ';\r\n' # The pd line end character sequence
-    self.__semi__ = ' \\;' # The pd end symbol for data structures
-    self.__arr_idx__ = 0 # the array index
-    XmlTagConvert.__init__(self) # for xml tag conversion (output)
+    # None values are not set (see __setattr__), so skip them altogether
+    if patchname is not None:
+      self.patchname = self.__sane_name__(patchname) # the name of the patch
+    if pdtype is not None:
+      self.__type__ = pdtype # pd's type, if not the class default
+    if cls is not None:
+      self.__cls__ = cls # pd's class, if not the class default
+    if default is not None:
+      self.__d__ = default # object defaults, if not the shared ones
     if json: self.__populate__(self, json) # fill the object with the json data
     if xml:
       XmlBuilder.__init__(self) # initialize the xml base builder class
-      tree = XmlBuilder.__xmlparse__(self, xml) # fill the object with xml
-      self.__xml_load__(tree)
+      self.__xml_load__(xml) # fill the object with xml
+
+  @property
+  def __n__(self):
+    """ The pdpy module namespace, shared by every object """
+    # Namespace defines __get__, so it can not be a plain class attribute
+    return NAMESPACE
 
   def __parent__(self, parent=None, scope=None):
     """ 
@@ -128,9 +169,94 @@ class Base(XmlBuilder, XmlTagConvert):
     return attribute[-1]
 
   def __setattr__(self, name, value):
-    """ Hijack setattr to return ourselves as a dictionary """
+    """ Hijack setattr to return ourselves as a dictionary
+
+    Setting a public attribute marks the object as changed, see :func:`__touch__`
+    """
     if value is not None:
       self.__dict__[name] = value
+      if name[0] != '_':
+        box = BOX.get(name)
+        if box:
+          self.__resize__()
+        elif box is not None:
+          self.__reindex__()
+        self.__touch__()
+
+  def __resize__(self):
+    """ Forget the box size of this object, and of the box it is part of
+
+    See :func:`__get_obj_size__`. Message targets are part of the box of their message.
+    """
+    self.__dict__.pop('__metrics__', None)
+    parent = self.__dict__.get('__p__')
+    if parent is not None and not hasattr(parent, 'nodes'):
+      parent.__dict__.pop('__metrics__', None)
+      parent.__reindex__()
+    else:
+      self.__reindex__()
+
+  def __reindex__(self):
+    """ Update the box of this object in the spatial index of its canvas
+
+    See :func:`pdpy_lib.core.canvasbase.CanvasBase.__spatial__`
+    """
+    canvas = self.__dict__.get('__p__')
+    if canvas is not None and '__grid__' in canvas.__dict__:
+      canvas.__locate__(self)
+
+  def __touch__(self):
+    """ Mark the canvas that contains this object as changed
+
+    See :func:`pdpy_lib.core.canvasbase.CanvasBase.__changed__`
+    """
+    parent = self.__dict__.get('__p__')
+    # objects can be nested in other objects, like message targets
+    while parent is not None:
+      changed = getattr(parent, '__changed__', None)
+      if changed is not None:
+        changed()
+        return
+      parent = getattr(parent, '__p__', None)
+
+  def __getstate__(self):
+    """ Return the picklable state of the object
+
+    The shared defaults and namespace are class attributes,
+    so only per-object overrides are part of the state.
+    The box size cache is left out, see :func:`__get_obj_size__`.
+    """
+    state = self.__dict__.copy()
+    state.pop('__metrics__', None)
+    return state
+
+  def __setstate__(self, state):
+    """ Restore a pickled state """
+    self.__dict__.update(state)
+
+  def __setdefault__(self, name, value):
+    """ Override a default value for this object only
+
+    The shared defaults are copied on the first override,
+    so other objects are not affected.
+
+    Parameters
+    ----------
+    name : :class:`str`
+      A :class:`pdpy_lib.utilities.default.Default` attribute, eg.: ``xml``
+
+    value : any
+      The new value. A ``dict`` updates the existing one.
+
+    """
+    if '__d__' not in self.__dict__ or self.__d__ is Default.shared():
+      self.__dict__['__d__'] = self.__d__.copy()
+    current = getattr(self.__d__, name, None)
+    if isinstance(current, dict) and isinstance(value, dict):
+      current.update(value)
+    else:
+      setattr(self.__d__, name, value)
+    return self
 
   def __set_default__(self, kwargs, parameters):
     """ Sets the defaut values or uses the provided keyword argument """
@@ -175,27 +301,17 @@ class Base(XmlBuilder, XmlTagConvert):
       setattr(self, k, v)
 
   def __json__(self, indent=4):
-    """ Return a JSON representation of the instance's scope as a string """
-
-    # inner function to filter out variables that are
-    # prefixed with two underscores ('_') 
-    # with the exception of '__pdpy__'
-    def __filter__(o):
-      return { 
-        k : v 
-        for k,v in o.__dict__.items() 
-        if not k.startswith("__") or k=="__pdpy__"
-      }
-
-    return json_dumps(
-      self,
-      default   = __filter__,
-      sort_keys = False,
-      indent    = indent
-    )
+    """ Return a JSON representation of the instance's scope as a string
+
+    Variables prefixed with two underscores ('_') are left out,
+    with the exception of '__pdpy__'. See :class:`JsonWriter`
+    to write the JSON into a file without building the string.
+    """
+    return JsonWriter(indent=indent).dump(self).getvalue()
   
   def __dumps__(self):
-    log(0, self.__class__.__name__, '-'*79,'\n', self.__json__(1))
+    if logger.isEnabledFor(logging.INFO):
+      log(0, self.__class__.__name__, '-'*79,'\n', self.__json__(1))
 
   def __num__(self, n):
     """ Returns a number (or list of number) object from a Pd file string """
@@ -238,14 +354,43 @@ class Base(XmlBuilder, XmlTagConvert):
     except:
       return False
 
-  def __get_obj_size__(self, parent):
-    
-    # print(self.__json__())
-    font_size = parent.font
+  def __box_text__(self):
+    """ Return the words shown in the box of this object """
+    words = []
+    if hasattr(self, 'className'):
+      words.append(str(self.className))
+    elif hasattr(self, 'nodes') and hasattr(self, 'name'):
+      # subpatches show as ``pd name``
+      words += ['pd', str(self.name)]
+    if hasattr(self, 'args'):
+      words += map(str, self.args)
+    for target in getattr(self, 'targets', []):
+      for message in getattr(target, 'messages', []):
+        words += str(message).split()
+    for text in getattr(self, 'text', []):
+      words += str(text).split()
+    return words
+
+  def __get_obj_size__(self, parent=None, font=None):
+    """ Return the width and height in pixels of the box of this object
+
+    Graphical objects have their own size. The size of text boxes follows
+    the pd fonts (see :mod:`pdpy_lib.utilities.metrics`) and is cached
+    until ``className``, ``args``, ``targets``, ``text`` or ``name``
+    change, see :func:`__resize__`.
 
+    Parameters
+    ----------
+    parent : :class:`pdpy_lib.core.canvasbase.CanvasBase`
+      (optional) The canvas with the font of the box
+
+    font : :class:`int`
+      (optional) The font size, instead of the font of ``parent``.
+      Without either, the font of the canvas that contains this object is used.
+
+    """
     if hasattr(self, 'size') or hasattr(self, 'area'):
       size = self.area if hasattr(self, 'area') else self.size
-      # print(self.getname(), "Size", size.__pd__())
       if hasattr(size, 'width') and hasattr(size, 'height'):
         return size.width, size.height
       else:
@@ -257,58 +402,136 @@ class Base(XmlBuilder, XmlTagConvert):
         elif hasattr(size, 'width'):
           return size.width, size.width
 
-    text_h = font_size * 2
-    text_w = 0
-    
-    if hasattr(self, 'className'):
-      text_w += len(self.className)
-      text_w += 1
-    
-    if hasattr(self, 'args'):
-      text_w += len(' '.join(map(lambda x:str(x),self.args)))
-      text_w += 1
-
-    if hasattr(self, 'targets'):
-      for target in self.targets:
-        if hasattr(target, 'messages'):
-          text_w += len(' '.join(target.messages))
-          text_w += 1
-        text_w += 1
-    
-    if hasattr(self, 'text'):
-      text_w += len(' '.join(self.text))
-      text_w += 1
-
-    mod_80 = (text_w-1) // 80
-
-    if mod_80 >= 1: text_h *= mod_80
-
-    return (text_w-1)*font_size//2, text_h
-
+    if font is None:
+      font = getattr(parent, 'font', None)
+    if font is None:
+      font = self.__font__()
+
+    box = self.__dict__.get('__metrics__')
+    if box is None or box[0] != font:
+      box = (font,) + boxSize(self.__box_text__(), font, getattr(self, 'border', None))
+      self.__dict__['__metrics__'] = box
+    return box[1], box[2]
+
+  def __font__(self):
+    """ Return the font size of the canvas that contains this object """
+    scope = self.__dict__.get('__p__')
+    while scope is not None:
+      font = getattr(scope, 'font', None)
+      if isinstance(font, (int, float)):
+        return font
+      scope = getattr(scope, '__p__', None)
+    return self.__d__.font['size']
 
   def __populate__(self, child, json):
     """ Populates the derived/child class instance with a dictionary """
     # TODO: protect against overblowing child scope
-    if not hasattr(json, 'items'):
+    if type(json) is not dict and not hasattr(json, 'items'):
       log(1, child.__class__.__name__, "json is not a dict")
       if not hasattr(json, '__dict__'):
         raise ArgumentException(child.__class__.__name__ + ": json is not a class. It is of type: " + type(json) +"\n"+ json)
       json = json.__dict__
     
-    # map(lambda k,v: setattr(child, k, v), json.items())
+    typed = self.__typed__
+    strnums = Base.__strnums__
+    # the same as setattr(child, k, v), without the call overhead
+    if type(child).__setattr__ is Base.__setattr__:
+      assign = child.__dict__.__setitem__
+    else:
+      assign = child.__setattr__
     for k,v in json.items():
-      try:
-        v = self.__num__(v)
-      except:
-        try:
-          v = self.__pdbool__(v)
-        except:
-          pass
-      setattr(child, k, v)
+      # inline the most common cases of __typed__
+      t = type(v)
+      if t is str and v in strnums:
+        ok, n = strnums[v]
+        v = n if ok else typed(v)
+      elif t is int or t is float:
+        if v == 0: v = 0
+      else:
+        v = typed(v)
+      if v is not None:
+        assign(k, v)
     
-    if hasattr(child, 'className') and self.__cls__ is None:
+    if self.__cls__ is None and hasattr(child, 'className'):
       self.__cls__ = child.className 
 
+  def __typed__(self, v):
+    """ Returns a value as :func:`__populate__` stores it
+
+    Strings come from pd and are parsed with :func:`__num__` (see
+    :func:`__strnum__`) or :func:`__pdbool__`. Values that json already
+    typed skip the parsing: numbers only have their zeros normalized to
+    ``0``, and pdpy objects, dictionaries and ``None`` are kept as they are.
+    """
+    t = type(v)
+    if t is str:
+      ok, n = self.__strnum__(v)
+      if ok:
+        return n
+    elif t in NUMBERS:
+      return 0 if v == 0 else v
+    elif t is list:
+      n = self.__typedlist__(v)
+      if n is not None:
+        return n
+    elif t is dict or v is None or isinstance(v, Base):
+      return v
+    try:
+      return self.__num__(v)
+    except:
+      try:
+        return self.__pdbool__(v)
+      except:
+        return v
+
+  def __typedlist__(self, v):
+    """ Returns a list as :func:`__num__` maps it, or ``None`` if the list
+    mixes pdpy objects with values, or nests other lists """
+    kind = None
+    out = []
+    for x in v:
+      t = type(x)
+      if t is str:
+        ok, x = self.__strnum__(x)
+        if not ok:
+          # __num__ raises on the list, so it is kept as it is
+          return v
+        k = NUMBERS
+      elif t in NUMBERS:
+        x = 0 if x == 0 else x
+        k = NUMBERS
+      elif t is dict or x is None or isinstance(x, Base):
+        k = Base
+      else:
+        return None
+      if kind is None:
+        kind = k
+      elif kind is not k:
+        return None
+      out.append(x)
+    return v if kind is Base else out
+
+  def __strnum__(self, s):
+    """ Returns ``(True, self.__num__(s))`` for a string,
+    or ``(False, None)`` if :func:`__num__` raises
+
+    The result only depends on the string, and patches repeat the same
+    strings (class names, symbols, numbers) a lot, so results are memoized.
+    """
+    memo = Base.__strnums__
+    try:
+      return memo[s]
+    except KeyError:
+      pass
+    try:
+      r = (True, self.__num__(s))
+    except:
+      r = (False, None)
+    if len(memo) >= 65536:
+      memo.clear()
+    memo[s] = r
+    return r
+
   def __unescape__(self, argv):
     """ Unescapes the arguments """
     args = []
@@ -336,16 +559,17 @@ class Base(XmlBuilder, XmlTagConvert):
   def __closeline__(self, pdtype, pdcls, pdargs):
     """ Closes a Pd file line
     """
-    s = str("#") + str(pdtype) + " " + str(pdcls)
+    s = "#" + str(pdtype) + " " + str(pdcls)
 
     if pdargs is not None:
       if isinstance(pdargs, list):
-        s += ' ' + ' '.join(pdargs)
+        s = s + ' ' + ' '.join(pdargs)
       else:
-        s += str(" ") + str(pdargs)
-        s += self.__end__
+        s = ''.join((s, " ", str(pdargs), self.__end__))
     
-    s = s.replace('  ', ' ')
+    # collapse double spaces (the common case has none, so skip the copy)
+    if '  ' in s:
+      s = s.replace('  ', ' ')
     
     return s
   
@@ -389,61 +613,83 @@ class Base(XmlBuilder, XmlTagConvert):
     # s = '\n'.join(s[i:i+79] for i in range(0, len(s), 79))
     return s
 
-  def __xml_load__(self, xml_tree):
-    """ Parse an XML tree into a PdPy object 
+  def __xml_load__(self, xml):
+    """ Parse an XML file into a PdPy object 
     
     Called if loading a PdPy object from an XML file.
+
+    The file is parsed incrementally: every element of the ``nodes``,
+    ``comments`` and ``edges`` of the root canvas (and every other element
+    of the root canvas, struct and dependency) is converted into pdpy
+    objects as soon as it is closed, and then dropped from the element tree.
+    So only the largest of these subtrees is held in memory at once,
+    rather than the whole document next to the PdPy objects.
     
     .. note:: 
       This method assumes it belongs to a PdPy class, because:
       :class:`pdpy_lib.patching.pdpy.PdPy` bases :class:`pdpy_lib.core.base.Base`
     
     """
-    # get the xml root element
-    xml_root = xml_tree.getroot()
-
-    # get the encoding
-    self.encoding = xml_root.get('encoding', 'utf-8')
-
     # root element to which we add stuff
     root_dict = {'__p__' : self}
 
-    # find the structs tag
-    structs = xml_root.find('structs')
-    if structs is not None:
-      for n in structs.findall('struct'):
-        self.addStruct(xml=n) # belongs to PdPy class
-    
-    # find the dependencies tag
-    for n in xml_root.findall('dependencies'):
-      self.addDependencies(xml=n) # belongs to PdPy class
-
-    # go through every element in 'root' and add it to the root_dict
-    for n in xml_root.find('root'):
-      # print('tag', n.tag)
-      if n.tag == 'pdpy' or n.tag == 'root':
-        if 'pdpy' in n.attrib:
-          root_dict.update({'__pdpy__': n.attrib['pdpy']})
-      elif n.tag == 'nodes':
-        root_dict.update({
-          'nodes': [XmlBuilder.__elem_to_obj__(self, x) for x in n]
-        })
-      elif n.tag == 'comments':
-        root_dict.update({
-          'comments': [XmlBuilder.__elem_to_obj__(self, x) for x in n]
-        })
-      elif n.tag == 'edges':
-        root_dict.update({
-          'edges': [XmlBuilder.__elem_to_obj__(self, x) for x in n]
-        })
+    # the currently open elements, from the xml root element down
+    path = []
+    # the first 'root' and 'structs' elements
+    root = None
+    structs = None
+
+    for event, elem in XmlBuilder.__xmliterparse__(self, xml):
+      
+      if event == 'start':
+        path.append(elem)
+        depth = len(path)
+        if depth == 1:
+          # get the encoding from the xml root element
+          self.encoding = elem.get('encoding', 'utf-8')
+        elif depth == 2 and elem.tag == 'root' and root is None:
+          root = elem
+        elif depth == 3 and path[1] is root and elem.tag in ('nodes', 'comments', 'edges'):
+          # the list is filled as its elements are closed
+          root_dict.update({elem.tag: []})
+        continue
+      
+      path.pop()
+      depth = len(path)
+      
+      if depth == 3 and path[1] is root and path[2].tag in ('nodes', 'comments', 'edges'):
+        # a node, comment, or edge of the root canvas
+        root_dict[path[2].tag].append(XmlBuilder.__elem_to_obj__(self, elem))
+      
+      elif depth == 2 and path[1] is root:
+        # go through every element in 'root' and add it to the root_dict
+        if elem.tag == 'pdpy' or elem.tag == 'root':
+          if 'pdpy' in elem.attrib:
+            root_dict.update({'__pdpy__': elem.attrib['pdpy']})
+        elif elem.tag not in ('nodes', 'comments', 'edges'):
+          # an element belonging to canvas' attributes
+          o = XmlBuilder.__elem_to_obj__(self, elem)
+          if hasattr(o, 'items'):
+            for k,v in o.items():
+              root_dict.update({k:v})
+          else:
+            root_dict.update({elem.tag:o})
+      
+      elif depth == 1:
+        if elem.tag == 'structs' and structs is None:
+          structs = elem
+          for n in elem.findall('struct'):
+            self.addStruct(xml=n) # belongs to PdPy class
+        elif elem.tag == 'dependencies':
+          self.addDependencies(xml=elem) # belongs to PdPy class
+      
       else:
-        # an element belonging to canvas' attributes
-        o = XmlBuilder.__elem_to_obj__(self, n)
-        if hasattr(o, 'items'):
-          for k,v in o.items():
-            root_dict.update({k:v})
-        else:
-          root_dict.update({n.tag:o})
+        # still within a subtree that is converted when it closes
+        continue
+
+      # drop the converted element: it is the last child of its parent
+      if depth:
+        del path[-1][-1]
     
     # add the root_dict to the PdPy object
     self.addRoot(json=root_dict) # belongs to PdPy class
@@ -477,6 +723,18 @@ class Base(XmlBuilder, XmlTagConvert):
     else:
       self.position.set_x(int(x))
       self.position.set_y(int(y))
+      self.__reindex__()
+      self.__touch__()
+
+  def unplace(self):
+    """ Forget the position, so the next incremental arrangement places this object again
+
+    See :class:`pdpy_lib.extra.placement.Placement`
+    """
+    if self.__dict__.pop('position', None) is not None:
+      self.__reindex__()
+      self.__touch__()
+    return self
 
   def as_list(self):
     """ Return the pd patch as a python list """
@@ -11,7 +11,9 @@ Canvas Base
 
 from ..connections.edge import Edge
 from ..encoding.xmlbuilder import XmlBuilder
+from ..encoding.pdwriter import PdRecorder
 from ..utilities.utils import log
+from ..utilities.spatial import SpatialGrid
 
 
 __all__ = [ 'CanvasBase' ]
@@ -20,6 +22,24 @@ class CanvasBase(XmlBuilder):
   """ Base class for a canvas
   
   This class is based by :class:`pdpy_lib.patching.pdpy.PdPy` and :class:`pdpy_lib.patching.canvas.Canvas`
+
+  With ``PdPy(cache=True)``, every canvas keeps the pd lines it wrote last
+  (see :func:`__replay__`) and whether its layout is up to date, so that
+  writing a patch again only arranges and writes the canvases that changed.
+  The changes made through :func:`add`, :func:`edge`, :func:`disconnect`,
+  :func:`remove`, :func:`comment`, ``addargs``, ``move``, ``addpos`` and by
+  setting an attribute of an object are tracked, see :func:`__changed__`.
+  The changes made in place (eg.: ``obj.args.append(1)`` or
+  ``obj.position.set_x(1)``) are not, and the old lines are written until
+  the attribute is set again (eg.: ``obj.args = obj.args``, which also
+  forgets the box size) or the ``__touch__`` method of the object is
+  called. Without ``cache=True``, the default, the patch is written and
+  arranged in full every time.
+
+  The boxes of the objects and comments can be looked up by region with
+  :func:`region`, :func:`at`, :func:`nearest` and :func:`overlapping`.
+  These use a spatial index that is built on first use and then kept up
+  to date by the same changes (see :func:`__spatial__`).
   
   """
 
@@ -36,7 +56,328 @@ class CanvasBase(XmlBuilder):
     # - the node indices as keys, and 
     # - the last self.__depth_list__ index as values
     self.__obj_map__ = {}
+
+    # This is a dictionary with
+    # - the node ids as keys, and
+    # - the nodes as values
+    # (see the __register__ and get methods)
+    self.__nodes_by_id__ = {}
+    # the nodes list and the count of its nodes in __nodes_by_id__
+    self.__nodes_seen__ = (None, 0)
+
+    # This is a dictionary with
+    # - the edge keys (source id, source port, sink id, sink port), and
+    # - the edges as values
+    # together with the outgoing and incoming edges of each node id
+    # (see the __link__ and outgoing/incoming methods)
+    self.__edges_by_key__ = {}
+    self.__edges_out__ = {}
+    self.__edges_in__ = {}
+    # the edges list and the count of its edges in __edges_by_key__
+    self.__edges_seen__ = (None, 0)
+
+    # the cached pd lines are stale, and so is the layout
+    # (see the __changed__ and __replay__ methods)
+    self.__dirty__ = True
+    self.__arranged__ = False
+
+  def __getstate__(self):
+    """ Return the picklable state, without the cached pd lines and spatial index """
+    state = super().__getstate__()
+    for k in ('__cache__', '__dirty__', '__arranged__', '__grid__', '__grid_seen__'):
+      state.pop(k, None)
+    return state
+
+  def __changed__(self):
+    """ Mark this canvas as changed
+
+    Its pd lines are written again by :func:`__replay__`, and it is arranged
+    again with the canvases that contain it, whose layout depends on its box.
+    """
+    self.__dirty__ = True
+    canvas = self
+    # the canvases that contain a canvas to arrange are also to arrange
+    while getattr(canvas, '__arranged__', False):
+      canvas.__arranged__ = False
+      canvas = getattr(canvas, '__p__', None)
+
+  def __touch__(self):
+    """ Mark the lines of this canvas (on its parent) as changed """
+    self.__dirty__ = True
+    super().__touch__()
+
+  def __forget__(self, boxes=True):
+    """ Forget the cached lines, layout and box sizes of this canvas and the canvases in it
+
+    This is what writing a patch without ``PdPy(cache=True)`` does before
+    arranging it, so the changes made in place are seen. With ``boxes=False``,
+    the box sizes and the spatial index are kept, as the incremental
+    arrangement needs them (see :class:`pdpy_lib.extra.placement.Placement`).
+    """
+    stack = [self]
+    while stack:
+      canvas = stack.pop()
+      d = canvas.__dict__
+      d['__dirty__'] = True
+      d['__arranged__'] = False
+      d.pop('__cache__', None)
+      if boxes:
+        d.pop('__grid__', None)
+        d.pop('__grid_seen__', None)
+      for o in (d.get('nodes') or []) + (d.get('comments') or []):
+        if boxes:
+          o.__dict__.pop('__metrics__', None)
+        if isinstance(o, CanvasBase):
+          stack.append(o)
+
+  def __replay__(self, w):
+    """ Write the pd lines of this canvas into the :class:`PdWriter` ``w``
+
+    If ``w.reuse`` is set, the lines are rendered by :func:`__write__` into
+    a :class:`PdRecorder` and kept until the canvas changes. Subpatches are
+    kept as references to their own cache, so a change in a subpatch only
+    renders that subpatch. Otherwise, the lines are rendered into ``w``.
+    """
+    if not getattr(w, 'reuse', False):
+      self.__write__(w)
+      return
+    parts = getattr(self, '__cache__', None)
+    if parts is None or getattr(self, '__dirty__', True):
+      r = PdRecorder()
+      self.__write__(r)
+      parts = self.__cache__ = r.getparts()
+      self.__dirty__ = False
+    for part in parts:
+      if isinstance(part, str):
+        w.write(part)
+      else:
+        w.canvas(part)
     
+  def __register__(self, node):
+    """ Add a node to the id index, if it has an id """
+    if hasattr(node, 'id'):
+      self.__nodes_by_id__.setdefault(int(node.id), node)
+
+  def __unregister__(self, node):
+    """ Remove a node from the id index """
+    if hasattr(node, 'id') and self.__nodes_by_id__.get(int(node.id)) is node:
+      del self.__nodes_by_id__[int(node.id)]
+
+  def __sync_index__(self):
+    """ Bring the id index up to date with the ``nodes`` list
+
+    Nodes appended to the list since the last call are indexed.
+    If the list was replaced or shrunk, the index is rebuilt.
+    """
+    nodes = getattr(self, 'nodes', [])
+    seen, count = getattr(self, '__nodes_seen__', (None, 0))
+    if nodes is not seen or len(nodes) < count:
+      self.__nodes_by_id__ = {}
+      count = 0
+    for node in nodes[count:]:
+      self.__register__(node)
+    self.__nodes_seen__ = (nodes, len(nodes))
+    return self.__nodes_by_id__
+
+  def __link__(self, edge):
+    """ Add an edge to the edge index, unless its key is already there
+
+    Return
+    ------
+    :class:`bool`
+      ``True`` if the edge was indexed, ``False`` if it is a duplicate
+
+    """
+    key = edge.__key__()
+    if key in self.__edges_by_key__:
+      return False
+    self.__edges_by_key__[key] = edge
+    self.__edges_out__.setdefault(key[0], []).append(edge)
+    self.__edges_in__.setdefault(key[2], []).append(edge)
+    return True
+
+  def __unlink__(self, edge):
+    """ Remove an edge from the edge index """
+    key = edge.__key__()
+    if self.__edges_by_key__.get(key) is edge:
+      del self.__edges_by_key__[key]
+      self.__edges_out__[key[0]].remove(edge)
+      self.__edges_in__[key[2]].remove(edge)
+
+  def __sync_edges__(self):
+    """ Bring the edge index up to date with the ``edges`` list
+
+    Edges appended to the list since the last call are indexed.
+    If the list was replaced or shrunk, the index is rebuilt.
+    """
+    if not hasattr(self, '__edges_by_key__'):
+      self.__edges_seen__ = (None, 0)
+    edges = getattr(self, 'edges', [])
+    seen, count = getattr(self, '__edges_seen__', (None, 0))
+    if edges is not seen or len(edges) < count:
+      self.__edges_by_key__ = {}
+      self.__edges_out__ = {}
+      self.__edges_in__ = {}
+      count = 0
+    for edge in edges[count:]:
+      self.__link__(edge)
+    self.__edges_seen__ = (edges, len(edges))
+    return self.__edges_by_key__
+
+  def __node_id__(self, node):
+    """ Return the id of a node, or the argument if it is already an id """
+    return int(node.id if hasattr(node, 'id') else node)
+
+  def outgoing(self, node, port=None):
+    """ Return the edges leaving ``node`` (a node or a node id)
+
+    If ``port`` is present, only the edges from that outlet are returned.
+    """
+    self.__sync_edges__()
+    edges = self.__edges_out__.get(self.__node_id__(node), [])
+    if port is None:
+      return list(edges)
+    return [e for e in edges if e.source.port == int(port)]
+
+  def incoming(self, node, port=None):
+    """ Return the edges arriving at ``node`` (a node or a node id)
+
+    If ``port`` is present, only the edges to that inlet are returned.
+    """
+    self.__sync_edges__()
+    edges = self.__edges_in__.get(self.__node_id__(node), [])
+    if port is None:
+      return list(edges)
+    return [e for e in edges if e.sink.port == int(port)]
+
+  def has_edge(self, source, outlet, sink, inlet):
+    """ Return ``True`` if the connection exists (nodes or node ids) """
+    key = (self.__node_id__(source), int(outlet), self.__node_id__(sink), int(inlet))
+    return key in self.__sync_edges__()
+
+  def __spatial__(self):
+    """ Return the spatial index of the boxes of the objects and comments
+
+    The :class:`pdpy_lib.utilities.spatial.SpatialGrid` is built on first
+    use, with the boxes at the font of this canvas. From then on, objects
+    are updated in it when they are moved (``addpos``, ``move``), resized
+    (setting ``args``, ``text``, etc.) or removed (:func:`remove`), see
+    :func:`__locate__`. Objects and comments appended to the lists since
+    the last call are indexed now. If the lists were replaced, or the font
+    changed, the index is rebuilt.
+    """
+    font = getattr(self, 'font', None)
+    if not isinstance(font, (int, float)):
+      font = self.__font__()
+    # the lists, or None until there are any
+    nodes = getattr(self, 'nodes', None)
+    comments = getattr(self, 'comments', None)
+    grid = self.__dict__.get('__grid__')
+    seen_font, seen, count, seen_comments, ccount = self.__dict__.get('__grid_seen__', (None, None, 0, None, 0))
+    if (grid is None or seen_font != font
+        or (seen is not None and nodes is not seen) or len(nodes or ()) < count
+        or (seen_comments is not None and comments is not seen_comments) or len(comments or ()) < ccount):
+      grid = SpatialGrid(cell=4 * int(font))
+      self.__grid__ = grid
+      count = ccount = 0
+    self.__grid_seen__ = (font, nodes, len(nodes or ()), comments, len(comments or ()))
+    for o in (nodes or ())[count:]:
+      self.__locate__(o)
+    for o in (comments or ())[ccount:]:
+      self.__locate__(o)
+    return grid
+
+  def __locate__(self, o):
+    """ Update the box of ``o`` in the spatial index, if there is one """
+    grid = self.__dict__.get('__grid__')
+    if grid is None:
+      return
+    p = getattr(o, 'position', None)
+    x, y = getattr(p, 'x', None), getattr(p, 'y', None)
+    if x is None or y is None:
+      grid.remove(o)
+      return
+    w, h = o.__get_obj_size__(font=self.__grid_seen__[0])
+    grid.insert(o, (x, y, x + w, y + h))
+
+  def __ordered__(self, found):
+    """ Sort objects from the spatial index top to bottom, then left to right """
+    rects = self.__grid__.rects
+    return sorted(found, key=lambda o: rects[o][1::-1])
+
+  def region(self, x1, y1, x2, y2, inside=False):
+    """ Return the objects and comments whose boxes overlap a rectangle
+
+    Parameters
+    ----------
+    x1, y1, x2, y2 : :class:`int`
+      The left, top, right and bottom edges of the rectangle,
+      for example the graph-on-parent area of a canvas
+
+    inside : :class:`bool`
+      Return only the boxes that are inside the rectangle (default: ``False``)
+
+    Return
+    ------
+    :class:`list`
+      The objects and comments, top to bottom, then left to right
+
+    """
+    grid = self.__spatial__()
+    found = grid.query((x1, y1, x2, y2))
+    if inside:
+      rects = grid.rects
+      found = [ o for o in found if x1 <= rects[o][0] and y1 <= rects[o][1]
+                and rects[o][2] <= x2 and rects[o][3] <= y2 ]
+    return self.__ordered__(found)
+
+  def at(self, x, y):
+    """ Return the objects and comments whose boxes contain the point ``x``, ``y`` """
+    return self.__ordered__(self.__spatial__().point(x, y))
+
+  def nearest(self, x, y, count=1):
+    """ Return the ``count`` objects and comments nearest to the point ``x``, ``y``, nearest first """
+    return self.__spatial__().nearest(x, y, count)
+
+  def overlapping(self, o):
+    """ Return the objects and comments whose boxes overlap the box of ``o``
+
+    Return
+    ------
+    :class:`list`
+      The objects and comments other than ``o``, top to bottom, then left to right.
+      Empty if ``o`` has no position.
+
+    """
+    grid = self.__spatial__()
+    self.__locate__(o)
+    rect = grid.rects.get(o)
+    if rect is None:
+      return []
+    return self.__ordered__([ k for k in grid.query(rect) if k is not o ])
+
+  def get(self, id):
+    """ Return the node with ``id`` or ``None``, in constant time """
+    if not hasattr(self, 'nodes'):
+      return None
+    if not hasattr(self, '__nodes_by_id__'):
+      self.__nodes_by_id__ = {}
+    try:
+      id = int(id)
+    except (TypeError, ValueError):
+      return None
+    node = self.__sync_index__().get(id)
+    if node is not None and getattr(node, 'id', None) == id:
+      return node
+    # the index is stale (eg.: ids changed after the nodes were added)
+    # so fall back to a scan and repair the index
+    for node in self.nodes:
+      if getattr(node, 'id', None) == id:
+        self.__nodes_by_id__[id] = node
+        return node
+    self.__nodes_by_id__.pop(id, None)
+    return None
+
   def __update_obj_map__(self, x):
     """ Update the object map with the current object
 
@@ -54,50 +395,56 @@ class CanvasBase(XmlBuilder):
         int(getattr(x,'id')) : self.__obj_idx__
       })
   
-  def __edges__(self, s):
+  def __edges__(self, w):
     for x in getattr(self, 'edges', []):
-      s += x.__pd__(self.__obj_map__)
-    return s
+      w.write(x.__pd__(self.__obj_map__))
 
-  def __nodes__(self, s):
+  def __nodes__(self, w):
     for x in getattr(self, 'nodes', []):
       self.__update_obj_map__(x)
-      s += x.__pd__()
-    return s
+      # canvases write themselves, other nodes return their pd lines
+      if isinstance(x, CanvasBase):
+        w.canvas(x)
+      else:
+        w.write(x.__pd__())
 
-  def __comments__(self, s):
+  def __comments__(self, w):
     for x in getattr(self, 'comments', []):
-      s += x.__pd__()
-    return s
+      w.write(x.__pd__())
 
-  def __coords__(self, s):
+  def __coords__(self, w):
     if hasattr(self, 'coords'):
-      s += self.coords.__pd__()
-    return s
+      w.write(self.coords.__pd__())
 
-  def __restore__(self, s, isgraph=False):
+  def __restore__(self, w, isgraph=False):
     if hasattr(self, 'position'):
-      s += "#X restore " + self.position.__pd__()
+      w.write("#X restore " + self.position.__pd__())
       if hasattr(self, 'title'):
-        s += " " + self.title
+        w.write(" " + self.title)
       if isgraph:
-        s += " graph"
-      s += self.__end__
-    return s
+        w.write(" graph")
+      w.write(self.__end__)
   
-  def __render__(self, s, isroot=False, isgraph=False):
-    s = self.__nodes__(s)
-    s = self.__comments__(s)
+  def __render__(self, w, isroot=False, isgraph=False):
+    """ Write the contents of this canvas into the :class:`PdWriter` ``w`` """
+    self.__nodes__(w)
+    self.__comments__(w)
     if isroot:
       # argh, this order is swapped for the root canvas
-      s = self.__coords__(s)
-      s = self.__edges__(s)
+      self.__coords__(w)
+      self.__edges__(w)
     else:
-      s = self.__edges__(s)
-      s = self.__coords__(s)
-    s = self.__restore__(s, isgraph=isgraph)
-    return s
-  
+      self.__edges__(w)
+      self.__coords__(w)
+    self.__restore__(w, isgraph=isgraph)
+
+  def __write__(self, w):
+    """ Write the pd lines of this canvas into the :class:`PdWriter` ``w``
+
+    Derived classes write their own lines before and after :func:`__render__`
+    """
+    self.__render__(w)
+
   def __xml_nodes__(self, parent):
     if hasattr(self, 'nodes'):
       nodes = super().__element__(tag='nodes')
@@ -120,6 +467,35 @@ class CanvasBase(XmlBuilder):
         super().__subelement__(edges, e.__xml__(self.__obj_map__))
       super().__subelement__(parent, edges)
 
+  def __xml_write_nodes__(self, w):
+    """ Write the nodes into the :class:`XmlWriter` ``w``, see :func:`__xml_nodes__` """
+    if hasattr(self, 'nodes'):
+      w.start(super().__element__(tag='nodes'))
+      for e in getattr(self, 'nodes', []):
+        self.__update_obj_map__(e)
+        # canvases write themselves, other nodes are written once built
+        if isinstance(e, CanvasBase):
+          e.__xml_write__(w)
+        else:
+          w.element(e.__xml__())
+      w.end()
+
+  def __xml_write_comments__(self, w):
+    """ Write the comments into the :class:`XmlWriter` ``w`` """
+    if hasattr(self, 'comments'):
+      w.start(super().__element__(tag='comments'))
+      for e in getattr(self, 'comments', []):
+        w.element(e.__xml__())
+      w.end()
+
+  def __xml_write_edges__(self, w):
+    """ Write the edges into the :class:`XmlWriter` ``w`` """
+    if hasattr(self, 'edges'):
+      w.start(super().__element__(tag='edges'))
+      for e in getattr(self, 'edges', []):
+        w.element(e.__xml__(self.__obj_map__))
+      w.end()
+
   def edge(self, edge):
     """ Append a pure data connection (edge)
 
@@ -134,48 +510,46 @@ class CanvasBase(XmlBuilder):
       self.edges = []
     super().__parent__(self, edge)
     connected_edge = edge.connect()
-    for e in self.edges:
-      if connected_edge == e:
-        log(1, "Already connected.")
-        return
+    # the edge index makes the duplicate check a dictionary lookup
+    self.__sync_edges__()
+    if not self.__link__(connected_edge):
+      log(1, "Already connected.")
+      return
     self.edges.append(connected_edge)
+    self.__edges_seen__ = (self.edges, len(self.edges))
+    self.__changed__()
     # log(1,"Edge",edge.__dict__)
   
   def disconnect(self, *argv):
-    """ Attempt to disconnect the objects """
+    """ Disconnect every edge to and from the objects """
     cnv = self.__last_canvas__() if hasattr(self, '__last_canvas__') else self
     
     # return if there are no edges
-    if not len(cnv.edges): return
-    
-    try:
-      argv = sorted(argv, key = lambda x:x.id)
-    except ValueError as e:
-      # skip uncreated objects
-      print("Object not created on the canvas: missing id")
-      print(e)
+    if not len(getattr(cnv, 'edges', [])): return
     
-    # loop through the arguments
+    cnv.__sync_edges__()
+
+    # collect the edges of every argument from the edge index
+    removed = {}
     for arg in argv:
       # skip uncreated objects
-      # if not hasattr(arg, 'id'): continue
-      # second loop through the edges
-      for i, edge in enumerate(sorted(cnv.edges, key = lambda x:x.source.id)):
-        
-        # if the object id matches any, remove it
-        if arg.id in (edge.source.id, edge.sink.id):
-          cnv.edges.pop(i)
-          print("Disconnected", arg.id)
-          break
-
-      # # second loop through the edges
-      # i = 0
-      # while len(self.edges):
-      #   # if the object id matches any, remove it
-      #   if arg.id in (self.edges[i].source.id, self.edges[i].sink.id):
-          
-      #     self.edges.pop(self.edges.index(i))
-      #   i += 1
+      if not hasattr(arg, 'id'):
+        print("Object not created on the canvas: missing id")
+        continue
+      found = cnv.outgoing(arg) + cnv.incoming(arg)
+      for edge in found:
+        removed[id(edge)] = edge
+      if len(found):
+        print("Disconnected", arg.id)
+    
+    if not len(removed): return
+
+    for edge in removed.values():
+      cnv.__unlink__(edge)
+    # filter the edges list in place, keeping its order
+    cnv.edges[:] = [e for e in cnv.edges if id(e) not in removed]
+    cnv.__edges_seen__ = (cnv.edges, len(cnv.edges))
+    cnv.__changed__()
 
 
   def connect(self, *argv):
@@ -232,6 +606,7 @@ class CanvasBase(XmlBuilder):
     if not hasattr(self, 'comments'): 
       self.comments = []
     self.comments.append(comment)
+    self.__changed__()
 
   def create(self, *anything):
     """ Create an object, message, comment, or any other pd object """
@@ -243,9 +618,10 @@ class CanvasBase(XmlBuilder):
         cnv.comment(a)
       else:
         a.id = cnv.add(a)
+        cnv.__register__(a)
       a.__parent__(parent=cnv)
     
-    if self.__autoconnect__:
+    if getattr(self, '__autoconnect__', False):
       self.connect(*anything)
     
     return self
@@ -298,6 +674,7 @@ class CanvasBase(XmlBuilder):
     from ..primitives.coords import Coords
     from ..memory.goparray import GOPArray
     
+    kwargs.setdefault('dtype', getattr(self, '__dtype__', None))
     array = GOPArray(**kwargs)
 
     self.__set_array_name__(array)
@@ -308,6 +685,7 @@ class CanvasBase(XmlBuilder):
     
     canvas.dimension.set_height(self.__d__.arrdimen['height'])
     array.id = canvas.add(array)
+    canvas.__register__(array)
     array.__parent__(parent=canvas)
 
     setattr(canvas, 'coords', Coords(gop=1))
@@ -341,4 +719,38 @@ class CanvasBase(XmlBuilder):
     if not hasattr(self, 'nodes'): 
       self.nodes = []
     self.nodes.append(node)
+    if hasattr(self, '__nodes_by_id__'):
+      self.__sync_index__()
+    self.__changed__()
     return len(self.nodes) - 1
+
+  def remove(self, node):
+    """ Remove a Node from this canvas ``nodes``
+
+    The connections to and from the node are left untouched,
+    see :func:`disconnect`.
+
+    Return
+    ------
+
+    :class:`bool`
+      ``True`` if the node was found and removed
+
+    """
+    nodes = getattr(self, 'nodes', [])
+    for i, n in enumerate(nodes):
+      if n is node:
+        nodes.pop(i)
+        if hasattr(self, '__nodes_by_id__'):
+          self.__unregister__(node)
+          seen, count = self.__nodes_seen__
+          if seen is nodes and i < count:
+            self.__nodes_seen__ = (nodes, count - 1)
+        if '__grid__' in self.__dict__:
+          self.__grid__.remove(node)
+          font, seen, count, comments, ccount = self.__grid_seen__
+          if seen is nodes and i < count:
+            self.__grid_seen__ = (font, nodes, count - 1, comments, ccount)
+        self.__changed__()
+        return True
+    return False
@@ -53,6 +53,8 @@ class Message(base.Base):
     msg = " ".join(msg) if isinstance(msg, list) else msg
     # log(0, f'{self.address} -> adding messages: {msg}')
     self.messages.append(msg)
+    self.__resize__()
+    self.__touch__()
 
   def __pd__(self):
     """  Returns a string of escaped comma-separated Pd messages or an empty string.
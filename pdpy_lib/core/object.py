@@ -26,13 +26,17 @@ class Object(base.Base):
     self.__pdpy__ = self.__class__.__name__
     if id is not None:
       self.id = int(id)
-    self.position = Point(x=x, y=y)
+    # skip the default position if the json one replaces it anyway
+    json = kwargs.get('json')
+    if not isinstance(json, dict) or 'position' not in json or x is not None or y is not None:
+      self.position = Point(x=x, y=y)
     super().__init__(**kwargs)
   
   def addargs(self, *argv):
     if not hasattr(self,'args') or self.args is None: 
       self.args = []
     self.args += self.__unescape__(argv)
+    self.__touch__()
     return self
 
   def __pd__(self, args=None):
@@ -64,8 +68,8 @@ class Object(base.Base):
     # print("pd_line:", s)
     
     # check if we have data and append it (this calls the Data.__pd__ method)
-    for x in getattr(self, 'data', []):
-      s += x.__pd__()
+    if hasattr(self, 'data'):
+      s = ''.join([s] + [x.__pd__() for x in self.data])
 
     # return the pd line
     return s
@@ -102,3 +106,5 @@ class Object(base.Base):
       self.position.set_x(x)
     if y is not None:
       self.position.set_y(y)
+    self.__reindex__()
+    self.__touch__()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Primitive
+=========
+"""
+
+from .base import Base
+
+__all__ = [ 'Primitive' ]
+
+class Primitive(Base):
+  r""" The base class for small, slotted pdpy value types
+
+  Points, sizes, bounds, areas, iolets and edges are the most numerous
+  objects of a patch, but they only hold two to four values each.
+  Subclasses list those values in ``__slots__``, so instances have no
+  ``__dict__`` and everything else (pd type, pd class, defaults, namespace)
+  comes from the class, see :class:`pdpy_lib.core.base.Base`.
+
+  As with :class:`pdpy_lib.core.base.Base`, setting an attribute to ``None``
+  leaves it unset. The ``__pdpy__`` name is the class name and is read-only.
+
+  Example
+  -------
+
+    >>> class Pair(Primitive):
+    ...   __slots__ = ('first', 'second')
+
+  """
+
+  __slots__ = ()
+
+  @property
+  def __pdpy__(self):
+    """ The PdPy class name """
+    return self.__class__.__name__
+
+  def __setattr__(self, name, value):
+    """ Skip ``None`` values and the class-level ``__pdpy__`` name """
+    if value is not None and name != '__pdpy__':
+      object.__setattr__(self, name, value)
+
+  @classmethod
+  def __fields__(cls):
+    """ Return the slot names of the class and its parents, in order """
+    fields = cls.__dict__.get('__pdpy_fields__')
+    if fields is None:
+      fields = []
+      for c in reversed(cls.__mro__):
+        for f in c.__dict__.get('__slots__', ()):
+          if f not in fields and f not in ('__dict__', '__weakref__'):
+            fields.append(f)
+      fields = tuple(fields)
+      type.__setattr__(cls, '__pdpy_fields__', fields)
+    return fields
+
+  @classmethod
+  def __from_json__(cls, json):
+    """ Return an instance filled from a json dictionary
+
+    This is the same as ``cls(json=json)`` for the classes whose
+    constructor only populates the slots from the json dictionary,
+    but skips the constructor. Subclasses that do more override it.
+    """
+    self = cls.__new__(cls)
+    self.__populate__(self, json)
+    return self
+
+  def __getstate__(self):
+    """ Return the set values as a dictionary, starting with ``__pdpy__`` """
+    state = { '__pdpy__' : self.__pdpy__ }
+    for f in self.__fields__():
+      try:
+        state[f] = object.__getattribute__(self, f)
+      except AttributeError:
+        pass
+    # subclasses without __slots__ still have a __dict__
+    state.update(getattr(self, '__dict__', {}))
+    return state
+
+  def __setstate__(self, state):
+    """ Restore the values from :func:`__getstate__` """
+    for k, v in state.items():
+      self.__setattr__(k, v)
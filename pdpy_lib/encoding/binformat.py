@@ -0,0 +1,696 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Binary Format
+=============
+
+A compact binary container for pdpy trees (the ``pdpyb`` format).
+
+The file starts with :data:`MAGIC` and a version byte, followed by
+length-prefixed records. Each record is a one byte kind, the length of its
+payload as an unsigned 64 bit integer, and the payload. All the numbers
+are little-endian.
+
+* ``S``: the string table. The amount of strings, then each string as
+  its length and its ``utf-8`` bytes. Class names, attribute names and
+  symbols are written once and referred to by their index.
+
+* ``T``: the tree. A single value, see below.
+
+Every value starts with a one byte tag:
+
+========  ====================================================================
+Tag       Value
+========  ====================================================================
+``N``     ``None``
+``T F``   ``True``, ``False``
+``j``     an integer from 0 to 255, as one byte
+``i q``   a 32 or 64 bit integer
+``L``     any other integer, as the index of its decimal string
+``f``     a 64 bit float
+``s``     a string, as its index in the string table
+``l``     a list: the amount of items and the items
+``A``     a list of floats, as a raw block of 64 bit floats
+``W``     a list of strings: the amount of strings and their indices
+``t``     a tuple: the amount of items and the items
+``d``     a dictionary: the amount of items and each key and value
+``D``     a :class:`collections.defaultdict`: the name of its factory
+          and the items, as ``d``
+``p``     a :class:`pathlib.Path`, as the index of its string
+``b``     a :class:`pdpy_lib.memory.buffer.ArrayBuffer`: its ``dtype``,
+          the amount of values and the raw block of values
+``k``     a :class:`pdpy_lib.memory.buffer.ArrayTokens`: its ``dtype``
+          and its tokens
+``O``     an object of a new shape: the index of its class name, the amount
+          of attributes, the index of each attribute name, the kind of each
+          value, and the values, as for ``o``
+``o``     an object of a shape defined before: the order in which its shape
+          was defined, the packed values, and the other values
+``Z``     the shared :class:`pdpy_lib.utilities.default.Default` values
+``r``     a reference to a list, dictionary or object written before,
+          as the order in which they were written
+========  ====================================================================
+
+Objects are written with their ``__getstate__`` and read back with
+their ``__setstate__``, as :mod:`pickle` does, so they are restored
+without running their constructors and the parents and shared objects
+of the tree are kept.
+
+The class, the attribute names and the kinds of values of an object are
+its shape. Most objects of a patch share a few shapes, so only their values
+are written: the numbers, strings and references first, packed together as
+one :class:`struct.Struct` of the shape, then any other value, with its tag.
+A value kind is one byte: a packed kind (``s j i q f r``), a constant
+(``N T F``), or ``*`` for a tagged value.
+
+The files are 4 to 7 times smaller than the json of the same patch, but
+loading them is only about 1.6 to 2 times faster than decoding the json
+with :class:`pdpy_lib.encoding.pdpyencoder.PdPyEncoder` (0.17 s against
+0.28 s for a patch of 20000 boxes). Unpacking the bytes takes little of
+that time: most of it goes to the python calls of the reader, one for
+every object and tagged value (about 5 for each box).
+
+The buffers of ``float32`` and ``float64`` values (see
+:data:`TYPECODES`) are written as raw blocks of their type.
+"""
+
+import gc
+import sys
+from array import array
+from collections import defaultdict
+from pathlib import Path, PurePath
+from struct import Struct, error as StructError
+
+from ..core.primitive import Primitive
+from ..memory.buffer import ArrayBuffer, ArrayTokens, HAS_NUMPY
+from ..utilities.default import Default
+
+__all__ = [ 'BinWriter', 'BinReader' ]
+
+MAGIC = b'PDPYBIN'
+""" The first bytes of a ``pdpyb`` file """
+
+VERSION = 1
+""" The version of the format, written after :data:`MAGIC` """
+
+FACTORIES = { 'list' : list, 'dict' : dict, 'set' : set, 'int' : int }
+""" The ``defaultdict`` factories that can be written """
+
+U8 = Struct('<B')
+U32 = Struct('<I')
+U64 = Struct('<Q')
+I32 = Struct('<i')
+I64 = Struct('<q')
+F64 = Struct('<d')
+
+BIG_ENDIAN = sys.byteorder == 'big'
+
+PACKED = { 's' : 'I', 'r' : 'I', 'j' : 'B', 'i' : 'i', 'q' : 'q', 'f' : 'd' }
+""" The :mod:`struct` format of each packed value kind """
+
+TYPECODES = { 'float32' : 'f', 'float64' : 'd' }
+""" The :mod:`array` type code of each :class:`pdpy_lib.memory.buffer.ArrayBuffer` data type """
+
+CONSTANTS = { 'N' : None, 'T' : True, 'F' : False }
+""" The values of the constant value kinds """
+
+MISSING = object()
+""" Marks the slots that are not set """
+
+SHAPES = {}
+""" The :class:`struct.Struct` of each string of value kinds """
+
+def shapeStruct(kinds):
+  """ Return the :class:`struct.Struct` that packs the values of ``kinds`` """
+  st = SHAPES.get(kinds)
+  if st is None:
+    st = SHAPES[kinds] = Struct('<' + ''.join(PACKED.get(k, '') for k in kinds))
+  return st
+
+def floatBlock(values, typecode='d'):
+  """ Return the floats in ``values`` as little-endian bytes """
+  block = array(typecode, values)
+  if BIG_ENDIAN:
+    block.byteswap()
+  return block.tobytes()
+
+def indexBlock(indices):
+  """ Return the string table ``indices`` as little-endian bytes """
+  return Struct('<' + str(len(indices)) + 'I').pack(*indices)
+
+def floatArray(raw, typecode='d'):
+  """ Return the little-endian floats in ``raw`` as an :class:`array.array` """
+  block = array(typecode)
+  block.frombytes(raw)
+  if BIG_ENDIAN:
+    block.byteswap()
+  return block
+
+class BinWriter(object):
+  r""" Writes a pdpy tree in the ``pdpyb`` binary format
+
+  The tree is encoded in memory while the string table is filled,
+  then both are written as records, see :mod:`pdpy_lib.encoding.binformat`.
+
+  Parameters
+  ----------
+  stream : :class:`io.BufferedIOBase` or ``None``
+    A binary stream to write to. If ``None``, the bytes are kept in
+    memory and returned by :func:`getvalue`.
+
+  Example
+  -------
+
+    >>> with open('patch.pdpyb', 'wb') as fp:
+    ...   BinWriter(fp).dump(pdpy)
+
+  """
+
+  __classes__ = {}
+  """ The classes checked so far, mapped to their name and slot names """
+
+  def __init__(self, stream=None):
+    self.stream = stream
+    self.chunks = []
+    self.write = self.chunks.append if stream is None else stream.write
+    self.strings = {}
+    self.memo = {}
+    # the memoized objects stay alive, so their ids are not reused
+    self.keep = []
+    self.shapes = {}
+    self.tree = bytearray()
+
+  def getvalue(self):
+    """ Return the bytes written so far (only without a ``stream``) """
+    return b''.join(self.chunks)
+
+  def dump(self, obj):
+    """ Write ``obj`` and return this writer """
+    self.__value__(obj)
+    table = bytearray(U32.pack(len(self.strings)))
+    for s in self.strings:
+      b = s.encode('utf-8', 'surrogatepass')
+      table += U32.pack(len(b))
+      table += b
+    self.write(MAGIC + U8.pack(VERSION))
+    self.__record__(b'S', table)
+    self.__record__(b'T', self.tree)
+    return self
+
+  def __record__(self, kind, payload):
+    """ Write a record: its kind, its length and its payload """
+    self.write(kind + U64.pack(len(payload)))
+    self.write(bytes(payload))
+
+  def __string__(self, s):
+    """ Return the index of ``s`` in the string table """
+    index = self.strings.get(s)
+    if index is None:
+      index = self.strings[s] = len(self.strings)
+    return index
+
+  def __memoize__(self, o):
+    """ Write a reference and return ``True`` if ``o`` was written before """
+    index = self.memo.get(id(o))
+    if index is not None:
+      self.tree += b'r' + U32.pack(index)
+      return True
+    self.memo[id(o)] = len(self.memo)
+    self.keep.append(o)
+    return False
+
+  def __classname__(self, o):
+    """ Return the name of the class of ``o``, that is read back from :mod:`pdpy_lib`,
+    and the slot names to read instead of calling ``__getstate__``, if any """
+    cls = type(o)
+    info = self.__classes__.get(cls)
+    if info is None:
+      import pdpy_lib
+      name = cls.__name__
+      if getattr(pdpy_lib, name, None) is not cls:
+        raise TypeError("Object of type " + name + " is not a pdpy class")
+      fields = None
+      # the plain slotted primitives are read directly, the reader skips __pdpy__
+      if getattr(cls, '__getstate__', None) is Primitive.__getstate__ and not cls.__dictoffset__:
+        fields = cls.__fields__()
+      info = (name, fields)
+      # the shared defaults are written as Z, so they never take the shortcut
+      if cls is not Default:
+        self.__classes__[cls] = info
+    return info
+
+  def __value__(self, o):
+    """ Write any value """
+    tree = self.tree
+    t = type(o)
+    if t in self.__classes__:
+      self.__object__(o)
+    elif t is str:
+      tree += b's' + U32.pack(self.__string__(o))
+    elif t is int:
+      if 0 <= o < 256:
+        tree += b'j' + U8.pack(o)
+      elif -0x80000000 <= o < 0x80000000:
+        tree += b'i' + I32.pack(o)
+      elif -0x8000000000000000 <= o < 0x8000000000000000:
+        tree += b'q' + I64.pack(o)
+      else:
+        tree += b'L' + U32.pack(self.__string__(str(o)))
+    elif o is None:
+      tree += b'N'
+    elif o is True:
+      tree += b'T'
+    elif o is False:
+      tree += b'F'
+    elif t is float:
+      tree += b'f' + F64.pack(o)
+    elif t is list:
+      if self.__memoize__(o):
+        return
+      if not o:
+        tree += b'l' + U32.pack(0)
+      elif all(type(x) is str for x in o):
+        tree += b'W' + U32.pack(len(o))
+        tree += indexBlock([self.__string__(x) for x in o])
+      elif all(type(x) is float for x in o):
+        tree += b'A' + U32.pack(len(o)) + floatBlock(o)
+      else:
+        tree += b'l' + U32.pack(len(o))
+        for x in o:
+          self.__value__(x)
+    elif t is tuple:
+      tree += b't' + U32.pack(len(o))
+      for x in o:
+        self.__value__(x)
+    elif isinstance(o, dict):
+      if self.__memoize__(o):
+        return
+      if isinstance(o, defaultdict):
+        factory = getattr(o.default_factory, '__name__', None)
+        if FACTORIES.get(factory) is not o.default_factory:
+          raise TypeError("Can not write a defaultdict of " + repr(o.default_factory))
+        tree += b'D' + U32.pack(self.__string__(factory))
+      else:
+        tree += b'd'
+      tree += U32.pack(len(o))
+      for k, v in o.items():
+        self.__value__(k)
+        self.__value__(v)
+    elif isinstance(o, ArrayTokens):
+      if o.decoded:
+        self.__value__(o.values)
+      else:
+        tree += b'k'
+        self.__value__(o.dtype)
+        self.__value__(list(o.tokens))
+    elif isinstance(o, ArrayBuffer):
+      tree += b'b' + U32.pack(self.__string__(o.dtype)) + U32.pack(len(o))
+      tree += o.array.astype(o.array.dtype.newbyteorder('<')).tobytes()
+    elif isinstance(o, PurePath):
+      tree += b'p' + U32.pack(self.__string__(str(o)))
+    elif o is Default.__shared__:
+      tree += b'Z'
+    elif isinstance(o, (bool, int, float, str, list, tuple)):
+      # subclasses of the builtin types are written as their base type
+      for base in (bool, int, float, str, list, tuple):
+        if isinstance(o, base):
+          self.__value__(base(o))
+          break
+    else:
+      self.__object__(o)
+
+  def __object__(self, o):
+    """ Write a pdpy object, or any other object of :mod:`pdpy_lib` """
+    tree = self.tree
+    memo = self.memo
+    index = memo.get(id(o))
+    if index is not None:
+      tree += b'r' + U32.pack(index)
+      return
+    name, fields = self.__classname__(o)
+    if fields is not None:
+      state = {}
+      for f in fields:
+        v = getattr(o, f, MISSING)
+        if v is not MISSING:
+          state[f] = v
+    else:
+      getstate = getattr(o, '__getstate__', None)
+      state = getstate() if getstate is not None else getattr(o, '__dict__', None)
+      if state is None:
+        state = {}
+      if not isinstance(state, dict):
+        raise TypeError("Object of type " + name + " does not have a dictionary state")
+    memo[id(o)] = len(memo)
+    self.keep.append(o)
+    strings = self.strings
+    kinds = []
+    packed = []
+    others = []
+    for v in state.values():
+      t = type(v)
+      if t is str:
+        kinds.append('s')
+        index = strings.get(v)
+        if index is None:
+          index = strings[v] = len(strings)
+        packed.append(index)
+      elif t is int:
+        if 0 <= v < 256:
+          kinds.append('j')
+        elif -0x80000000 <= v < 0x80000000:
+          kinds.append('i')
+        elif -0x8000000000000000 <= v < 0x8000000000000000:
+          kinds.append('q')
+        else:
+          kinds.append('*')
+          others.append(v)
+          continue
+        packed.append(v)
+      elif t is float:
+        kinds.append('f')
+        packed.append(v)
+      elif v is None:
+        kinds.append('N')
+      elif v is True:
+        kinds.append('T')
+      elif v is False:
+        kinds.append('F')
+      else:
+        index = memo.get(id(v))
+        if index is not None:
+          kinds.append('r')
+          packed.append(index)
+        else:
+          kinds.append('*')
+          others.append(v)
+    kinds = ''.join(kinds)
+    key = (name, tuple(state), kinds)
+    shape = self.shapes.get(key)
+    if shape is None:
+      self.shapes[key] = len(self.shapes)
+      tree += b'O' + U32.pack(self.__string__(name)) + U32.pack(len(state))
+      for k in state:
+        tree += U32.pack(self.__string__(k))
+      tree += kinds.encode('ascii')
+    else:
+      tree += b'o' + U32.pack(shape)
+    tree += shapeStruct(kinds).pack(*packed)
+    for v in others:
+      self.__value__(v)
+
+class BinReader(object):
+  r""" Reads a pdpy tree from the ``pdpyb`` binary format
+
+  See :mod:`pdpy_lib.encoding.binformat` and :class:`BinWriter`.
+
+  Parameters
+  ----------
+  source : :class:`bytes` or :class:`io.BufferedIOBase`
+    The bytes of the file, or a binary stream to read them from
+
+  Example
+  -------
+
+    >>> with open('patch.pdpyb', 'rb') as fp:
+    ...   pdpy = BinReader(fp).load()
+
+  """
+
+  def __init__(self, source):
+    self.data = source if isinstance(source, (bytes, bytearray, memoryview)) else source.read()
+
+  def __records__(self):
+    """ Return the payloads of the records, by kind """
+    data = self.data
+    if data[:len(MAGIC)] != MAGIC:
+      raise ValueError("Not a pdpyb file")
+    pos = len(MAGIC)
+    if pos >= len(data):
+      raise ValueError("The pdpyb file is truncated")
+    version = data[pos]
+    if version != VERSION:
+      raise ValueError("Unsupported pdpyb version: " + str(version))
+    pos += 1
+    records = {}
+    while pos < len(data):
+      kind = bytes(data[pos:pos + 1])
+      if pos + 9 > len(data):
+        raise ValueError("The pdpyb file is truncated")
+      size = U64.unpack_from(data, pos + 1)[0]
+      pos += 9
+      if pos + size > len(data):
+        raise ValueError("The pdpyb file is truncated")
+      records[kind] = memoryview(data)[pos:pos + size]
+      pos += size
+    if b'S' not in records or b'T' not in records:
+      raise ValueError("The pdpyb file is incomplete")
+    return records
+
+  def __strings__(self, table):
+    """ Return the string table as a list """
+    count = U32.unpack_from(table, 0)[0]
+    pos = 4
+    strings = []
+    for _ in range(count):
+      size = U32.unpack_from(table, pos)[0]
+      pos += 4
+      strings.append(str(table[pos:pos + size], 'utf-8', 'surrogatepass'))
+      pos += size
+    return strings
+
+  def __shape__(self, cls, names, kinds):
+    """ Return how to read the objects of a shape
+
+    Returns the class, how the state is set (0: update the ``__dict__``,
+    1: set the slots, 2: call ``__setstate__``), the attribute names with
+    how to read each value (0: packed, 1: packed string, 2: packed reference,
+    3: constant, 4: tagged, 5: skipped), and the :class:`struct.Struct`
+    of the packed values.
+    """
+    from ..core.base import Base
+    from ..core.primitive import Primitive
+    setstate = getattr(cls, '__setstate__', None)
+    if setstate is None or setstate is Base.__setstate__:
+      mode = 0
+    elif setstate is Primitive.__setstate__ and cls.__setattr__ is Primitive.__setattr__:
+      mode = 1
+    else:
+      mode = 2
+    fields = []
+    for name, kind in zip(names, kinds):
+      if mode == 1 and name == '__pdpy__':
+        # the name of a slotted class is read-only
+        fields.append((name, 5, None))
+      elif kind == 's':
+        fields.append((name, 1, None))
+      elif kind == 'r':
+        fields.append((name, 2, None))
+      elif kind in CONSTANTS:
+        fields.append((name, 3, CONSTANTS[kind]))
+      elif kind in PACKED:
+        fields.append((name, 0, None))
+      else:
+        fields.append((name, 4, None))
+    return (cls, mode, tuple(fields), shapeStruct(kinds))
+
+  def load(self):
+    """ Return the tree
+
+    Raises a :class:`ValueError` if the file is not a pdpyb file,
+    or if it is truncated or corrupt.
+    """
+    from .pdpyencoder import PdPyEncoder
+
+    records = self.__records__()
+    try:
+      strings = self.__strings__(records[b'S'])
+    except (IndexError, StructError, UnicodeDecodeError) as e:
+      raise ValueError("The pdpyb string table is corrupt: " + repr(e)) from e
+    tree = records[b'T']
+    memo = []
+    encoder = PdPyEncoder()
+    shapes = []
+    setslot = object.__setattr__
+    u32 = U32.unpack_from
+    i32 = I32.unpack_from
+    i64 = I64.unpack_from
+    f64 = F64.unpack_from
+    pos = 0
+
+    def readObject(shape):
+      nonlocal pos
+      cls, mode, fields, st = shape
+      obj = cls.__new__(cls)
+      memo.append(obj)
+      packed = iter(st.unpack_from(tree, pos))
+      pos += st.size
+      if mode == 1:
+        # slotted objects, see pdpy_lib.core.primitive.Primitive
+        for name, kind, const in fields:
+          if kind == 0:
+            setslot(obj, name, next(packed))
+          elif kind == 5:
+            next(packed)
+          elif kind == 2:
+            setslot(obj, name, memo[next(packed)])
+          elif kind == 1:
+            setslot(obj, name, strings[next(packed)])
+          elif kind == 4:
+            v = read()
+            if v is not None:
+              setslot(obj, name, v)
+          elif const is not None:
+            setslot(obj, name, const)
+        return obj
+      # fill the __dict__ in place, or collect the state to set it after
+      state = obj.__dict__ if mode == 0 else {}
+      for name, kind, const in fields:
+        if kind == 0:
+          state[name] = next(packed)
+        elif kind == 1:
+          state[name] = strings[next(packed)]
+        elif kind == 2:
+          state[name] = memo[next(packed)]
+        elif kind == 3:
+          state[name] = const
+        elif tree[pos] == 111: # a nested object of a known shape
+          pos += 1
+          nested = shapes[u32(tree, pos)[0]]
+          pos += 4
+          state[name] = readObject(nested)
+        else:
+          state[name] = read()
+      if mode == 2:
+        obj.__setstate__(state)
+      return obj
+
+    def read():
+      nonlocal pos
+      tag = tree[pos]
+      pos += 1
+      if tag == 111: # o
+        shape = shapes[u32(tree, pos)[0]]
+        pos += 4
+        return readObject(shape)
+      if tag == 115: # s
+        v = strings[u32(tree, pos)[0]]
+        pos += 4
+        return v
+      if tag == 106: # j
+        v = tree[pos]
+        pos += 1
+        return v
+      if tag == 79: # O
+        index, count = u32(tree, pos)[0], u32(tree, pos + 4)[0]
+        pos += 8
+        names = [strings[u32(tree, pos + 4 * i)[0]] for i in range(count)]
+        pos += 4 * count
+        kinds = str(tree[pos:pos + count], 'ascii')
+        pos += count
+        shape = self.__shape__(encoder.__class_get__(strings[index]), names, kinds)
+        shapes.append(shape)
+        return readObject(shape)
+      if tag == 114: # r
+        v = memo[u32(tree, pos)[0]]
+        pos += 4
+        return v
+      if tag == 108: # l
+        count = u32(tree, pos)[0]
+        pos += 4
+        v = []
+        memo.append(v)
+        v.extend([read() for _ in range(count)])
+        return v
+      if tag == 87: # W
+        count = u32(tree, pos)[0]
+        pos += 4
+        v = [strings[i] for i in Struct('<' + str(count) + 'I').unpack_from(tree, pos)]
+        pos += 4 * count
+        memo.append(v)
+        return v
+      if tag == 105: # i
+        v = i32(tree, pos)[0]
+        pos += 4
+        return v
+      if tag == 102: # f
+        v = f64(tree, pos)[0]
+        pos += 8
+        return v
+      if tag == 78: # N
+        return None
+      if tag == 84: # T
+        return True
+      if tag == 70: # F
+        return False
+      if tag == 65: # A
+        count = u32(tree, pos)[0]
+        pos += 4
+        v = floatArray(tree[pos:pos + 8 * count]).tolist()
+        pos += 8 * count
+        memo.append(v)
+        return v
+      if tag == 116: # t
+        count = u32(tree, pos)[0]
+        pos += 4
+        return tuple([read() for _ in range(count)])
+      if tag == 100 or tag == 68: # d, D
+        if tag == 68:
+          v = defaultdict(FACTORIES[strings[u32(tree, pos)[0]]])
+          pos += 4
+        else:
+          v = {}
+        memo.append(v)
+        count = u32(tree, pos)[0]
+        pos += 4
+        for _ in range(count):
+          k = read()
+          v[k] = read()
+        return v
+      if tag == 113: # q
+        v = i64(tree, pos)[0]
+        pos += 8
+        return v
+      if tag == 76: # L
+        v = int(strings[u32(tree, pos)[0]])
+        pos += 4
+        return v
+      if tag == 112: # p
+        v = Path(strings[u32(tree, pos)[0]])
+        pos += 4
+        return v
+      if tag == 98: # b
+        dtype, count = strings[u32(tree, pos)[0]], u32(tree, pos + 4)[0]
+        pos += 8
+        typecode = TYPECODES.get(dtype)
+        if typecode is None:
+          raise ValueError("Unsupported array dtype " + repr(dtype))
+        size = array(typecode).itemsize * count
+        values = floatArray(tree[pos:pos + size], typecode)
+        pos += size
+        # without numpy, the values are kept in a list
+        return ArrayBuffer(values, dtype=dtype) if HAS_NUMPY else values.tolist()
+      if tag == 90: # Z
+        return Default.shared()
+      if tag == 107: # k
+        dtype = read()
+        return ArrayTokens(read(), dtype=dtype)
+      raise ValueError("Unknown pdpyb tag " + repr(chr(tag)) + " at " + str(pos - 1))
+
+    # the tree has no garbage: do not let the collector walk it while it grows
+    collect = gc.isenabled()
+    gc.disable()
+    try:
+      result = read()
+      if pos != len(tree):
+        raise ValueError("The pdpyb tree is corrupt: " + str(len(tree) - pos) + " bytes left over")
+      return result
+    except (IndexError, KeyError, StructError, TypeError, AttributeError, UnicodeDecodeError) as e:
+      raise ValueError("The pdpyb tree is corrupt: " + repr(e)) from e
+    finally:
+      if collect:
+        gc.enable()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Json Writer
+===========
+"""
+
+from json.encoder import encode_basestring_ascii
+
+__all__ = [ 'JsonWriter' ]
+
+INFINITY = float('inf')
+
+class JsonWriter(object):
+  r""" Writes a pdpy tree as json, either into a list of chunks or a stream
+
+  The output is the same as ``json.dumps(obj, indent=indent)`` with the
+  :func:`pdpy_lib.core.base.Base.__json__` filter: every pdpy object is
+  written as its attributes, without the ones prefixed with two underscores
+  except ``__pdpy__``, so :class:`pdpy_lib.encoding.pdpyencoder.PdPyEncoder`
+  reads it back. Objects are walked directly, without building a filtered
+  dictionary for each of them, and the text is written as it is produced.
+
+  Parameters
+  ----------
+  stream : :class:`io.TextIOBase` or ``None``
+    A text stream to write to. If ``None``, the text is kept in memory
+    and returned by :func:`getvalue`.
+
+  indent : :class:`int`, :class:`str` or ``None``
+    The indentation, as in :func:`json.dumps` (default: ``4``)
+
+  Example
+  -------
+
+    >>> with open('patch.json', 'w') as fp:
+    ...   JsonWriter(fp).dump(pdpy)
+
+  """
+
+  __keep__ = {}
+  """ The attribute names seen so far, mapped to whether they are written """
+
+  __fields__ = {}
+  """ The field names of the slotted classes seen so far """
+
+  def __init__(self, stream=None, indent=4):
+    self.stream = stream
+    self.chunks = []
+    # bind the writing function once: it is called for every token
+    self.write = self.chunks.append if stream is None else stream.write
+    if indent is not None and not isinstance(indent, str):
+      indent = ' ' * indent
+    self.indent = indent
+    self.item_separator = ',' if indent is not None else ', '
+
+  def getvalue(self):
+    """ Return the text collected so far (only without a ``stream``) """
+    if len(self.chunks) > 1:
+      self.chunks[:] = [''.join(self.chunks)]
+    return self.chunks[0] if self.chunks else ''
+
+  def dump(self, obj):
+    """ Write ``obj`` and return this writer """
+    self.__encode__(obj, 0, set())
+    return self
+
+  def __state__(self, o):
+    """ Return the json-visible (key, value) pairs of a pdpy object """
+    d = getattr(o, '__dict__', None)
+    if d is None:
+      # slotted objects, see pdpy_lib.core.primitive.Primitive
+      cls = type(o)
+      fields = self.__fields__.get(cls)
+      if fields is None:
+        fields = tuple(k for k in o.__fields__() if not k.startswith('__'))
+        self.__fields__[cls] = fields
+      items = [('__pdpy__', o.__pdpy__)]
+      for k in fields:
+        v = getattr(o, k, None)
+        if v is not None:
+          items.append((k, v))
+      return items
+    keep = self.__keep__
+    items = []
+    for k, v in d.items():
+      if k not in keep:
+        keep[k] = not k.startswith('__') or k == '__pdpy__'
+      if keep[k]:
+        items.append((k, v))
+    return items
+
+  def __floatstr__(self, o):
+    """ Return the json representation of a float """
+    if o != o:
+      return 'NaN'
+    if o == INFINITY:
+      return 'Infinity'
+    if o == -INFINITY:
+      return '-Infinity'
+    return float.__repr__(o)
+
+  def __key__(self, k):
+    """ Return a dictionary key as a string, the same way as :mod:`json` """
+    if isinstance(k, str):
+      return k
+    if isinstance(k, float):
+      return self.__floatstr__(k)
+    if k is True:
+      return 'true'
+    if k is False:
+      return 'false'
+    if k is None:
+      return 'null'
+    if isinstance(k, int):
+      return int.__repr__(k)
+    raise TypeError("keys must be str, int, float, bool or None, not " + k.__class__.__name__)
+
+  def __encode__(self, o, level, markers):
+    """ Write any value """
+    write = self.write
+    if isinstance(o, str):
+      write(encode_basestring_ascii(o))
+    elif o is None:
+      write('null')
+    elif o is True:
+      write('true')
+    elif o is False:
+      write('false')
+    elif isinstance(o, int):
+      write(int.__repr__(o))
+    elif isinstance(o, float):
+      write(self.__floatstr__(o))
+    elif isinstance(o, (list, tuple)):
+      self.__sequence__(o, level, markers)
+    elif isinstance(o, dict):
+      self.__mapping__(o.items(), level, markers, o)
+    elif hasattr(o, 'tolist'):
+      # array buffers, see pdpy_lib.memory.buffer.ArrayBuffer
+      self.__sequence__(o.tolist(), level, markers)
+    else:
+      self.__mapping__(self.__state__(o), level, markers, o)
+
+  def __check__(self, o, markers):
+    """ Guard against circular references """
+    if id(o) in markers:
+      raise ValueError("Circular reference detected")
+    markers.add(id(o))
+
+  def __sequence__(self, o, level, markers):
+    """ Write a list or tuple """
+    write = self.write
+    if not o:
+      write('[]')
+      return
+    self.__check__(o, markers)
+    if self.indent is not None:
+      level += 1
+      newline = '\n' + self.indent * level
+      separator = self.item_separator + newline
+      write('[' + newline)
+    else:
+      separator = self.item_separator
+      write('[')
+    first = True
+    for v in o:
+      if first:
+        first = False
+      else:
+        write(separator)
+      self.__encode__(v, level, markers)
+    if self.indent is not None:
+      level -= 1
+      write('\n' + self.indent * level)
+    write(']')
+    markers.discard(id(o))
+
+  def __mapping__(self, items, level, markers, o):
+    """ Write a dictionary, or the state of an object, from its items """
+    write = self.write
+    items = list(items)
+    if not items:
+      write('{}')
+      return
+    self.__check__(o, markers)
+    if self.indent is not None:
+      level += 1
+      newline = '\n' + self.indent * level
+      separator = self.item_separator + newline
+      write('{' + newline)
+    else:
+      separator = self.item_separator
+      write('{')
+    first = True
+    for k, v in items:
+      if first:
+        first = False
+      else:
+        write(separator)
+      write(encode_basestring_ascii(self.__key__(k)))
+      write(': ')
+      self.__encode__(v, level, markers)
+    if self.indent is not None:
+      level -= 1
+      write('\n' + self.indent * level)
+    write('}')
+    markers.discard(id(o))
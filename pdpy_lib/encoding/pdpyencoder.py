@@ -11,25 +11,95 @@ from json.encoder import JSONEncoder
 __all__ = [ 'PdPyEncoder' ]
 
 class PdPyEncoder(JSONEncoder):
-  
+  r""" The ``object_hook`` that turns json dictionaries into pdpy objects
+
+  Every dictionary with a ``__pdpy__`` key is built with the pdpy class of
+  that name. The classes are looked up in a registry that is shared by all
+  the encoders and filled once from the :mod:`pdpy_lib` module, instead of
+  resolving the name on the module for every dictionary.
+
+  Example
+  -------
+
+    >>> pdpy = json.load(fp, object_hook=PdPyEncoder())
+
+  """
+
+  __registry__ = None
+  """ The pdpy classes by name, see :func:`__registry_get__` """
+
+  __skip_init__ = set()
+  """ The registered classes that are built with their ``__from_json__`` """
+
   def __init__(self):
     import pdpy_lib as pdpy
     self.__module__ = pdpy
     # self.__objects__ = []
     # log(1, "PdPyEncoder initialized")
 
+  def __registry_get__(self):
+    """ Return the class registry, building it on first use
+
+    The classes are taken from the submodules listed in
+    :data:`pdpy_lib.__exports__`, except the deferred ones
+    (see :data:`pdpy_lib.__deferred__`), whose names are
+    resolved on demand by :func:`__class_get__`.
+    """
+    registry = PdPyEncoder.__registry__
+    if registry is None:
+      import importlib
+      from ..core.base import Base
+      module = self.__module__
+      registry = {}
+      for path, names in module.__exports__.items():
+        if path in module.__deferred__:
+          continue
+        submodule = importlib.import_module(path, module.__name__)
+        for name in names:
+          c = getattr(submodule, name, None)
+          if isinstance(c, type) and issubclass(c, Base):
+            registry[name] = c
+      PdPyEncoder.__registry__ = registry
+      for c in registry.values():
+        self.__remember__(c)
+    return registry
+
+  @staticmethod
+  def __remember__(c):
+    """ Mark ``c`` to skip its constructor if it is a slotted class """
+    from ..core.primitive import Primitive
+    if isinstance(c, type) and issubclass(c, Primitive):
+      PdPyEncoder.__skip_init__.add(c)
+
+  def __class_get__(self, name):
+    """ Return the pdpy class called ``name`` """
+    registry = self.__registry_get__()
+    try:
+      return registry[name]
+    except KeyError:
+      # not a registered class: resolve it on the module and remember it
+      c = getattr(self.__module__, name)
+      registry[name] = c
+      self.__remember__(c)
+      return c
+
   def __call__(self, __obj__):
     if '__pdpy__' in __obj__:
       __name__ = __obj__['__pdpy__']
-      # this line grabs the class from the module
+      # this line grabs the class from the registry
       # and creates an instance of it
       # passing the json object as the argument
       try:
-        __class_name__ = getattr(self.__module__, __name__)
-        __instance__ = __class_name__(json=__obj__)
+        __class_name__ = (PdPyEncoder.__registry__ or self.__registry_get__()).get(__name__)
+        if __class_name__ is None:
+          __class_name__ = self.__class_get__(__name__)
+        if __class_name__ in self.__skip_init__:
+          __instance__ = __class_name__.__from_json__(__obj__)
+        else:
+          __instance__ = __class_name__(json=__obj__)
         # self.__objects__.append(__class_name__)
         return __instance__
       except Exception as e:
-        raise Exception("Error+" +e+". This happened while creating " +__name__+" with PdPyEncoder. Input object: " +__obj__)
+        raise Exception("Error: " + repr(e) + ". This happened while creating " + str(__name__) + " with PdPyEncoder. Input object: " + repr(__obj__)) from e
     else:
       return __obj__
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Pd Writer
+=========
+"""
+
+__all__ = [ 'PdWriter', 'PdRecorder' ]
+
+class PdWriter(object):
+  r""" Collects pd-lang text, either into a list of chunks or into a stream
+
+  Canvases write their lines into a :class:`PdWriter` (see
+  :func:`pdpy_lib.core.canvasbase.CanvasBase.__write__`) instead of
+  concatenating strings, so that serializing a patch is linear in the size
+  of the output.
+
+  Parameters
+  ----------
+  stream : :class:`io.TextIOBase` or ``None``
+    A text stream to write to. If ``None``, the text is kept in memory
+    and returned by :func:`getvalue`.
+
+  reuse : :class:`bool`
+    Write the cached lines of the canvases that did not change, instead of
+    rendering them again, see :func:`pdpy_lib.core.canvasbase.CanvasBase.__replay__`
+    (default: ``False``)
+
+  Example
+  -------
+
+    >>> w = PdWriter()
+    >>> pdpy.__write__(w)
+    >>> w.getvalue() == pdpy.__pd__()
+    True
+
+  """
+  def __init__(self, stream=None, reuse=False):
+    self.stream = stream
+    self.reuse = reuse
+    self.chunks = []
+    # bind the writing function once: it is called for every line
+    self.write = self.chunks.append if stream is None else stream.write
+
+  def getvalue(self):
+    """ Return the text collected so far (only without a ``stream``) """
+    if len(self.chunks) > 1:
+      self.chunks[:] = [''.join(self.chunks)]
+    return self.chunks[0] if self.chunks else ''
+
+  def canvas(self, canvas):
+    """ Write the pd lines of a nested ``canvas``, see :func:`pdpy_lib.core.canvasbase.CanvasBase.__replay__` """
+    canvas.__replay__(self)
+
+class PdRecorder(PdWriter):
+  r""" A :class:`PdWriter` that records the nested canvases instead of their lines
+
+  This is what a canvas keeps as the cache of its own pd lines, see
+  :func:`pdpy_lib.core.canvasbase.CanvasBase.__replay__`: the text it wrote,
+  with a reference to each of its subpatches, which keep their own cache.
+
+  Example
+  -------
+
+    >>> r = PdRecorder()
+    >>> canvas.__write__(r)
+    >>> [type(part).__name__ for part in r.getparts()]
+    ['str', 'Canvas', 'str']
+
+  """
+  def __init__(self):
+    super().__init__(reuse=True)
+    self.parts = []
+
+  def __flush__(self):
+    """ Move the text written so far into the parts """
+    if self.chunks:
+      self.parts.append(''.join(self.chunks))
+      self.chunks.clear()
+
+  def canvas(self, canvas):
+    """ Record a reference to a nested ``canvas`` """
+    self.__flush__()
+    self.parts.append(canvas)
+
+  def getparts(self):
+    """ Return the text and the canvases recorded so far, in order """
+    self.__flush__()
+    return self.parts
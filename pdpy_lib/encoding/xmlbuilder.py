@@ -9,6 +9,7 @@
 from xml.etree.ElementTree import ElementTree
 from xml.etree.ElementTree import Element
 from xml.etree.ElementTree import parse as __xparse__
+from xml.etree.ElementTree import iterparse as __xiterparse__
 from .xmltagconvert import XmlTagConvert
 from ..utilities.utils import log
 
@@ -16,6 +17,7 @@ __all__ = [ 'XmlBuilder' ]
 
 class XmlBuilder(XmlTagConvert):
   """ XML Converter Class """
+  __slots__ = ()
   def __init__(self):
     super().__init__()
 
@@ -362,4 +364,9 @@ class XmlBuilder(XmlTagConvert):
     """ Parse an XML file into an ElementTree object. """
     # PdPyXMLParser(self, xml)
     return __xparse__(xml)
+
+  def __xmliterparse__(self, xml):
+    """ Parse an XML file incrementally, yielding ``(event, element)`` pairs
+    for the ``start`` and ``end`` of every element. """
+    return __xiterparse__(xml, events=('start', 'end'))
     
\ No newline at end of file
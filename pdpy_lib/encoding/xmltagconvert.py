@@ -8,30 +8,35 @@
 __all__ = [ 'XmlTagConvert' ]
 
 class XmlTagConvert(object):
-  def __init__(self):    
-    self.__table__ = {
-      '%'  : 'op_mod',
-      '*'  : 'op_mul',
-      '-'  : 'op_minus',
-      '+'  : 'op_plus',
-      '/'  : 'op_div',
-      '==' : 'op_eq',
-      '!=' : 'op_ne',
-      '>'  : 'op_gt',
-      '<'  : 'op_lt',
-      '>=' : 'op_ge',
-      '<=' : 'op_le',
-      '||' : 'op_or',
-      '&&' : 'op_and',
-      '!'  : 'op_not',
-      '&'  : 'binop_and',
-      '|'  : 'binop_bor',
-      '>>' : 'binop_ls',
-      '<<' : 'binop_rs'
-    }
-    self.__tilde__ = "~"
-    self.___tilde__ = "_tilde"
-  
+  __slots__ = ()
+
+  # the conversion tables are shared by every object
+  __table__ = {
+    '%'  : 'op_mod',
+    '*'  : 'op_mul',
+    '-'  : 'op_minus',
+    '+'  : 'op_plus',
+    '/'  : 'op_div',
+    '==' : 'op_eq',
+    '!=' : 'op_ne',
+    '>'  : 'op_gt',
+    '<'  : 'op_lt',
+    '>=' : 'op_ge',
+    '<=' : 'op_le',
+    '||' : 'op_or',
+    '&&' : 'op_and',
+    '!'  : 'op_not',
+    '&'  : 'binop_and',
+    '|'  : 'binop_bor',
+    '>>' : 'binop_ls',
+    '<<' : 'binop_rs'
+  }
+  __tilde__ = "~"
+  ___tilde__ = "_tilde"
+
+  # the tags converted so far, see to_xml_tag
+  __tags__ = {}
+
   def find(self, element, string):
     result = element in string
     # print('find', element, string, result)
@@ -57,6 +62,10 @@ class XmlTagConvert(object):
   def to_xml_tag(self, key):
     """ Returns the tag name replacing special characters """
     # print(f"to_xml_tag(): {key}")
+    # the conversion only depends on the key, and tags repeat a lot
+    tags = XmlTagConvert.__tags__
+    if key in tags:
+      return tags[key]
     tag = key
     if self.find(self.__tilde__, key):
       key_notilde = str(key).replace(self.__tilde__, '')
@@ -83,6 +92,9 @@ class XmlTagConvert(object):
         if e == k:
           tag = tag[:i] + self.__table__[k] + tag[i+1:]
           break
+    if len(tags) >= 65536:
+      tags.clear()
+    tags[key] = tag
     return tag
 
   def to_pd_obj(self, pd_key):
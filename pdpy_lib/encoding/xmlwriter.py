@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Xml Writer
+==========
+"""
+
+from xml.sax.saxutils import escape
+
+__all__ = [ 'XmlWriter' ]
+
+ATTRIB_ENTITIES = { '"' : '&quot;', '\r' : '&#13;', '\n' : '&#10;', '\t' : '&#09;' }
+""" The attribute characters that are escaped besides ``&``, ``<`` and ``>`` """
+
+class XmlWriter(object):
+  r""" Writes indented xml, either into a list of chunks or a stream
+
+  Elements are opened with :func:`start`, closed with :func:`end`, and
+  complete subtrees are written with :func:`element`, so a pdpy tree can be
+  written while it is walked, without building the whole element tree
+  (see :func:`pdpy_lib.patching.pdpy.PdPy.__xml_write__`).
+
+  The output is the same as writing the whole tree with
+  :meth:`xml.etree.ElementTree.ElementTree.write` after indenting it with
+  ``xml.etree.ElementTree.indent(tree, space=indent)``, so it is read back
+  by :func:`pdpy_lib.core.base.Base.__xml_load__`.
+
+  Parameters
+  ----------
+  stream : :class:`io.TextIOBase` or ``None``
+    A text stream to write to. If ``None``, the text is kept in memory
+    and returned by :func:`getvalue`.
+
+  indent : :class:`str`
+    The indentation of one level (default: four spaces)
+
+  encoding : :class:`str` or ``None``
+    The encoding of the stream. An xml declaration is written first
+    for encodings other than ``utf-8`` or ``us-ascii``, like
+    :mod:`xml.etree.ElementTree` does (default: ``None``)
+
+  Example
+  -------
+
+    >>> with open('patch.xml', 'w', encoding='utf-8') as fp:
+    ...   pdpy.__xml_write__(XmlWriter(fp))
+
+  """
+  def __init__(self, stream=None, indent='    ', encoding=None):
+    self.stream = stream
+    self.chunks = []
+    # bind the writing function once: it is called for every token
+    self.write = self.chunks.append if stream is None else stream.write
+    self.indent = indent
+    # the open elements: [tag, text, started, last child tail, own tail]
+    self.stack = []
+    if encoding is not None and encoding.lower() not in ('utf-8', 'us-ascii', 'unicode'):
+      self.write("<?xml version='1.0' encoding='" + encoding + "'?>\n")
+
+  def getvalue(self):
+    """ Return the text collected so far (only without a ``stream``) """
+    if len(self.chunks) > 1:
+      self.chunks[:] = [''.join(self.chunks)]
+    return self.chunks[0] if self.chunks else ''
+
+  def __child__(self):
+    """ Write what comes before a child of the innermost open element """
+    if not self.stack:
+      return
+    parent = self.stack[-1]
+    if not parent[2]:
+      # the first child: close the start tag, then the text or the indent
+      parent[2] = True
+      self.write('>')
+      if parent[1] and parent[1].strip():
+        self.write(escape(parent[1]))
+      else:
+        self.write('\n' + self.indent * len(self.stack))
+    else:
+      self.__tail__(parent[3], len(self.stack))
+
+  def __tail__(self, tail, level):
+    """ Write the tail of a child, or the indent that replaces it """
+    if tail and tail.strip():
+      self.write(escape(tail))
+    else:
+      self.write('\n' + self.indent * level)
+
+  def start(self, elem):
+    """ Open an :class:`xml.etree.ElementTree.Element`
+
+    Writes its start tag and the children it already has.
+    The element stays open until :func:`end` is called.
+    """
+    self.__child__()
+    tag = elem.tag
+    self.write('<' + tag)
+    for k, v in elem.attrib.items():
+      self.write(' ' + k + '="' + escape(v, ATTRIB_ENTITIES) + '"')
+    self.stack.append([tag, elem.text, False, None, elem.tail])
+    for child in elem:
+      self.element(child)
+
+  def end(self):
+    """ Close the innermost open element """
+    tag, text, started, tail, own_tail = self.stack.pop()
+    if started:
+      self.__tail__(tail, len(self.stack))
+      self.write('</' + tag + '>')
+    elif text:
+      self.write('>' + escape(text) + '</' + tag + '>')
+    else:
+      self.write(' />')
+    if self.stack:
+      self.stack[-1][3] = own_tail
+    elif own_tail:
+      self.write(escape(own_tail))
+
+  def element(self, elem):
+    """ Write a complete :class:`xml.etree.ElementTree.Element` """
+    self.start(elem)
+    self.end()
@@ -9,7 +9,10 @@ Arranger
 ========
 """
 
+import logging
+
 from ..primitives.point import Point
+from ..utilities.utils import log, logger
 
 __all__ = [ "Arranger" ]
 
@@ -33,7 +36,8 @@ class Arranger:
     The canvas to arrange
   
   verbose : `bool`
-    (optional) set verbosity level (default: `False`)
+    (optional) log the steps as ``INFO`` messages instead of ``DEBUG``
+    messages, see :func:`pdpy_lib.utilities.utils.log` (default: `False`)
   
   hstep : `float`
     (optional) set the horizontal step factor for x-increments (default: `1.5`)
@@ -152,7 +156,12 @@ class Arranger:
     self.__print__("------------- end -----------")
 
   def __print__(self, *args):
-    if self.verbose: print(*args)
+    log(0 if self.verbose else 1, *args)
+
+  def __logging__(self):
+    """ Returns ``True`` if :func:`__print__` writes the messages,
+    to skip building the costly ones otherwise """
+    return logger.isEnabledFor(logging.INFO if self.verbose else logging.DEBUG)
 
   def __ids__(self, x):
     """ Returns the IDs of a list of objects or tuplets of (obj,port)
@@ -178,8 +187,8 @@ class Arranger:
 
     """
     if port:
-      r = [(self.canvas.get(e.sink.getid()), e.source.port) for e in self.canvas.edges if e.source.getid() == o.getid()]
-      self.__print__(
+      r = [(self.canvas.get(e.sink.getid()), e.source.port) for e in self.canvas.outgoing(o.getid())]
+      if self.__logging__(): self.__print__(
         "__get_children__():",
         o.getname(), 
         "==>", 
@@ -187,8 +196,8 @@ class Arranger:
       )
       return r
     else:
-      r = [self.canvas.get(e.sink.getid()) for e in self.canvas.edges if e.source.getid() == o.getid()]
-      self.__print__("__get_children__():", self.__ids__(r))
+      r = [self.canvas.get(e.sink.getid()) for e in self.canvas.outgoing(o.getid())]
+      if self.__logging__(): self.__print__("__get_children__():", self.__ids__(r))
       return r
 
   def __y_inc__(self, y_inc):
@@ -327,11 +336,11 @@ class Arranger:
     parent = obj
     self.__print__("="*10,"STEP 3","="*10)
     self.__print__("input", parent.getid(), parent.getname())
-    self.__print__(parent.getid(), "is connected to", self.__ids__(children))
+    if self.__logging__(): self.__print__(parent.getid(), "is connected to", self.__ids__(children))
     self.__print__(">>>>>>>>>> BEGIN CHILD LOOP for", obj.getname())
     for i, (child, portnum) in enumerate(children):
       self.__print__(">"*4,"Child #"+str(i), child.getid(), child.getname(), portnum)
-      self.__print__(">"*4,child.getid(), "NOT IN", self.__ids__(self.Z))
+      if self.__logging__(): self.__print__(">"*4,child.getid(), "NOT IN", self.__ids__(self.Z))
       
       x_inc, y_inc = child.__get_obj_size__(parent.__parent__())
 
@@ -409,7 +418,7 @@ class Arranger:
         self.__print__(child.getid(), "is not connected to anybody.")
         
         if child not in self.Z:
-          self.__print__("But,", child.getid(), "is not placed in", self.__ids__(self.Z))
+          if self.__logging__(): self.__print__("But,", child.getid(), "is not placed in", self.__ids__(self.Z))
           self.__place__(child, yinc = 1)
         elif relocate is None:
           # move the child if there is no relocate callback
@@ -463,7 +472,7 @@ class Arranger:
 
     """
     self.__print__("~"*10,"STEP 1","~"*10)
-    self.__print__("input",list(zip(map(lambda x:x.getname(),self.O),self.__ids__(self.O))))
+    if self.__logging__(): self.__print__("input",list(zip(map(lambda x:x.getname(),self.O),self.__ids__(self.O))))
     
     if len(self.O) == 0:
       self.__print__("#2 ===> No more objects to place.")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Batch
+=====
+"""
+
+import os
+import time
+import traceback
+from glob import glob
+from pathlib import Path
+from json import dumps as json_dumps
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor, as_completed
+
+from .translator import Translator, loadPddb
+from ..utilities.default import getFormat
+from ..utilities.exceptions import ArgumentException
+
+__all__ = [ 'Batch' ]
+
+_WARMUP_ERROR = None
+""" The error of :func:`_warmup` in this process, reported for every file """
+
+def _warmup(internals=None, encoding='utf-8'):
+  """ Prepare a worker process once, before it translates any file
+
+  This is the initializer of the worker processes, so it never raises:
+  an initializer that raises breaks the whole pool. The error is kept
+  instead, and every file translated by the worker fails with it.
+  """
+  global _WARMUP_ERROR
+  _WARMUP_ERROR = None
+  if internals is not None:
+    try:
+      loadPddb(internals, encoding)
+    except Exception as e:
+      _WARMUP_ERROR = (e, traceback.format_exc())
+
+def _translate(arguments):
+  """ Translate a single file and return a result dictionary
+
+  This runs inside the worker processes, so it never raises:
+  failures are reported in the result instead.
+  """
+  if _WARMUP_ERROR is not None:
+    return _failed(arguments, *_WARMUP_ERROR)
+  start = time.perf_counter()
+  result = { 'input' : arguments['input'], 'output' : arguments['output'] }
+  try:
+    translator = Translator(dict(arguments))
+    translator()
+    result['ok'] = True
+  except Exception as e:
+    result = _failed(arguments, e, traceback.format_exc())
+  result['elapsed'] = time.perf_counter() - start
+  return result
+
+def _failed(arguments, error, trace):
+  """ Return the result dictionary of a file that failed with ``error`` """
+  return {
+    'input' : arguments['input'],
+    'output' : arguments['output'],
+    'ok' : False,
+    'error' : repr(error),
+    'traceback' : trace,
+    'elapsed' : 0.0,
+  }
+
+class Batch(object):
+  r""" Translate many files with a pool of worker processes
+
+  The input files are spread over a :class:`concurrent.futures.ProcessPoolExecutor`.
+  Workers are started once and kept alive for all the files, so python
+  start-up, ``import pdpy_lib`` and the pd object database are paid once per
+  worker instead of once per file.
+
+  Parameters
+  ----------
+  json: :class:`dict`
+    The same arguments as :class:`pdpy_lib.extra.translator.Translator`, except:
+
+    *  ``input``: A directory (every file with the ``fro`` suffix) or a glob pattern
+    *  ``output``: An output directory (defaults to the directory of each input file).
+       The input files keep their path relative to the directory that contains
+       all of them, so the files of a recursive glob with the same name do not
+       overwrite each other. Two inputs that would still write the same output
+       raise an :class:`pdpy_lib.utilities.exceptions.ArgumentException`.
+
+  jobs: :class:`int`
+    The number of worker processes (defaults to the cpu count).
+    With ``1``, files are translated in this process.
+
+  Example
+  -------
+
+    >>> batch = Batch({'input':'patches/', 'fro':'pd', 'to':'json'}, jobs=4)
+    >>> summary = batch(report=sys.stdout)
+
+  """
+  def __init__(self, json, jobs=None):
+
+    self.arguments = dict(json)
+    self.jobs = int(jobs) if jobs else (os.cpu_count() or 1)
+
+    self.source = getFormat(self.arguments.get('fro'))
+    self.target = getFormat(self.arguments.get('to'))
+    if self.source is None or self.target is None:
+      raise ArgumentException("To or fro are missing or malformed")
+
+    self.inputs = self.__glob__(self.arguments.get('input'))
+    if not len(self.inputs):
+      raise ArgumentException("No ." + self.source + " files found in " + str(self.arguments.get('input')))
+
+    output = self.arguments.get('output')
+    self.output_dir = Path(output) if output is not None else None
+    self.outputs = self.__outputs__()
+
+  def __glob__(self, pattern):
+    """ Return the sorted list of input files from a directory or a glob pattern """
+    if pattern is None:
+      return []
+    if Path(pattern).is_dir():
+      pattern = (Path(pattern) / ('*.' + self.source)).as_posix()
+    return sorted(p for p in glob(pattern, recursive=True) if Path(p).is_file())
+
+  def __outputs__(self):
+    """ Return the output file of every input file
+
+    Raises an :class:`ArgumentException` if two inputs have the same output.
+    """
+    inputs = [ Path(f) for f in self.inputs ]
+    if self.output_dir is not None:
+      # the directory that contains all the inputs
+      base = Path(os.path.commonpath([ os.path.abspath(f.parent) for f in inputs ]))
+    outputs = []
+    seen = {}
+    for f in inputs:
+      if self.output_dir is None:
+        output_dir = f.parent
+      else:
+        output_dir = self.output_dir / Path(os.path.abspath(f.parent)).relative_to(base)
+      output = output_dir / (f.stem + '.' + self.target)
+      key = os.path.normcase(os.path.abspath(output))
+      if key in seen:
+        raise ArgumentException("Both " + seen[key] + " and " + f.as_posix() + " would be written to " + output.as_posix())
+      seen[key] = f.as_posix()
+      outputs.append(output)
+    return outputs
+
+  def __jobs__(self):
+    """ Yield the :class:`Translator` arguments for every input file """
+    for f, output in zip(self.inputs, self.outputs):
+      arguments = dict(self.arguments)
+      arguments['input'] = Path(f).as_posix()
+      arguments['output'] = output.as_posix()
+      yield arguments
+
+  def __iter__(self):
+    """ Yield a result dictionary for each file, as soon as it is done """
+    internals = self.arguments.get('internals')
+    encoding = self.arguments.get('encoding', 'utf-8')
+
+    if self.output_dir is not None:
+      for output_dir in sorted(set(o.parent for o in self.outputs)):
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    if self.jobs == 1:
+      _warmup(internals, encoding)
+      for arguments in self.__jobs__():
+        yield _translate(arguments)
+      return
+
+    with ProcessPoolExecutor(max_workers=self.jobs,
+                             initializer=_warmup,
+                             initargs=(internals, encoding)) as pool:
+      futures = { pool.submit(_translate, a) : a for a in self.__jobs__() }
+      for future in as_completed(futures):
+        try:
+          result = future.result()
+        except BrokenExecutor as e:
+          # a worker died: the files it did not finish fail
+          result = _failed(futures[future], e, traceback.format_exc())
+        yield result
+
+  def __call__(self, report=None):
+    """ Translate every file and return a summary dictionary
+
+    Parameters
+    ----------
+    report: file object or ``None``
+      If present, one json line per file is written to it as results come in,
+      followed by a last line with the summary.
+
+    """
+    start = time.perf_counter()
+    summary = { 'total' : len(self.inputs), 'ok' : 0, 'failed' : [] }
+
+    for result in self:
+      if result['ok']:
+        summary['ok'] += 1
+      else:
+        summary['failed'].append(result['input'])
+      if report is not None:
+        report.write(json_dumps(result) + "\n")
+        report.flush()
+
+    summary['elapsed'] = time.perf_counter() - start
+    if report is not None:
+      report.write(json_dumps({'summary' : summary}) + "\n")
+
+    return summary
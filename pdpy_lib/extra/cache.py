@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Cache
+=====
+"""
+
+import os
+import zlib
+import hashlib
+from pathlib import Path
+from pickle import dumps as pickle_dumps
+from pickle import loads as pickle_loads
+from pickle import HIGHEST_PROTOCOL as PICKLE_HIGHEST_PROTOCOL
+
+from ..utilities.utils import log
+
+__all__ = [ 'ParseCache' ]
+
+def _version():
+  """ Return a string identifying this pdpy version
+
+  Uses the installed package version, or a digest of the sources
+  when running from a checkout, so that code changes invalidate entries.
+  """
+  try:
+    from importlib.metadata import version
+    return version('pdpy-lib')
+  except Exception:
+    digest = hashlib.sha256()
+    package = Path(__file__).resolve().parent.parent
+    for p in sorted(package.rglob('*.py')):
+      stat = p.stat()
+      digest.update(p.relative_to(package).as_posix().encode())
+      digest.update(str((stat.st_size, stat.st_mtime_ns)).encode())
+    return 'dev-' + digest.hexdigest()[:16]
+
+class ParseCache(object):
+  r""" An on-disk cache of parsed :class:`pdpy_lib.patching.pdpy.PdPy` trees
+
+  Entries are keyed by a content hash of the input file together with
+  the pdpy version, the source format, the file name, its encoding and
+  the ``dtype`` of the arrays, so an entry is only reused if nothing that
+  affects parsing has changed.
+  Each entry is the zlib-compressed pickle of the parsed tree.
+
+  When the total size of the cache exceeds ``limit``, the least recently
+  used entries are evicted. Hits refresh the entry modification time.
+
+  .. warning::
+
+    Entries are pickles: only point ``path`` to a directory you trust.
+
+  Parameters
+  ----------
+  path : :class:`str` or ``None``
+    The cache directory (defaults: ``$PDPY_CACHE`` or ``~/.cache/pdpy``)
+
+  limit : :class:`int`
+    The maximum total size of the cache in bytes (defaults: 256 MB)
+
+  Example
+  -------
+
+    >>> cache = ParseCache()
+    >>> pdpy = cache.load('patch.pd', lambda: PdPy(pd_lines=...))
+    >>> cache.invalidate('patch.pd')
+
+  """
+
+  SUFFIX = '.pdpyc'
+  """ The file suffix of the cache entries """
+
+  VERSION = _version()
+  """ The pdpy version that is part of every key """
+
+  def __init__(self, path=None, limit=256 * 1024 * 1024):
+    if path is None:
+      path = os.environ.get('PDPY_CACHE', Path.home() / '.cache' / 'pdpy')
+    self.path = Path(path)
+    self.path.mkdir(parents=True, exist_ok=True)
+    self.limit = int(limit)
+
+  def key(self, filename, source=None, encoding='utf-8', dtype=None):
+    """ Return the cache key of a file: a hash of its content and context """
+    filename = Path(filename)
+    digest = hashlib.sha256()
+    for e in (self.VERSION, source, filename.name, encoding):
+      digest.update(str(e).encode() + b'\0')
+    if dtype is not None:
+      # the arrays are parsed into buffers of this type
+      digest.update(b'dtype=' + str(dtype).encode() + b'\0')
+    with open(filename, 'rb') as fp:
+      for chunk in iter(lambda: fp.read(1 << 20), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+  def __entry__(self, key):
+    """ Return the path of the entry for ``key`` """
+    return self.path / (key + self.SUFFIX)
+
+  def get(self, key):
+    """ Return the cached tree for ``key`` or ``None`` on a miss """
+    entry = self.__entry__(key)
+    try:
+      with open(entry, 'rb') as fp:
+        pdpy = pickle_loads(zlib.decompress(fp.read()))
+    except FileNotFoundError:
+      return None
+    except Exception as e:
+      # a corrupted or incompatible entry is just a miss
+      log(1, "Dropping cache entry", entry.name, e)
+      self.__remove__(entry)
+      return None
+    # mark the entry as recently used
+    os.utime(entry)
+    return pdpy
+
+  def put(self, key, pdpy):
+    """ Store a tree under ``key`` and evict old entries if needed """
+    entry = self.__entry__(key)
+    data = zlib.compress(pickle_dumps(pdpy, PICKLE_HIGHEST_PROTOCOL))
+    # write to a temporary file first, so readers never see half an entry
+    tmp = entry.with_suffix('.' + str(os.getpid()) + '.tmp')
+    with open(tmp, 'wb') as fp:
+      fp.write(data)
+    os.replace(tmp, entry)
+    self.evict()
+
+  def load(self, filename, loader, source=None, encoding='utf-8', dtype=None):
+    """ Return the tree of ``filename`` from the cache, or parse and store it
+
+    Parameters
+    ----------
+    filename : :class:`str` or :class:`pathlib.Path`
+      The input file
+
+    loader : callable
+      Called without arguments on a miss, returning the parsed tree
+
+    """
+    key = self.key(filename, source=source, encoding=encoding, dtype=dtype)
+    pdpy = self.get(key)
+    if pdpy is None:
+      pdpy = loader()
+      if pdpy is not None:
+        try:
+          self.put(key, pdpy)
+        except Exception as e:
+          # an uncacheable tree is still a valid result
+          log(1, "Could not cache", Path(filename).name, e)
+    return pdpy
+
+  def entries(self):
+    """ Return the entries sorted from the least to the most recently used """
+    entries = []
+    for e in self.path.glob('*' + self.SUFFIX):
+      try:
+        stat = e.stat()
+      except FileNotFoundError:
+        continue
+      entries.append((stat.st_mtime, stat.st_size, e))
+    return sorted(entries, key=lambda x:x[0])
+
+  def size(self):
+    """ Return the total size of the cache in bytes """
+    return sum(e[1] for e in self.entries())
+
+  def evict(self, limit=None):
+    """ Remove the least recently used entries until the cache fits ``limit`` """
+    limit = self.limit if limit is None else limit
+    entries = self.entries()
+    total = sum(e[1] for e in entries)
+    for _, size, entry in entries:
+      if total <= limit:
+        break
+      self.__remove__(entry)
+      total -= size
+
+  def invalidate(self, filename=None, source=None, encoding='utf-8', dtype=None):
+    """ Remove the entry of ``filename``, or every entry if it is ``None``
+
+    The ``source``, ``encoding`` and ``dtype`` are the ones the entry was
+    loaded with, as they are part of its key (see :func:`key`).
+    """
+    if filename is None:
+      self.clear()
+    else:
+      self.__remove__(self.__entry__(self.key(filename, source, encoding, dtype)))
+
+  def clear(self):
+    """ Remove every entry in the cache """
+    for _, _, entry in self.entries():
+      self.__remove__(entry)
+
+  def __remove__(self, entry):
+    try:
+      entry.unlink()
+    except FileNotFoundError:
+      pass
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Layout
+======
+"""
+
+from ..utilities.utils import log
+
+__all__ = [ "Layout" ]
+
+class Layout:
+  r""" Arrange the objects of a canvas in layers, from sources to sinks
+
+  A layered (Sugiyama style) layout that runs without recursion, in
+  about :math:`O((N+E) \log N)` time for :math:`N` nodes and :math:`E`
+  connections, so it handles feedback loops and very large canvases.
+  To use, simply import and call the class, as :class:`pdpy_lib.extra.arranger.Arranger`.
+
+  The layout is made in four steps:
+
+  1. :func:`__graph__`: build the adjacency lists once, from the edge list
+  2. :func:`__rank__`: reverse the connections that close a cycle (with an
+     iterative depth-first search), then rank each node by the longest
+     path that reaches it: its layer
+  3. :func:`__order__`: sort every layer by the mean position of the
+     neighbours of each node (the barycenter), sweeping down and up,
+     to reduce the crossings
+  4. :func:`__place__`: place every layer below the previous one, left to
+     right, each node as close as possible below the outlet it is
+     connected from
+
+  The nodes without any connection and the comments are placed in columns
+  to the right of the graph.
+
+  Parameters
+  ----------
+
+  canvas : :class:`pdpy.Canvas`
+    The canvas to arrange
+
+  verbose : `bool`
+    (optional) log the steps as ``INFO`` messages instead of ``DEBUG``
+    messages, see :func:`pdpy_lib.utilities.utils.log` (default: `False`)
+
+  hstep : `float`
+    (optional) the horizontal gap between nodes, in font sizes (default: `1.5`)
+
+  vstep : `float`
+    (optional) the vertical gap between layers, in font sizes (default: `1`)
+
+  xmargin : `int`
+    (optional) the left margin of the canvas (default: `10`)
+
+  ymargin : `int`
+    (optional) the top margin of the canvas (default: `10`)
+
+  sweeps : `int`
+    (optional) the amount of down and up sweeps to reduce the crossings (default: `4`)
+
+  Call the function
+
+  >>> Layout(p.root)
+
+
+  """
+  def __init__(self, canvas,
+              verbose=False,
+              hstep=1.5, vstep=1,
+              xmargin=10, ymargin=10,
+              sweeps=4):
+
+    self.verbose = verbose
+    self.canvas = canvas
+    self.font = self.__font__(canvas)
+    self.hgap = max(1, int(hstep * self.font))
+    self.vgap = max(1, int(vstep * self.font))
+    self.xmargin = xmargin
+    self.ymargin = ymargin
+    self.sweeps = sweeps
+
+    self.nodes = list(getattr(canvas, 'nodes', []))
+    self.comments = list(getattr(canvas, 'comments', []))
+
+    if not self.nodes and not self.comments:
+      self.__print__("Nothing to arrange.")
+      return
+
+    self.__call__()
+
+  def __call__(self):
+    self.__print__("========= begin layered layout ==========")
+    self.__graph__()
+    self.__rank__()
+    self.__order__()
+    self.__place__()
+    self.__print__("------------- end -----------")
+
+  def __print__(self, *args):
+    log(0 if self.verbose else 1, *args)
+
+  def __font__(self, canvas):
+    """ Returns the font size of the canvas, or of the canvas that contains it """
+    scope = canvas
+    while scope is not None:
+      font = getattr(scope, 'font', None)
+      if isinstance(font, (int, float)):
+        return font
+      scope = getattr(scope, '__p__', None)
+    return canvas.__d__.font['size']
+
+  def __size__(self, o):
+    """ Returns the width and height of the box of ``o`` """
+    # canvases without a font use the font of the canvas that contains them
+    w, h = o.__get_obj_size__(font=self.font)
+    return max(0, int(w)), max(0, int(h))
+
+  def __graph__(self):
+    """ Build the adjacency lists: one pass over the nodes and the edges
+
+    ``self.succ[i]`` and ``self.pred[i]`` are lists of ``(node, port)``,
+    with the outlet of the source for both, so the children of an outlet
+    can be placed below it.
+    """
+    nodes = self.nodes
+    by_id = {}
+    by_obj = {}
+    for i, n in enumerate(nodes):
+      by_obj[id(n)] = i
+      if hasattr(n, 'id'):
+        try:
+          by_id.setdefault(int(n.id), i)
+        except (TypeError, ValueError):
+          pass
+
+    def index(iolet):
+      obj = getattr(iolet, '__obj__', None)
+      if obj is not None and id(obj) in by_obj:
+        return by_obj[id(obj)]
+      return by_id.get(getattr(iolet, 'id', None))
+
+    n = len(nodes)
+    self.succ = [[] for _ in range(n)]
+    self.pred = [[] for _ in range(n)]
+    seen = set()
+    for e in getattr(self.canvas, 'edges', []):
+      s, t = index(e.source), index(e.sink)
+      if s is None or t is None or s == t:
+        continue
+      port = int(getattr(e.source, 'port', 0) or 0)
+      if (s, port, t) in seen:
+        continue
+      seen.add((s, port, t))
+      self.succ[s].append((t, port))
+      self.pred[t].append((s, port))
+
+  def __rank__(self):
+    """ Rank the nodes by their longest incoming path
+
+    The connections that close a cycle are found with an iterative
+    depth-first search and reversed, so the graph is acyclic. Then,
+    the layer of each node is one more than the layer of its
+    deepest parent, in topological order.
+    """
+    n = len(self.nodes)
+    succ, pred = self.succ, self.pred
+
+    # 0: unvisited, 1: on the stack, 2: done
+    state = [0] * n
+    reversed_edges = set()
+    # start from the sources, then from any node left (cycles only)
+    starts = [i for i in range(n) if not pred[i]] + list(range(n))
+    for root in starts:
+      if state[root]:
+        continue
+      state[root] = 1
+      stack = [(root, 0)]
+      while stack:
+        v, k = stack[-1]
+        if k < len(succ[v]):
+          stack[-1] = (v, k + 1)
+          t = succ[v][k][0]
+          if state[t] == 1:
+            # a feedback connection
+            reversed_edges.add((v, t))
+          elif state[t] == 0:
+            state[t] = 1
+            stack.append((t, 0))
+        else:
+          state[v] = 2
+          stack.pop()
+
+    # the acyclic children and the amount of acyclic parents of each node
+    dag = [[] for _ in range(n)]
+    indegree = [0] * n
+    for v in range(n):
+      for t, _ in succ[v]:
+        if (v, t) in reversed_edges:
+          a, b = t, v
+        else:
+          a, b = v, t
+        dag[a].append(b)
+        indegree[b] += 1
+
+    rank = [0] * n
+    queue = [i for i in range(n) if indegree[i] == 0]
+    head = 0
+    while head < len(queue):
+      v = queue[head]
+      head += 1
+      for t in dag[v]:
+        if rank[t] < rank[v] + 1:
+          rank[t] = rank[v] + 1
+        indegree[t] -= 1
+        if indegree[t] == 0:
+          queue.append(t)
+
+    self.rank = rank
+    self.__print__("reversed", len(reversed_edges), "feedback connections")
+
+  def __order__(self):
+    """ Sort the nodes of every layer to reduce the crossings
+
+    Every sweep sorts each layer by the barycenter of the neighbours of
+    its nodes in the layers already sorted: down by the parents, up by the
+    children. The outlet of a connection breaks ties, so the children of
+    the left outlets stay on the left.
+    """
+    n = len(self.nodes)
+    succ, pred = self.succ, self.pred
+
+    # the connected nodes take part in the layers
+    connected = [bool(succ[i] or pred[i]) for i in range(n)]
+    depth = max((self.rank[i] for i in range(n) if connected[i]), default=-1)
+    layers = [[] for _ in range(depth + 1)]
+    for i in range(n):
+      if connected[i]:
+        layers[self.rank[i]].append(i)
+
+    pos = [0.0] * n
+    def number(layer):
+      for k, i in enumerate(layer):
+        pos[i] = float(k)
+    for layer in layers:
+      number(layer)
+
+    def sweep(layers, neighbours, outlet):
+      for layer in layers:
+        keys = {}
+        for i in layer:
+          ns = neighbours[i]
+          if ns:
+            total = 0.0
+            for j, port in ns:
+              # the outlet of the connection, from the parent or to the child
+              total += pos[j] + (port if outlet else -port) * 1e-3
+            keys[i] = total / len(ns)
+          else:
+            keys[i] = pos[i]
+        layer.sort(key=keys.__getitem__)
+        number(layer)
+
+    # the outlets of the children are on their parents, see __graph__
+    for _ in range(self.sweeps):
+      sweep(layers[1:], pred, True)
+      sweep(layers[-2::-1], succ, False)
+
+    self.layers = layers
+    self.isolated = [i for i in range(n) if not connected[i]]
+
+  def __place__(self):
+    """ Place the layers from top to bottom and the rest to the right """
+    nodes = self.nodes
+    sizes = [self.__size__(o) for o in nodes]
+    # the distance between the outlets of each node
+    spacing = [max(self.hgap, sizes[i][0] // (1 + self.__outlets__(i))) for i in range(len(nodes))]
+    x_at = {}
+    right = self.xmargin
+    y = self.ymargin
+
+    for layer in self.layers:
+      cursor = self.xmargin
+      height = 0
+      for i in layer:
+        w, h = sizes[i]
+        # the mean position below the outlets of the parents
+        wanted = []
+        for j, port in self.pred[i]:
+          if j in x_at:
+            wanted.append(x_at[j] + port * spacing[j])
+        x = max(cursor, int(sum(wanted) / len(wanted))) if wanted else cursor
+        x_at[i] = x
+        nodes[i].addpos(x, y)
+        cursor = x + w + self.hgap
+        height = max(height, h)
+      right = max(right, cursor)
+      y += height + self.vgap
+
+    # the unconnected nodes and the comments, in columns of the canvas height
+    bottom = max(y, self.ymargin + self.__height__())
+    x, y, width = right, self.ymargin, 0
+    for o in [nodes[i] for i in self.isolated] + self.comments:
+      w, h = self.__size__(o)
+      if y > self.ymargin and y + h > bottom:
+        x, y, width = x + width + self.hgap, self.ymargin, 0
+      o.addpos(x, y)
+      y += h + self.vgap
+      width = max(width, w)
+
+  def __outlets__(self, i):
+    """ Returns the highest outlet used by node ``i`` """
+    return max((port for _, port in self.succ[i]), default=0)
+
+  def __height__(self):
+    """ Returns the height of the canvas window, if known """
+    dimension = getattr(self.canvas, 'dimension', None)
+    return int(getattr(dimension, 'height', 0) or 0)
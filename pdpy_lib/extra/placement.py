@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Placement
+=========
+"""
+
+from ..utilities.utils import log
+
+__all__ = [ "Placement" ]
+
+class Placement:
+  r""" Place the objects of a canvas that have no position, and keep the rest
+
+  This is the incremental arrangement: the objects that were placed,
+  by hand or by an earlier arrangement, stay where they are, and only
+  the new objects (or the ones marked with :func:`pdpy_lib.core.base.Base.unplace`)
+  are placed, next to the objects they are connected to:
+
+  *  below their parents, under the outlet they are connected from
+  *  above their children, if they have no placed parents
+  *  below everything else, if they are not connected to placed objects
+
+  Each object goes to the nearest free spot at the right of, or below,
+  that place, found in the spatial index of the canvas (see
+  :func:`pdpy_lib.core.canvasbase.CanvasBase.__spatial__`). The index and
+  the box sizes are kept from one arrangement to the next, with or without
+  ``PdPy(cache=True)``, so placing a few objects on a large canvas measures
+  and indexes only the objects placed. Finding them still looks at the
+  position of every object, which is cheap. The index is kept up to date
+  by setting attributes, so a box changed in place needs the attribute to
+  be set again (see :func:`pdpy_lib.patching.pdpy.PdPy.arrangement`).
+  A canvas without any placed object is arranged in full instead, by ``arrange``.
+
+  Parameters
+  ----------
+
+  canvas : :class:`pdpy.Canvas`
+    The canvas to arrange
+
+  arrange : callable
+    (optional) The arranger of the canvases without any placed object
+    (default: :class:`pdpy_lib.extra.layout.Layout`)
+
+  verbose : `bool`
+    (optional) log the steps as ``INFO`` messages instead of ``DEBUG`` messages (default: `False`)
+
+  hstep : `float`
+    (optional) the horizontal gap between boxes, in font sizes (default: `1.5`)
+
+  vstep : `float`
+    (optional) the vertical gap between boxes, in font sizes (default: `1`)
+
+  xmargin : `int`
+    (optional) the left margin of the canvas (default: `10`)
+
+  ymargin : `int`
+    (optional) the top margin of the canvas (default: `10`)
+
+  Example
+  -------
+
+    >>> pdpy.arrangement(6, incremental=True)
+    >>> pdpy.root.create(Obj('print'))
+    >>> pdpy.write()
+
+  """
+  def __init__(self, canvas,
+              arrange=None,
+              verbose=False,
+              hstep=1.5, vstep=1,
+              xmargin=10, ymargin=10):
+
+    self.verbose = verbose
+    self.canvas = canvas
+    font = getattr(canvas, 'font', None)
+    self.font = font if isinstance(font, (int, float)) else canvas.__font__()
+    self.hgap = max(1, int(hstep * self.font))
+    self.vgap = max(1, int(vstep * self.font))
+    # the free space kept around every box
+    self.pad = max(2, int(self.font) // 4)
+    # how far to the right a box can go before it drops to the next row
+    self.reach = 20 * int(self.font)
+    self.xmargin = xmargin
+    self.ymargin = ymargin
+
+    items = list(getattr(canvas, 'nodes', [])) + list(getattr(canvas, 'comments', []))
+    new = [ o for o in items if not self.__placed__(o) ]
+
+    if not new:
+      self.__print__("Nothing to place.")
+      return
+
+    if len(new) == len(items):
+      self.__print__("Nothing placed yet, arranging the canvas.")
+      if arrange is None:
+        from .layout import Layout as arrange
+      arrange(canvas)
+      return
+
+    self.__print__("Placing", len(new), "of", len(items), "objects")
+    self.grid = canvas.__spatial__()
+    self.__graph__(new)
+    for o in new:
+      self.__place__(o)
+
+  def __print__(self, *args):
+    log(0 if self.verbose else 1, *args)
+
+  @staticmethod
+  def __placed__(o):
+    """ Return ``True`` if ``o`` has a position """
+    p = getattr(o, 'position', None)
+    return getattr(p, 'x', None) is not None and getattr(p, 'y', None) is not None
+
+  def __graph__(self, new):
+    """ Find the parents and children of the new objects, with the outlets
+
+    This uses the edge index of the canvas, so only the connections
+    of the new objects are looked at.
+    """
+    canvas = self.canvas
+
+    def find(iolet):
+      obj = getattr(iolet, '__obj__', None)
+      return obj if obj is not None else canvas.get(iolet.id)
+
+    self.parents = {}
+    self.children = {}
+    for o in new:
+      if not hasattr(o, 'id') or not hasattr(canvas, 'incoming'):
+        continue
+      self.parents[id(o)] = [ (find(e.source), int(e.source.port)) for e in canvas.incoming(o) ]
+      self.children[id(o)] = [ find(e.sink) for e in canvas.outgoing(o) ]
+
+  def __outlets__(self, o):
+    """ Return the highest outlet of ``o`` that is connected """
+    return max((int(e.source.port) for e in self.canvas.outgoing(o)), default=0)
+
+  def __anchor__(self, o, w, h):
+    """ Return where ``o`` should go, next to its placed neighbours """
+    rects = self.grid.rects
+    parents = [ (p, port) for p, port in self.parents.get(id(o), []) if p is not o and p in rects ]
+    if parents:
+      xs = []
+      y = 0
+      for p, port in parents:
+        x1, _, x2, y2 = rects[p]
+        spacing = max(self.hgap, (x2 - x1) // (1 + self.__outlets__(p)))
+        xs.append(x1 + port * spacing)
+        y = max(y, y2 + self.vgap)
+      return sum(xs) // len(xs), y
+    children = [ c for c in self.children.get(id(o), []) if c is not o and c in rects ]
+    if children:
+      x = sum(rects[c][0] for c in children) // len(children)
+      y = min(rects[c][1] for c in children) - h - self.vgap
+      return x, max(self.ymargin, y)
+    bounds = self.grid.bounds
+    return self.xmargin, (bounds[3] if bounds else self.ymargin) + self.vgap
+
+  def __free__(self, x, y, w, h):
+    """ Return the nearest free spot for a box of ``w`` by ``h`` at the right of or below ``x`` and ``y`` """
+    pad, rects = self.pad, self.grid.rects
+    start = x
+    while True:
+      x = start
+      below = None
+      while x <= start + self.reach:
+        hits = self.grid.query((x - pad, y - pad, x + w + pad, y + h + pad))
+        if not hits:
+          return x, y
+        # jump past the boxes in the way
+        x = max(rects[k][2] for k in hits) + pad + 1
+        lowest = min(rects[k][3] for k in hits)
+        below = lowest if below is None else min(below, lowest)
+      # the next row starts below the first box that ends
+      y = max(y + 1, below + pad + 1)
+
+  def __place__(self, o):
+    """ Place ``o`` at the free spot nearest to its neighbours """
+    w, h = o.__get_obj_size__(font=self.font)
+    x, y = self.__anchor__(o, w, h)
+    x, y = self.__free__(max(self.xmargin, x), y, w, h)
+    o.addpos(x, y)
+    self.canvas.__locate__(o)
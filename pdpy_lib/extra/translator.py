@@ -20,13 +20,53 @@ from types import SimpleNamespace
 from ..core.base import Base
 from ..patching.pdpy import PdPy
 from ..encoding.pdpyencoder import PdPyEncoder
+from ..encoding.jsonwriter import JsonWriter
+from ..encoding.xmlwriter import XmlWriter
+from ..encoding.binformat import BinWriter, BinReader
 from ..parse.pdpyparser import PdPyParser
 from ..utilities.default import getFormat
 from ..utilities.exceptions import ArgumentException
-from ..utilities.utils import log, parsePdFileLines, loadPdFile, parsePdBinBuf
+from ..utilities.utils import log, iterPdLines, iterPdFile, parsePdBinBuf
 
 __all__ = [ 'Translator' ] 
 
+PDDB_CACHE = {}
+""" The pd object databases loaded by this process, keyed by path """
+
+def loadPddb(internals, encoding='utf-8'):
+  r""" Attempt to load PDDB manager
+
+  Fall back to json if the package is not there.
+  Get it here: `<https://github.com/pdpy-org/pddb>`_
+
+  The database is loaded once per process and kept in :data:`PDDB_CACHE`,
+  so that translating many files (see :class:`pdpy_lib.extra.batch.Batch`)
+  does not reload it every time.
+  """
+  pddb_path = Path(internals)
+  if not pddb_path.exists():
+    raise ArgumentException("PDDB:" + " " + pddb_path.as_posix() + " " + "is missing.")
+  
+  key = pddb_path.resolve().as_posix()
+  if key not in PDDB_CACHE:
+    import sys
+    pddb = None
+    try:
+      sys.path.append((pddb_path.parent / 'src').as_posix())
+      from pddb import PDDB
+      pddb = PDDB(dbname=pddb_path.resolve(), listen=False)
+    except ImportError:
+      print("Could not import pddb. Loading json instead.")
+      try:
+        with open(internals, "r", encoding=encoding) as fp:
+          pddb = json_load(fp, object_hook=lambda o:SimpleNamespace(**o))
+      except Exception as e:
+        print("Could not load pddb.json. See error below.")
+        print(e)
+    PDDB_CACHE[key] = pddb
+  
+  return PDDB_CACHE[key]
+
 class Translator(Base):
   r""" This class maintains and translates a `pdpy` Obj in memory. 
 
@@ -41,13 +81,16 @@ class Translator(Base):
   json: :class:`dict`
     A dictionary of arguments with the following keys:
     
-    *  ``to``: the target format. Can be `json`, `xml`, `pd`, or `pkl`.
-    *  ``fro``: the source format. Can be `json`, `xml`, `pd`, or `pkl`.
+    *  ``to``: the target format. Can be `json`, `xml`, `pd`, `pkl`, or `pdpyb`.
+    *  ``fro``: the source format. Can be `json`, `xml`, `pd`, `pkl`, or `pdpyb`.
     *  ``input``: An input file Path, will be formated using `pathlib.Path`
     *  ``output``: An output file Path, will be formated using `pathlib.Path`
     *  ``encoding`` (`str`, defaults: 'utf-8'): Encoding of the input file
     *  ``source`` (`str`, inferred from `input_file`): Source file type
     *  ``reflect`` (`bool`): If set to `True`, performs a reflected translation
+    *  ``cache`` (`str`): A directory to cache parsed files in. See :class:`pdpy_lib.extra.cache.ParseCache`
+    *  ``dtype`` (`str`): Keep the array values of a `.pd` input in a ``numpy`` buffer of this type,
+       such as ``float32``. See :class:`pdpy_lib.memory.buffer.ArrayBuffer`
   """
   def __init__(self, json):
 
@@ -72,7 +115,7 @@ class Translator(Base):
         raise ArgumentException("Input file suffix does not match with -f argument")
       if not self.input_file.exists():
         raise ArgumentException("File" + " " + self.input_file + " " + "does not exist.")
-      if self.output is None:
+      if getattr(self, 'output', None) is None:
         self.output_file = self.input_file.with_suffix("." + self.target)
         log(1, "Using" + " " + self.output_file.as_posix() + " " + "as output file")
       else:
@@ -81,56 +124,54 @@ class Translator(Base):
           raise ArgumentException("Input file suffix does not match with -f argument")
     
     # store an object containing a pd object database
-    if self.internals is not None:
-      r"""  Attempt to load PDDB manager
-
-      Fall back to json if the package is not there.
-      Get it here: `<https://github.com/pdpy-org/pddb>`_
-      """
-      import sys
-      pddb_path = Path(self.internals)
-      if pddb_path.exists():
-        try:
-          sys.path.append((pddb_path.parent / 'src').as_posix())
-          from pddb import PDDB
-          self.pddb = PDDB(dbname=pddb_path.resolve(), listen=False)
-        except ImportError:
-          print("Could not import pddb. Loading json instead.")
-          try:
-            with open(self.internals, "r", encoding=self.encoding) as fp:
-              self.pddb=json_load(fp,object_hook=lambda o:SimpleNamespace(**o))
-          except Exception as e:
-            print("Could not load pddb.json. See error below.")
-            print(e)
-      else:
-        raise ArgumentException("PDDB:" + " " + pddb_path.as_posix() + " " + "is missing.")
+    # (the arguments that are None are not set, see Base.__setattr__)
+    if getattr(self, 'internals', None) is not None:
+      self.pddb = loadPddb(self.internals, self.encoding)
 
-    # Load the source file
+    # Load the source file, from the parse cache if there is one
+    if hasattr(self, 'cache'):
+      from .cache import ParseCache
+      self.pdpy = ParseCache(self.cache).load(self.input_file,
+                                              self.__load__,
+                                              source = self.source,
+                                              encoding = self.encoding,
+                                              dtype = getattr(self, 'dtype', None))
+    else:
+      self.pdpy = self.__load__()
+
+  def __load__(self):
+    """ Load the source file into a :class:`PdPy` instance """
     
     if self.source == "pd":
       pd_file_path = self.input_file.as_posix()
-      pd_file = loadPdFile(pd_file_path, self.encoding)
-      pd_lines = parsePdFileLines(pd_file)
-      self.pdpy = PdPy(
+      # map the file and tokenize lazily, one pd line at a time
+      pd_file = iterPdFile(pd_file_path, self.encoding)
+      pd_lines = iterPdLines(pd_file)
+      pdpy = PdPy(
           name = self.input_file.name,
           encoding = self.encoding,
-          pd_lines = pd_lines
+          pd_lines = pd_lines,
+          array_dtype = getattr(self, 'dtype', None)
       )
 
     elif self.source == "json":
       with open(self.input_file, "r", encoding=self.encoding) as fp:
-        self.pdpy = json_load(fp, object_hook = PdPyEncoder())
-      self.pdpy.__jsontree__()
+        pdpy = json_load(fp, object_hook = PdPyEncoder())
+      pdpy.__jsontree__()
 
     elif self.source == "pkl":
       with open(self.input_file, "rb") as fp:
         data = pickle_load(fp, encoding=self.encoding)
-        self.pdpy = json_loads(data, object_hook = PdPyEncoder())
-      self.pdpy.__jsontree__()
+        pdpy = json_loads(data, object_hook = PdPyEncoder())
+      pdpy.__jsontree__()
+    
+    elif self.source == "pdpyb":
+      with open(self.input_file, "rb") as fp:
+        pdpy = BinReader(fp).load()
     
     elif self.source == "pdpy":
       with open(self.input_file, "r", encoding=self.encoding) as fp:
-        self.pdpy = PdPyParser(
+        pdpy = PdPyParser(
           fp.readlines(), # pdpy_file_pointer
           self.pddb,
           name = self.input_file.name,
@@ -139,14 +180,15 @@ class Translator(Base):
     
     elif self.source == "xml":
       with open(self.input_file, "r", encoding=self.encoding) as fp:
-        self.pdpy = PdPy(
+        pdpy = PdPy(
             name = self.input_file.name,
             encoding = self.encoding,
             xml = fp
         )
     else:
       raise ValueError("Unknown source type: {}".format(self.source))
-  
+    
+    return pdpy
 
   def __call__(self, target=None, out=None):
     
@@ -159,34 +201,44 @@ class Translator(Base):
     if not isinstance(out, Path):
       out = Path(out)
     
-    if target == 'json' or target == 'pkl':
-      # return a json string representation from pdpy
+    if target == "json" and self.pdpy is not None:
+      # stream the json representation into the file
+      ofname = out.with_suffix(".json")
+      with open(ofname, 'w', encoding=self.encoding) as fp:
+        JsonWriter(fp).dump(self.pdpy)
+      # keep the path of the json file, self.json is the json string
+      self.json_file = ofname
+
+      # the Pd reflection logic when json is the target
+      if self.reflect:
+        with open(self.json_file, "r", encoding=self.encoding) as fp:
+          pdpy = json_load(fp, object_hook = PdPyEncoder()) # read back the json file
+        pdpy.__jsontree__()
+        self.__reflect__(out, pdpy.__pd__())
+
+    if target == "pkl" and self.pdpy is not None:
+      # the pickle holds the json string representation from pdpy
       self.json = self.pdpy.__json__()
-      if self.json is not None:
-        if target == 'json':
-          ofname = out.with_suffix(".json")
-          with open(ofname, 'w', encoding=self.encoding) as fp:
-            fp.write(self.json)
-        elif target == "pkl":
-          ofname = out.with_suffix(".pkl")
-          with open(out.with_suffix(".pkl"), "wb") as fp:
-            pickle_dump(self.json, fp, PICKLE_HIGHEST_PROTOCOL)
+      ofname = out.with_suffix(".pkl")
+      with open(ofname, "wb") as fp:
+        pickle_dump(self.json, fp, PICKLE_HIGHEST_PROTOCOL)
 
-        # the Pd reflection logic when json is the target
-        if self.reflect:
-          self.pd_ref = PdPy(
-            name = self.input_file.name,
-            encoding = self.encoding,
-            json = self.json
-          ).__pd__()
-          if self.pd_ref is not None:
-            out = out.parent / (out.stem + '_ref')
-            ofname = out.with_suffix(".pd")
-            with open(ofname, 'w', encoding=self.encoding) as fp:
-              fp.write(self.pd_ref)
+      # the Pd reflection logic when pkl is the target
+      if self.reflect:
+        pdpy = json_loads(self.json, object_hook = PdPyEncoder())
+        pdpy.__jsontree__()
+        self.__reflect__(out, pdpy.__pd__())
 
-      else:
-        log(2, "No JSON representation available")
+    if target == "pdpyb" and self.pdpy is not None:
+      # write the binary container
+      ofname = out.with_suffix(".pdpyb")
+      with open(ofname, "wb") as fp:
+        BinWriter(fp).dump(self.pdpy)
+
+      # the Pd reflection logic when pdpyb is the target
+      if self.reflect:
+        with open(ofname, "rb") as fp:
+          self.__reflect__(out, BinReader(fp).load().__pd__())
 
     if target == "pd" and self.pdpy is not None:
       # get the pd representation
@@ -210,26 +262,25 @@ class Translator(Base):
         log(2, "No Pd representation available")
       
     if target == "xml" and self.pdpy is not None:
-      # get the xml representation
-      self.xml = self.pdpy.__xml__()
-      if self.xml is not None:
-        ofname = out.with_suffix(".xml")
-        self.xml.write(ofname.as_posix(), encoding=self.encoding)
+      # stream the xml representation into the file
+      ofname = out.with_suffix(".xml")
+      with open(ofname, 'w', encoding=self.encoding, errors='xmlcharrefreplace') as fp:
+        self.pdpy.__xml_write__(XmlWriter(fp, encoding=self.encoding))
+      # keep the path of the xml file
+      self.xml = ofname
 
-        # the Pd reflection logic when xml is the target
-        if self.reflect:
-          self.xml_ref = PdPy(
-            name = self.input_file.name,
-            encoding = self.encoding,
-            xml = self.xml.to_string() # give it an xml string
-           ).__pd__()
-          if self.xml_ref is not None:
-            out = out.parent / (out.stem + '_ref')
-            ofname = out.with_suffix(".pd")
-            with open(ofname, 'w', encoding=self.encoding) as fp:
-              fp.write(self.xml_ref)
-      else:
-        log(2, "No XML representation available")
+      # the Pd reflection logic when xml is the target
+      if self.reflect:
+        self.xml_ref = PdPy(
+          name = self.input_file.name,
+          encoding = self.encoding,
+          xml = self.xml.as_posix() # read back the xml file
+         ).__pd__()
+        if self.xml_ref is not None:
+          out = out.parent / (out.stem + '_ref')
+          ofname = out.with_suffix(".pd")
+          with open(ofname, 'w', encoding=self.encoding) as fp:
+            fp.write(self.xml_ref)
       
       # self.xml = JsonToXml(self.pdpy)
       # if self.xml is not None:
@@ -240,3 +291,11 @@ class Translator(Base):
       #      self.xml_ref = JsonToXml(self.pdpy)
 
   # end def __call__
+
+  def __reflect__(self, out, pd):
+    """ Write ``pd``, the reflected Pd representation, next to ``out`` """
+    self.pd_ref = pd
+    if self.pd_ref is not None:
+      out = out.parent / (out.stem + '_ref')
+      with open(out.with_suffix(".pd"), 'w', encoding=self.encoding) as fp:
+        fp.write(self.pd_ref)
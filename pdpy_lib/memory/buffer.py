@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Array Buffer
+============
+"""
+
+try:
+  import numpy
+  HAS_NUMPY = True
+except ModuleNotFoundError:
+  HAS_NUMPY = False
+
+__all__ = [ 'ArrayBuffer', 'ArrayTokens' ]
+
+DTYPES = ( 'float32', 'float64' )
+""" The data types of the buffer, the ones that the pdpyb format reads back """
+
+class ArrayBuffer(object):
+  r""" The float values of a pd array, stored in a ``numpy`` buffer
+
+  An alternative to the list of floats kept by
+  :class:`pdpy_lib.memory.data.Data` for the ``#A`` lines of arrays.
+  It behaves like a list of floats for the callers that index, slice,
+  iterate, append, extend, insert, pop, concatenate (``+``) or look for
+  a value (``in``), while the values are parsed and formatted in bulk
+  and take one ``float32`` or ``float64`` each. Unlike a list, it only
+  holds numbers: assigning to a slice or deleting items is not supported.
+
+  The buffer is used when a ``dtype`` is given to the parser, with
+  ``PdPy(array_dtype='float32')``, or set in the ``array`` defaults (see
+  :class:`pdpy_lib.utilities.default.Default`), and ``numpy`` is
+  installed, see :func:`enabled`.
+
+  Parameters
+  ----------
+  data : iterable
+    The values, as numbers or as numeric strings (default: empty)
+
+  dtype : :class:`str`
+    The ``numpy`` data type: ``float64``, which keeps the values exactly
+    as the float lists, or ``float32``, which keeps them as pd does.
+    Other types raise a :class:`ValueError` (default: ``float64``)
+
+  Example
+  -------
+
+    >>> pdpy = PdPy(name='patch', pd_lines=pd_lines, array_dtype='float32')
+
+  """
+  __slots__ = ('__buf__', '__size__')
+
+  def __init__(self, data=(), dtype='float64'):
+    if numpy.dtype(dtype).name not in DTYPES:
+      raise ValueError("Unsupported array dtype " + repr(dtype) + ", use one of " + ", ".join(DTYPES))
+    if isinstance(data, ArrayBuffer):
+      data = data.array
+    try:
+      buf = numpy.array(data, dtype=dtype)
+    except ValueError:
+      # numpy does not read some of the strings that python does
+      buf = numpy.array(list(map(float, data)), dtype=dtype)
+    self.__buf__ = buf.reshape(-1)
+    self.__size__ = len(self.__buf__)
+
+  @staticmethod
+  def enabled(dtype):
+    """ Return ``True`` if the values can be stored with ``dtype`` """
+    return dtype is not None and HAS_NUMPY
+
+  @classmethod
+  def zeros(cls, size, dtype='float64'):
+    """ Return a buffer of ``size`` zeros """
+    return cls(numpy.zeros(size, dtype=dtype), dtype=dtype)
+
+  @property
+  def array(self):
+    """ The values, as a :class:`numpy.ndarray` that shares the buffer """
+    return self.__buf__[:self.__size__]
+
+  @property
+  def dtype(self):
+    """ The name of the ``numpy`` data type """
+    return self.__buf__.dtype.name
+
+  def tolist(self):
+    """ Return the values as a list of floats """
+    return self.array.tolist()
+
+  def __len__(self):
+    return self.__size__
+
+  def __iter__(self):
+    return iter(self.tolist())
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return self.array[index].tolist()
+    return self.array[index].item()
+
+  def __setitem__(self, index, value):
+    self.array[index] = value
+
+  def __eq__(self, other):
+    if isinstance(other, ArrayBuffer):
+      other = other.tolist()
+    return self.tolist() == other
+
+  def __contains__(self, value):
+    try:
+      return bool((self.array == value).any())
+    except (TypeError, ValueError):
+      return False
+
+  def __add__(self, other):
+    """ Return a new buffer with the values of this one, then of ``other`` """
+    result = ArrayBuffer(self.array, dtype=self.dtype)
+    result.extend(other)
+    return result
+
+  def __radd__(self, other):
+    """ Return a list with the values of ``other``, then of this one """
+    return list(other) + self.tolist()
+
+  def __repr__(self):
+    return self.__class__.__name__ + '(' + repr(self.tolist()) + ', dtype=' + repr(self.dtype) + ')'
+
+  def __reduce__(self):
+    return (self.__class__, (self.tolist(), self.dtype))
+
+  def __reserve__(self, size):
+    """ Grow the buffer, at least doubling it, to hold ``size`` values """
+    if size > len(self.__buf__):
+      buf = numpy.zeros(max(size, 2 * len(self.__buf__)), dtype=self.__buf__.dtype)
+      buf[:self.__size__] = self.array
+      self.__buf__ = buf
+
+  def append(self, value):
+    """ Append one value """
+    self.__reserve__(self.__size__ + 1)
+    self.__buf__[self.__size__] = value
+    self.__size__ += 1
+
+  def extend(self, values):
+    """ Append the ``values`` """
+    values = numpy.asarray(values.array if isinstance(values, ArrayBuffer) else values, dtype=self.__buf__.dtype).reshape(-1)
+    self.__reserve__(self.__size__ + len(values))
+    self.__buf__[self.__size__:self.__size__ + len(values)] = values
+    self.__size__ += len(values)
+
+  def insert(self, index, value):
+    """ Insert one value before ``index``, as :meth:`list.insert` does """
+    size = self.__size__
+    index = max(0, min(size, index + size if index < 0 else index))
+    self.__reserve__(size + 1)
+    buf = self.__buf__
+    buf[index + 1:size + 1] = buf[index:size]
+    buf[index] = value
+    self.__size__ += 1
+
+  def pop(self, index=-1):
+    """ Remove and return the value at ``index`` (default: the last one) """
+    size = self.__size__
+    if not size:
+      raise IndexError("pop from empty " + self.__class__.__name__)
+    if index < 0:
+      index += size
+    if not 0 <= index < size:
+      raise IndexError(self.__class__.__name__ + " index out of range")
+    buf = self.__buf__
+    value = buf[index].item()
+    buf[index:size - 1] = buf[index + 1:size]
+    self.__size__ -= 1
+    return value
+
+  def __strings__(self):
+    """ Return the values as strings, as ``str`` does for the list values
+
+    ``float32`` values are written with the fewest digits that read back
+    to the same ``float32``, instead of the digits of their ``float64``.
+    """
+    if self.__buf__.dtype == numpy.float64:
+      return list(map(float.__repr__, self.tolist()))
+    return self.array.astype(str).tolist()
+
+  def __pd__(self):
+    """ Return the values as the atoms of a pd ``#A`` line """
+    s = self.__strings__()
+    # pd writes zeros as 0, see pdpy_lib.memory.data.Data.__pd__
+    for i in numpy.flatnonzero(self.array == 0).tolist():
+      s[i] = '0'
+    return ' '.join(s)
+
+class ArrayTokens(object):
+  r""" The values of a pd array, kept as the tokens of its ``#A`` line
+
+  The tokens are converted the first time the values are used, by
+  indexing, iterating, or writing them as json or xml. Until then,
+  :func:`__pd__` writes the tokens back exactly as they were read.
+  This is what :class:`pdpy_lib.patching.pdpy.PdPy` keeps for every
+  ``#A`` line when it is created with ``lazy=True``.
+
+  Parameters
+  ----------
+  tokens : :class:`list`
+    The values of the ``#A`` line, as strings
+
+  dtype : :class:`str` or ``None``
+    The ``dtype`` of the array defaults: the values are converted into an
+    :class:`ArrayBuffer` if it is enabled, or into a list of floats
+
+  """
+  __slots__ = ('tokens', 'dtype', '__values__')
+
+  def __init__(self, tokens, dtype=None, values=None):
+    self.tokens = tokens
+    self.dtype = dtype
+    self.__values__ = values
+
+  @property
+  def decoded(self):
+    """ ``True`` once the tokens have been converted """
+    return self.__values__ is not None
+
+  @property
+  def values(self):
+    """ The converted values, as a list of floats or an :class:`ArrayBuffer` """
+    if self.__values__ is None:
+      if ArrayBuffer.enabled(self.dtype):
+        self.__values__ = ArrayBuffer(self.tokens, dtype=self.dtype)
+      else:
+        self.__values__ = list(map(float, self.tokens))
+      # the values can change from now on, so the tokens are stale
+      self.tokens = None
+    return self.__values__
+
+  def tolist(self):
+    """ Return the values as a list of floats """
+    values = self.values
+    return values.tolist() if isinstance(values, ArrayBuffer) else list(values)
+
+  def __len__(self):
+    return len(self.tokens) if self.__values__ is None else len(self.__values__)
+
+  def __iter__(self):
+    return iter(self.values)
+
+  def __getitem__(self, index):
+    return self.values[index]
+
+  def __setitem__(self, index, value):
+    self.values[index] = value
+
+  def __eq__(self, other):
+    if isinstance(other, ArrayTokens):
+      other = other.tolist()
+    return self.tolist() == other
+
+  def __repr__(self):
+    if self.__values__ is None:
+      return self.__class__.__name__ + '(' + repr(self.tokens) + ')'
+    return repr(self.__values__)
+
+  def __reduce__(self):
+    return (self.__class__, (self.tokens, self.dtype, self.__values__))
+
+  def append(self, value):
+    """ Append one value """
+    self.values.append(value)
+
+  def extend(self, values):
+    """ Append the ``values`` """
+    self.values.extend(values)
+
+  def insert(self, index, value):
+    """ Insert one value before ``index`` """
+    self.values.insert(index, value)
+
+  def pop(self, index=-1):
+    """ Remove and return the value at ``index`` (default: the last one) """
+    return self.values.pop(index)
+
+  def __contains__(self, value):
+    return value in self.values
+
+  def __add__(self, other):
+    if isinstance(other, ArrayTokens):
+      other = other.values
+    return self.values + other
+
+  def __radd__(self, other):
+    return other + self.tolist()
+
+  def __pd__(self):
+    """ Return the tokens as they were read, if the values were not used """
+    return ' '.join(self.tokens)
@@ -7,6 +7,7 @@
 """ Data Class Definition """
 
 from . import types
+from .buffer import ArrayBuffer, ArrayTokens
 from ..core.base import Base
 from ..utilities.utils import splitByEscapedChar, log, splitByNone
 
@@ -20,7 +21,9 @@ class Data(Base):
                head=None,
                template=None,
                json=None,
-               xml=None):
+               xml=None,
+               lazy=False,
+               dtype=None):
 
     self.__pdpy__ = self.__class__.__name__
     super().__init__(pdtype='A', cls=head or '0')
@@ -35,7 +38,13 @@ class Data(Base):
         self.__cls__ = str(head)
         self.header = self.__cls__
         if self.__isnum__(self.header):
-          self.data = list(map(lambda x: float(x), data))
+          if dtype is None:
+            dtype = self.__d__.array.get('dtype')
+          if lazy:
+            # keep the tokens until the values are used
+            self.data = ArrayTokens(data, dtype=dtype)
+          else:
+            self.data = self.__floats__(data, dtype)
         elif 'saved' == self.header:
           self.data = list(map(lambda x: str(x), data))
         elif 'set' == self.header:
@@ -57,6 +66,16 @@ class Data(Base):
         else:
           raise ValueError("Struct and Data must be present.")
   
+  def __floats__(self, data, dtype=None):
+    """ Returns the values of an array of floats, as a list or as an
+    :class:`pdpy_lib.memory.buffer.ArrayBuffer` with ``dtype``
+    """
+    if ArrayBuffer.enabled(dtype):
+      if isinstance(data, ArrayBuffer) and data.dtype == dtype:
+        return data
+      return ArrayBuffer(data, dtype=dtype)
+    return list(map(lambda x: float(x), data))
+
   def add(self, attr, value):
     """ Adds a value to the data list in attr """
     if not hasattr(self, attr):
@@ -199,21 +218,37 @@ class Data(Base):
     if hasattr(self, 'data'):
 
       if hasattr(self, 'header'):
+        values = self.data
+        if isinstance(values, ArrayTokens):
+          if not values.decoded:
+            # the values were never used: write the tokens back as they were
+            return super().__pd__(values.__pd__())
+          values = values.values
+
+        if isinstance(values, ArrayBuffer):
+          # the buffer formats all of its values at once
+          return super().__pd__(values.__pd__())
+
         if self.__isnum__(self.header):
-          s = ' '.join(list(map(lambda x:str(self.__num__(x)), self.data)))
+          # numbers are already parsed: only zeros and strings need __num__
+          num = self.__num__
+          s = ' '.join([ 
+            str(x) if type(x) is int or (type(x) is float and x != 0) 
+            else str(num(x)) for x in values
+          ])
           return super().__pd__(s)
           # return super().__pd__('0 '+s)
         
         if self.header == 'set' or self.header == 'saved':
           self.__cls__ = self.header
-          s = ''
+          s = []
           for d in self.data:
             if type(d) in (int, float, str):
-              s += str(d)
+              s.append(str(d))
             else:
-              s += ' ' + ' '.join(list(map(lambda x:str(x), d)))
-            s += ' \\;'
-          return super().__pd__(s)
+              s.append(' ' + ' '.join(map(str, d)))
+            s.append(' \\;')
+          return super().__pd__(''.join(s))
         
         # FIXME: this is a hack to get the 'obj' class working as float arrays
         elif self.header == 'obj':
@@ -227,26 +262,26 @@ class Data(Base):
     
     else:
       
-      s = ''
+      s = []
       # call the pd method on every float (PdFLoat) element
       if (hasattr(self, 'float') or hasattr(self, 'floats')) and hasattr(template, 'float'):
         for x in getattr(self, 'float', getattr(self, 'floats', [])):
-          s += ' ' + x.__pd__()
+          s.append(' ' + x.__pd__())
       
       # call the pd method on every symbol (Symbol) element
       if (hasattr(self, 'symbol') or hasattr(self, 'symbols'))  and hasattr(template, 'symbol'):
         for x in getattr(self, 'symbol', getattr(self, 'symbols', [])):
-          s += ' ' + x.__pd__()
+          s.append(' ' + x.__pd__())
       
-      if s != '': s += self.__semi__
+      if len(s): s.append(self.__semi__)
 
       # call the pd method on the array (List) element
       if (hasattr(self, 'array') or hasattr(self, 'arrays')) and hasattr(template, 'array'):
         for x, t in zip(getattr(self, 'array', getattr(self, 'arrays', [])), template.array):
           _, _template = template.__p__.getTemplate(t.template)
-          s += ' ' + x.__pd__(_template)
+          s.append(' ' + x.__pd__(_template))
       
-      return s
+      return ''.join(s)
 
     # return an empty string if nothing else happened    
     return ''
@@ -262,10 +297,16 @@ class Data(Base):
       if hasattr(self, 'header'):
         super().__update_attrib__(x, 'header', self.header)
       
+      values = self.data
+      if isinstance(values, ArrayTokens):
+        values = values.values
+      if isinstance(values, ArrayBuffer):
+        values = values.__strings__()
+
       if self.__d__.xml['data_as_text']:
-        x.text = ' '.join(list(map(lambda x:str(x),self.data)))
+        x.text = ' '.join(list(map(lambda x:str(x),values)))
       else:
-        for d in self.data:
+        for d in values:
           if isinstance(d, list):
             for dd in d:
               super().__subelement__(x, 'datum', text=str(dd))
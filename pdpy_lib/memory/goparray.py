@@ -10,9 +10,11 @@ GOP Array
 """
 
 from . import data
+from .buffer import ArrayBuffer
 from ..core.base import Base
 from ..utilities.default import GOPArrayFlags
 from ..utilities.utils import log
+from ..utilities.wavfile import readWav, writeWav
 
 __all__ = [ 'GOPArray' ]
 
@@ -29,7 +31,16 @@ class GOPArray(Base):
     A dictionary of the JSON object. For example: ```{ 'name' : 'array_name', 'length' : 100, 'type' : 'float', 'flag' : 0, 'className' : 'goparray'}```
   
   **kwargs:
-    Other keyword arguments such as ``name``, ``head``, ``length``, and ``data``
+    Other keyword arguments such as ``name``, ``head``, ``length``, and ``data``,
+    or ``wav`` (and ``channel``) to read the data from a wav file (see :func:`readwav`),
+    and ``dtype`` to keep the values in a :class:`pdpy_lib.memory.buffer.ArrayBuffer`
+    (default: the ``dtype`` of the array defaults)
+
+  Example
+  -------
+
+    >>> table = pdpy.createGOPArray(name='ir', wav='impulse.wav')
+    >>> table.writewav('copy.wav', samplerate=48000)
 
   """
   def __init__(self, json=None, **kwargs):
@@ -58,6 +69,9 @@ class GOPArray(Base):
     else:
       self.length = self.__d__.array['size']
     
+    if kwargs.get('dtype') is not None:
+      self.__dtype__ = kwargs.pop('dtype')
+
     if 'data' in kwargs:
       _data = kwargs.pop('data')
     else:
@@ -67,10 +81,56 @@ class GOPArray(Base):
     self.type = self.__d__.array['type']
     self.flag = self.__d__.array['flag']
     
-    super().__setdata__(self, data.Data(data=_data, head=_head))
+    if 'wav' in kwargs:
+      self.readwav(kwargs.pop('wav'), channel=kwargs.pop('channel', 0))
+    else:
+      self.__chunks__(_data, _head)
 
     # print("Pdtype", self.__type__, self.__cls__)
 
+  def __chunks__(self, values, head=0):
+    """ Add the ``values`` as ``#A`` lines of at most ``chunk`` values each """
+    size = self.__d__.array['chunk']
+    if isinstance(values, ArrayBuffer):
+      values = values.array
+    for i in range(0, max(len(values), 1), size):
+      super().__setdata__(self, data.Data(data=values[i:i + size], head=int(head) + i, dtype=getattr(self, '__dtype__', None)))
+
+  def readwav(self, path, channel=0):
+    """ Replace the data with a channel of a PCM wav file
+    
+    The file is read in blocks of ``chunk`` frames, each one becoming
+    an ``#A`` line, and the length becomes the amount of frames.
+    See :func:`pdpy_lib.utilities.wavfile.readWav`.
+    """
+    dtype = getattr(self, '__dtype__', None) or self.__d__.array.get('dtype')
+    buffered = ArrayBuffer.enabled(dtype)
+    lines = []
+    offset = 0
+    for block in readWav(path, channel=channel, blocksize=self.__d__.array['chunk'], dtype=dtype if buffered else None):
+      if buffered:
+        # a buffer of the same dtype is kept as it is
+        line = data.Data(data=ArrayBuffer(block, dtype=dtype), head=offset, dtype=dtype)
+      else:
+        # the block is floats already, do not convert it again
+        line = data.Data(data=(), head=offset)
+        line.data = block
+      lines.append(line)
+      offset += len(block)
+    # set, not appended, so the canvas sees the change (see Base.__setattr__)
+    self.data = lines
+    self.length = offset
+    return self
+
+  def writewav(self, path, samplerate=44100, sampwidth=2):
+    """ Write the data into a mono PCM wav file, one ``#A`` line at a time
+    
+    Returns the amount of frames written.
+    See :func:`pdpy_lib.utilities.wavfile.writeWav`.
+    """
+    blocks = (d.data for d in getattr(self, 'data', []) if hasattr(d, 'data'))
+    return writeWav(path, blocks, samplerate=samplerate, sampwidth=sampwidth)
+
   def addflag(self, flag):
     # log(1, "Adding flag: {}".format(flag))
     if flag is not None and flag.isnumeric():
@@ -88,9 +148,7 @@ class GOPArray(Base):
     
     elif self.__cls__ in ('array', 'obj'):
       s = super().__pd__(" ".join(map(lambda x:str(x),[self.name,self.length,self.type,self.flag])))
-      for x in getattr(self, 'data', []):
-        s += x.__pd__()
-      return s
+      return ''.join([s] + [x.__pd__() for x in getattr(self, 'data', [])])
     
     else:
       log(1, "Unknown GOPArray format: {}".format(self.__cls__))
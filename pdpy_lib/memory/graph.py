@@ -46,12 +46,12 @@ class Graph(Base):
     s = self.name
     s += ' ' + self.range.__pd__(order=1)
     s += ' ' + self.area.__pd__(order=1)
-    s = super().__pd__(s)
+    s = [ super().__pd__(s) ]
     for x in getattr(self, 'array', []):
-      s += "#X array" + " " + str(x['name'])  + " " + str(x['length'])  + " " + str(x['type'])
-      s += self.__end__
-    s += '#X pop' + self.__end__
-    return s
+      s.append("#X array" + " " + str(x['name'])  + " " + str(x['length'])  + " " + str(x['type']))
+      s.append(self.__end__)
+    s.append('#X pop' + self.__end__)
+    return ''.join(s)
 
   def __xml__(self):
     """ Return the XML Element for this object """
@@ -58,8 +58,7 @@ class Struct(Base):
           self.addArray(pd_name, array_name)
           i += 1
         else:
-          log(1, "Unparsed Struct Field #" + str(i))
-          log(1, self.name, pd_lines)
+          log(1, "Unparsed Struct Field #" + str(i), self.name, pd_lines)
           self.__dumps__()
         i += 2
     else:
@@ -154,7 +153,7 @@ class Struct(Base):
           
         if hasattr(template, 'array'):
           #TODO: implement this
-          log(1,"DS recursion on arrays implemented")
+          log(1, "DS recursion on arrays is not implemented")
     
     if len(_data):
       return _data
@@ -4,3 +4,7 @@
 # This file is part of the pdpy project: https://github.com/pdpy-org
 # Copyright (C) 2021-22 Fede Camara Halac
 # **************************************************************************** #
+
+from .. import __lazy__
+
+__getattr__ = __lazy__(__name__)
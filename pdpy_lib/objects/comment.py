@@ -83,4 +83,6 @@ class Comment(Object):
     if not hasattr(self, 'text'):
       self.text = []
     self.text.append(text.replace(',', ' \\,').replace(';', ' \\;'))
+    self.__resize__()
+    self.__touch__()
   
\ No newline at end of file
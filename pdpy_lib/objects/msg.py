@@ -56,7 +56,10 @@ class Msg(Object):
     if not hasattr(self, "targets"):
       self.targets = []
     target = Message(address=address)
+    target.__parent__(parent=self)
     self.targets.append(target)
+    self.__resize__()
+    self.__touch__()
     return target
 
 
@@ -136,13 +139,12 @@ class Msg(Object):
 
   def __pd__(self):
     """ Return the pd-lang string for this message """
-    s = ''
-    for target in getattr(self, "targets", []):
-      s += target.__pd__()
+    s = [ target.__pd__() for target in getattr(self, "targets", []) ]
     
     if hasattr(self, "border"):
-      s += f', f {self.border}'
+      s.append(f', f {self.border}')
     
+    s = ''.join(s)
     return super().__pd__(s) if s else ''
   
   def __xml__(self):
@@ -3,4 +3,8 @@
 # **************************************************************************** #
 # This file is part of the pdpy project: https://github.com/pdpy-org
 # Copyright (C) 2021 Fede Camara Halac
-# **************************************************************************** #
\ No newline at end of file
+# **************************************************************************** #
+
+from .. import __lazy__
+
+__getattr__ = __lazy__(__name__)
@@ -12,6 +12,7 @@ from ..core.base import Base
 from ..core.canvasbase import CanvasBase
 from ..primitives.point import Point
 from ..primitives.size import Size
+from ..encoding.pdwriter import PdWriter
 
 __all__ = [ 'Canvas' ]
 
@@ -127,16 +128,14 @@ class Canvas(CanvasBase, Base):
   def get_char_dim(self):
     return int(self.dimension.width / self.font * 1.55)
 
-  def get(self, id):
-    if hasattr(self, 'nodes'):
-      for node in self.nodes:
-        if node.id == id:
-          return node
-    else:
-      return None
-
   def __pd__(self):
     """ Pure Data representation of the canvas """
+    w = PdWriter()
+    self.__replay__(w)
+    return w.getvalue()
+
+  def __write__(self, w):
+    """ Write the Pure Data representation into the :class:`PdWriter` ``w`` """
 
     # the canvas line
     s = super().__pd__()
@@ -160,21 +159,18 @@ class Canvas(CanvasBase, Base):
       # non-root canvases, report their name and their vis status
       s += " " + self.name + " " + str(1 if self.vis else 0)
     
-    # end the line so we can continue appending to `s`
-    s += self.__end__
+    # end the line and write it before the contents
+    w.write(s + self.__end__)
     
-    s = super().__render__(s, isroot=isroot, isgraph=isgraph)
+    super().__render__(w, isroot=isroot, isgraph=isgraph)
     
     # the border, only if not root
     if hasattr(self, 'border') and (not isroot):
-      s += "#X f " + str(self.border)
-      s += self.__end__
+      w.write("#X f " + str(self.border) + self.__end__)
 
-    return s
 
-
-  def __xml__(self, tag=None):
-    """ Return the XML Element for this object """
+  def __xml_head__(self, tag=None):
+    """ Return the XML Element for this object, without its children """
     
     x = super().__element__(scope=self, tag=tag)
     
@@ -186,8 +182,31 @@ class Canvas(CanvasBase, Base):
       if hasattr(self, e):
         super().__subelement__(x, getattr(self,e).__xml__(e))
     
+    return x
+
+  def __xml__(self, tag=None):
+    """ Return the XML Element for this object """
+    
+    x = self.__xml_head__(tag=tag)
+    
     super().__xml_nodes__(x)
     super().__xml_comments__(x)
     super().__xml_edges__(x)
 
     return x
+
+  def __xml_write__(self, w, tag=None, end=True):
+    """ Write the XML Element for this object into the :class:`XmlWriter` ``w``
+
+    The nodes are written one at a time, without building this element.
+    If ``end`` is ``False``, the element is left open.
+    """
+    
+    w.start(self.__xml_head__(tag=tag))
+    
+    super().__xml_write_nodes__(w)
+    super().__xml_write_comments__(w)
+    super().__xml_write_edges__(w)
+
+    if end:
+      w.end()
@@ -50,12 +50,9 @@ class Dependencies(Base):
 
   def __pd__(self):
     """ Parses the dependencies into paths and libs """
-    s = ''
-    for x in getattr(self, 'paths', []):
-      s += " -path " + str(x)
-    for x in getattr(self, 'libs', []):
-      s += " -lib " + str(x)
-    return super().__pd__(s)
+    s = [ " -path " + str(x) for x in getattr(self, 'paths', []) ]
+    s += [ " -lib " + str(x) for x in getattr(self, 'libs', []) ]
+    return super().__pd__(''.join(s))
 
   def __xml__(self):
     """ Returns an XML Element for this object """
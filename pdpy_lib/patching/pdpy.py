@@ -9,6 +9,7 @@ PdPy
 ====
 """
 
+import os
 from . import canvas, dependencies
 from ..connections.edge import Edge
 from ..core.base import Base
@@ -33,6 +34,8 @@ from ..objects.obj import Obj
 from ..objects.msg import Msg
 from ..objects.gui import Gui
 from ..objects.comment import Comment
+from ..encoding.pdwriter import PdWriter
+from ..encoding.jsonwriter import JsonWriter
 from ..utilities.utils import log
 from ..utilities.default import *
 
@@ -48,7 +51,10 @@ class PdPy(CanvasBase, Base):
                json=None,
                xml=None,
                pdpath=None,
-               autoconnect=False):
+               autoconnect=False,
+               lazy=False,
+               cache=False,
+               array_dtype=None):
     """ Initialize a PdPy object """
     
     self.patchname = Base.__sane_name__(self, name)
@@ -60,7 +66,7 @@ class PdPy(CanvasBase, Base):
     self.__depth__ = 0
 
     # The following are used in the arrange function:
-    self.arrangement(5) # set the arrangement function
+    self.arrangement(6) # set the arrangement function
     
     self.__max_w__ = 0
     self.__max_h__ = 0
@@ -73,6 +79,22 @@ class PdPy(CanvasBase, Base):
 
     self.__autoconnect__ = bool(autoconnect)
     """ Connect objects together as in pd's `autoconnect` option """
+
+    self.__lazy__ = bool(lazy)
+    """ Keep the ``#A`` tokens until they are used, see :class:`pdpy_lib.memory.buffer.ArrayTokens` """
+
+    self.__dtype__ = array_dtype
+    """ Keep the values of the arrays in a :class:`pdpy_lib.memory.buffer.ArrayBuffer`
+    of this ``numpy`` data type, such as ``float32``, instead of the ``dtype`` of the
+    array defaults (see :class:`pdpy_lib.utilities.default.Default`) """
+
+    self.__reuse__ = bool(cache)
+    """ Keep the pd lines and the layout of the canvases that did not change,
+    see :func:`pdpy_lib.core.canvasbase.CanvasBase.__replay__`.
+    Only the changes made by setting an attribute are seen: after a change
+    in place, like ``obj.args.append(1)``, set the attribute again
+    (``obj.args = obj.args``) or call ``obj.__touch__()``, otherwise
+    the old lines are written """
     
     CanvasBase.__init__(self, obj_idx=0)
     Base.__init__(self, json=json, xml=xml)
@@ -298,7 +320,7 @@ class PdPy(CanvasBase, Base):
       'type' : argv[2],
       'flag' : argv[3],
       'className' : "goparray"
-    }, cls='array')
+    }, cls='array', dtype=getattr(self, '__dtype__', None))
     self.__last_canvas__().add(arr)
     return arr
   
@@ -330,7 +352,13 @@ class PdPy(CanvasBase, Base):
     return last
     
   def write(self, filename=None):
-    """ Write out the pd file to disk """
+    """ Write out the pd file to disk
+
+    With ``PdPy(cache=True)``, the canvases that did not change are not
+    arranged and written again, and the changes made in place (eg.:
+    ``obj.args.append(1)``) are not seen until the attribute is set again
+    or the object is touched, see :func:`pdpy_lib.core.canvasbase.CanvasBase`.
+    """
     
     self.__arrange__(self)
 
@@ -338,20 +366,25 @@ class PdPy(CanvasBase, Base):
       filename = self.patchname + '.pd'
     
     if '.pd' in filename:
+      # stream into a temporary file, so that a failure
+      # does not leave a truncated patch behind
+      tmp = filename + '.' + str(os.getpid()) + '.tmp'
       try:
-        binbuf = self.__pd__()
+        with open(tmp, 'w') as patchfile:
+          self.__write__(PdWriter(patchfile, reuse=self.__reuse__))
+        os.replace(tmp, filename)
       except Exception as e:
+        if os.path.exists(tmp):
+          os.remove(tmp)
         log(3, e, "ERROR WITH BINBUF", self.patchname)
         raise Exception(e)
-      with open(filename, 'w') as patchfile:
-        patchfile.write(binbuf)
     
     elif '.json' in filename:
       with open(filename, 'w') as patchfile:
-        patchfile.write(self.__json__())
+        JsonWriter(patchfile).dump(self)
   
   def parse(self, argvecs):
-    """ Parse a list of Pd argument vectors (1) into this instance's scope
+    """ Parse a list (or any iterable) of Pd argument vectors (1) into this instance's scope
 
     This method populates the current class with appropriate calls to 
     individual classes refered to by parsing the argument vector `argv`.
@@ -360,12 +393,19 @@ class PdPy(CanvasBase, Base):
     of the pure data file line (binbuf), starting with '#' and ending with ';'.
     The tokens are split by spaces, ignoring escaped chars. The special char
     ',' is handled before calling this method.
+    See :func:`pdpy_lib.utilities.utils.iterPdLines` to stream them from a file.
+
+    With ``lazy=True`` (see :class:`PdPy`), the values of the ``#A`` lines
+    are converted only when they are used. With ``array_dtype``, they are
+    kept in a :class:`pdpy_lib.memory.buffer.ArrayBuffer` of that type.
 
     """
     # log(1,f'Parsing {len(argvecs)} pd_lines')
     # print(type(argvecs))
     store_graph = False
     last = None
+    lazy = getattr(self, '__lazy__', False)
+    dtype = getattr(self, '__dtype__', None)
 
     for argv in argvecs:
       # log(1, "argv:", argv)
@@ -380,7 +420,7 @@ class PdPy(CanvasBase, Base):
           if    7 == len(argv): last = self.addRoot(pd_lines=body)
           elif  8 == len(argv): last = self.addCanvas(pd_lines=body)
       elif "#A" == head[0]: #A -> text, savestate, or array  data
-        super().__setdata__(last, Data(data=body, head=head[1]))
+        super().__setdata__(last, Data(data=body, head=head[1], lazy=lazy, dtype=dtype))
       else: #X -----------------> anything else is an "#X"
         if   "declare"    == head[1]: self.addDependencies(pd_lines=body)
         elif "coords"     == head[1]: self.addCoords(body)
@@ -412,19 +452,27 @@ class PdPy(CanvasBase, Base):
     class' scope.
 
     """
-    s = ''
+    w = PdWriter(reuse=getattr(self, '__reuse__', False))
+    self.__write__(w)
+    return w.getvalue()
+
+  def __write__(self, w):
+    """ Write the pure data representation into the :class:`PdWriter` ``w``
+
+    See :func:`write` to stream it into a file.
+    """
     for x in getattr(self,'structs', []):
-      s += x.__pd__()
+      w.write(x.__pd__())
     
-    s += self.root.__pd__()
+    w.canvas(self.root)
 
     if hasattr(self, 'dependencies'):
-      s += self.dependencies.__pd__()
+      w.write(self.dependencies.__pd__())
     
-    return super().__render__(s)
+    super().__render__(w)
 
-  def __xml__(self):
-    """ Return the XML Element for this object """
+  def __xml_head__(self):
+    """ Return the XML Element for this object, with structs and dependencies """
     
     # root tag to which struct, 'root', and dependencies will be added
     x = super().__element__(scope=self, attrib={
@@ -441,6 +489,13 @@ class PdPy(CanvasBase, Base):
     if hasattr(self, 'dependencies'):
       super().__subelement__(x, self.dependencies.__xml__())
     
+    return x
+
+  def __xml__(self):
+    """ Return the XML Element for this object """
+    
+    x = self.__xml_head__()
+    
     # make the 'root' tag to which all other elements will be added
     root = self.root.__xml__(tag='root')
     # add the 'root' tag to the xml root
@@ -462,6 +517,36 @@ class PdPy(CanvasBase, Base):
     
     return super().__tree__(x)
 
+  def __xml_write__(self, w):
+    """ Write the XML for this object into the :class:`XmlWriter` ``w``
+
+    This writes the same document as :func:`__xml__`, but every node is
+    written as soon as it is built, so the whole tree is never held.
+    """
+    
+    w.start(self.__xml_head__())
+    
+    # open the 'root' tag to which all other elements will be added
+    self.root.__xml_write__(w, tag='root', end=False)
+    
+    super().__xml_write_nodes__(w)
+    super().__xml_write_comments__(w)
+
+    if hasattr(self, 'coords'):
+      w.element(self.coords.__xml__())
+    
+    super().__xml_write_edges__(w)
+
+    if hasattr(self, 'position'):
+      w.element(self.position.__xml__())
+    
+    if hasattr(self, 'title'):
+      w.element(super().__element__(tag='title', text=self.title))
+    
+    # close 'root' and the pdpy tag
+    w.end()
+    w.end()
+
   def __set_pd_path__(self, path_to_pd=None):
       """ Attempt to locate the ``pd`` executable """
       
@@ -528,53 +613,54 @@ class PdPy(CanvasBase, Base):
     ]
     __run__(" ".join(command), shell=True, check=True)
 
+  def __getstate__(self):
+    """ Return the picklable state, without the arranger function """
+    state = super().__getstate__()
+    state.pop('__arrange__', None)
+    return state
+
+  def __setstate__(self, state):
+    """ Restore a pickled state and its arranger function """
+    super().__setstate__(state)
+    self.arrangement(self.__dict__.get('__arrangement__', 6), incremental=self.__dict__.get('__incremental__', False))
+
   def __enter__(self):
     return self
   
   def __exit__(self, ctx_type, ctx_value, ctx_traceback):
     self.write()
 
-  def arrangement(self, choice=-1):
+  def arrangement(self, choice=-1, incremental=False):
     """ Sets the arranger function
 
     Parameters
     ----------
     choice: :class:`int`
-      The choices are numbered starting at 0. If negative or not one of the available choices, it defaults to ``arrange1b``
+      The choices are numbered starting at 0. If negative or not one of the available choices, it defaults to ``arrange1b``.
+      The default choice is 6, the layered layout of :class:`pdpy_lib.extra.layout.Layout`
+
+    incremental: :class:`bool`
+      Keep the objects that have a position where they are, and place only the
+      new ones, see :class:`pdpy_lib.extra.placement.Placement` (default: ``False``).
+      The box sizes and spatial index of the canvases are kept from one
+      arrangement to the next, also without ``cache=True``, so the boxes
+      changed in place (eg.: ``obj.args.append(1)``) need the attribute
+      to be set again (``obj.args = obj.args``) to be placed around
     
     """
 
-    if choice == 0: 
-      # good, but fails on circular conections
-      from ..utilities.arrange import arrange as _do_arrange
-    elif choice == 1: 
-      # this one fails
-      from ..utilities.arrange1 import arrange1 as _do_arrange
-    elif choice == 2: 
-      # fails on dac~
-      from ..utilities.arrange1a import arrange1a as _do_arrange
-    elif choice == 3: 
-      # max recursion depth error
-      from ..utilities.arrange2 import arrange2 as _do_arrange
-    elif choice == 5: 
-      # max recursion depth error
-      from ..extra.arranger import Arranger as _do_arrange
-    else:
-      # this one is nice (fails on dac~)
-      from ..utilities.arrange1b import arrange1b as _do_arrange
-
-    def _recurse_arrange(node):
-      # in every child of ``node``, check if child is a parent
-      for child in getattr(node, 'nodes', []):
-        if hasattr(child, 'nodes'):
-          # it is a parent, so recurse
-          _recurse_arrange(child)
-      # finally, arrange
-      _do_arrange(node)
-    
+    self.__arrangement__ = choice
+    self.__incremental__ = bool(incremental)
+
+    from ..extra.scheduler import Scheduler
+    scheduler = Scheduler(choice, incremental=incremental)
+
     def _begin_arrange(scope):
       if hasattr(scope, 'root'):
-        _recurse_arrange(scope.root)
+        if not getattr(scope, '__reuse__', False):
+          # the incremental arrangement keeps the spatial index
+          scope.root.__forget__(boxes=not incremental)
+        scheduler(scope.root)
 
     self.__arrange__ = _begin_arrange
     
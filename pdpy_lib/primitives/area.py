@@ -10,11 +10,11 @@ Area
 """
 
 from . import point
-from ..core.base import Base
+from ..core.primitive import Primitive
 
 __all__ = [ 'Area' ]
 
-class Area(Base):
+class Area(Primitive):
   r""" Represents a rectangular section of the screen
 
   The area is represented with two points, ``a`` and ``b``.
@@ -66,8 +66,10 @@ class Area(Base):
     <Element 'area' at 0x1024379f0>
 
   """
+
+  __slots__ = ( 'a', 'b' )
+
   def __init__(self, coords=None, json=None, xml=None):
-    self.__pdpy__ = self.__class__.__name__
     super().__init__()
     if json is not None:
       super().__populate__(self, json)
@@ -9,11 +9,11 @@ Bounds
 ======
 """
 
-from ..core.base import Base
+from ..core.primitive import Primitive
 
 __all__ = [ 'Bounds' ]
 
-class Bounds(Base):
+class Bounds(Primitive):
   """ Lower and upper bounds for GUI objects
 
   Parameters
@@ -35,10 +35,11 @@ class Bounds(Base):
     The XML Element with two sub-elements for each boundary <lower> and <upper>
 
   """
+
+  __slots__ = ( 'lower', 'upper' )
+
   def __init__(self, lower=None, upper=None, dtype=float, json=None, xml=None):
     
-    self.__pdpy__ = self.__class__.__name__
-    
     super().__init__()
     
     if json is not None:
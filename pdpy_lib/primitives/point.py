@@ -9,12 +9,14 @@ Point
 =====
 """
 
-from ..core.base import Base
+from ..core.primitive import Primitive
 from ..utilities.utils import log
 
 __all__ = [ 'Point' ]
 
-class Point(Base):
+class Point(Primitive):
+  __slots__ = ( 'x', 'y' )
+
   def __init__(self, x=None, y=None, json=None, xml=None):
     """ A point in x-y space
 
@@ -31,7 +33,6 @@ class Point(Base):
     the default values are from the ``screen`` attribute in :class:`Default`
 
     """
-    self.__pdpy__ = self.__class__.__name__
     super().__init__()
     if json is not None:
       super().__populate__(self, json)
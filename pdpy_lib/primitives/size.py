@@ -6,13 +6,14 @@
 # **************************************************************************** #
 """ Graphical Size Class Definitions """
 
-from ..core.base import Base
+from ..core.primitive import Primitive
 
 __all__ = ['Size']
 
-class Size(Base):
+class Size(Primitive):
+  __slots__ = ( 'width', 'height' )
+
   def __init__(self, w=None, h=None, json=None, xml=None):
-    self.__pdpy__ = self.__class__.__name__
     super().__init__()
     if json is not None:
       super().__populate__(self, json)
@@ -25,6 +25,7 @@ Formats = {
   "pdpy" : [ "pdpy" ],
   "pd"  : [ "pd", "puredata"],
   "xml"  : [ "xml" ],
+  "pdpyb" : [ "pdpyb", "binary" ],
 }
 
 def getFormat(fmt):
@@ -34,9 +35,48 @@ def getFormat(fmt):
         return k
   return None
 
+class FrozenDict(dict):
+  """ A read-only dictionary, used for the shared :class:`Default` values """
+
+  def __readonly__(self, *args, **kwargs):
+    raise TypeError("The shared defaults are read-only, use Default.copy()")
+
+  __setitem__ = __delitem__ = __ior__ = __readonly__
+  clear = pop = popitem = setdefault = update = __readonly__
+
+  def __reduce__(self):
+    return (FrozenDict, (dict(self),))
+
+def freeze(value):
+  """ Recursively turn dictionaries into :class:`FrozenDict` """
+  if isinstance(value, dict):
+    return FrozenDict({ k : freeze(v) for k, v in value.items() })
+  return value
+
+def thaw(value):
+  """ Recursively turn dictionaries back into plain, mutable ``dict`` """
+  if isinstance(value, dict):
+    return { k : thaw(v) for k, v in value.items() }
+  return value
+
 class Default(object):
-  """ Default values for Pure Data objects """
-  def __init__(self):
+  """ Default values for Pure Data objects
+
+  Every pdpy object reads the same, read-only instance returned by
+  :func:`shared`, instead of building its own. To change the defaults
+  of a single object, give it a mutable :func:`copy`
+  (see :func:`pdpy_lib.core.base.Base.__setdefault__`).
+
+  Parameters
+  ----------
+  frozen : ``bool``
+    If ``True``, the values can not be modified (default: ``False``)
+
+  """
+
+  __shared__ = None
+
+  def __init__(self, frozen=False):
     self.screen       = { 'x':0, 'y': 22 }
     """ The position of the screen in x-y space """
     
@@ -49,8 +89,11 @@ class Default(object):
     self.font         = { 'size': 12, 'face': 0 }
     """ The font size and face """
     
-    self.array        = { 'size': 100, 'type': 'float', 'flag': 3}
-    """ GOP Array properties """
+    self.array        = { 'size': 100, 'type': 'float', 'flag': 3, 'dtype': None, 'chunk': 1000 }
+    """ GOP Array properties. A ``dtype`` such as ``float32`` or ``float64``
+    keeps the array values in a ``numpy`` buffer instead of a list
+    (see :class:`pdpy_lib.memory.buffer.ArrayBuffer`), and ``chunk`` is the
+    amount of values written on each ``#A`` line, like pd does """
     
     self.coords       = {
       'range' : {
@@ -209,6 +252,36 @@ class Default(object):
     self.xml = {
       'data_as_text': False
     }
+    if frozen:
+      for k, v in self.__dict__.items():
+        self.__dict__[k] = freeze(v)
+      self.__dict__['__frozen__'] = True
+
+  def __setattr__(self, name, value):
+    if self.__dict__.get('__frozen__', False):
+      raise TypeError("The shared defaults are read-only, use Default.copy()")
+    self.__dict__[name] = value
+
+  def __reduce_ex__(self, protocol):
+    if self is Default.__shared__:
+      # unpickle to the shared instance of the loading process
+      return (Default.shared, ())
+    return super().__reduce_ex__(protocol)
+
+  @classmethod
+  def shared(cls):
+    """ Return the read-only defaults shared by the whole process """
+    if cls.__shared__ is None:
+      cls.__shared__ = cls(frozen=True)
+    return cls.__shared__
+
+  def copy(self):
+    """ Return a mutable copy of these defaults """
+    new = Default.__new__(Default)
+    for k, v in self.__dict__.items():
+      if k != '__frozen__':
+        new.__dict__[k] = thaw(v)
+    return new
 
 GOPArrayFlags = [
   "polygon", "polygon-saved",
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Box Metrics
+===========
+"""
+
+__all__ = [
+  "FONTS",
+  "fontMetrics",
+  "boxSize",
+]
+
+FONTS = ( (8, 5, 11), (10, 6, 13), (12, 7, 16), (16, 10, 19), (24, 14, 29), (36, 22, 44) )
+""" The fonts of pd: the font size, and the width and height of a character in pixels (see ``sys_fontspec`` in pd's ``s_main.c``) """
+
+BOX_WIDTH = 60
+""" The amount of characters after which pd wraps the text of a box """
+
+MARGINS = (4, 5)
+""" The horizontal and vertical pixels around the text of a box (see pd's ``g_rtext.c``) """
+
+def fontMetrics(size):
+  """ Return the width and height of a character of the pd font of ``size``
+
+  As pd does, this is the largest font that is not larger than
+  ``size``, or the smallest font.
+  """
+  size = int(size)
+  for font, width, height in reversed(FONTS):
+    if font <= size:
+      return width, height
+  return FONTS[0][1:]
+
+def boxSize(words, size, columns=None):
+  """ Return the width and height in pixels of a box with the text ``words``
+
+  The text wraps at word boundaries as pd does.
+
+  Parameters
+  ----------
+  words : :class:`list` of :class:`str`
+    The words of the box
+
+  size : :class:`int`
+    The font size of the canvas
+
+  columns : :class:`int`
+    (optional) The width of the box in characters, as set in pd with ``, f``
+    (default: the longest line, up to :data:`BOX_WIDTH`)
+
+  """
+  width, height = fontMetrics(size)
+  limit = int(columns) if columns else BOX_WIDTH
+  lines = 1
+  line = 0
+  longest = 0
+  for w in words:
+    n = len(w)
+    if line and line + 1 + n > limit:
+      lines += 1
+      longest = max(longest, line)
+      line = 0
+    line = line + 1 + n if line else n
+    # words longer than a line are cut
+    while line > limit:
+      lines += 1
+      line -= limit
+      longest = limit
+  longest = max(longest, line)
+  if columns:
+    longest = limit
+  return longest * width + MARGINS[0], lines * height + MARGINS[1]
@@ -9,31 +9,47 @@ PdPy Namespace
 ==============
 """
 
+from .utils import log
+
 __all__ = [ 'Namespace' ]
 
 class Namespace:
-  """ PdPy Namespace """
-  def __init__(self):
-    import pdpy_lib as pdpy
-    self.__module__ = pdpy
-    self.__name__ = { 
-      e.lower().replace('__', '') : e for e in dir(self.__module__) 
-    }
-    # for i in self.__name__: print(i)
+  """ PdPy Namespace
+
+  The registry of pdpy class names is built once, on first use,
+  and shared by every instance. It only holds the names, from
+  :data:`pdpy_lib.__names__`, so only the submodule of a name
+  that is looked up gets imported, and the deferred submodules
+  (see :data:`pdpy_lib.__deferred__`) are left out.
+  """
+
+  __registry__ = None
+
+  def __registry_get__(self):
+    """ Return the pdpy module and its class-name registry """
+    if Namespace.__registry__ is None:
+      import pdpy_lib as pdpy
+      Namespace.__registry__ = (pdpy, {
+        e.lower() : e for e, path in pdpy.__names__.items()
+        if path not in pdpy.__deferred__
+      })
+    return Namespace.__registry__
 
   def __get__(self, name=None, tag=None):
     """ Get a PdPy Namespace Element """
-    print("get", name, tag)
+    module, names = self.__registry_get__()
+    log(1, "get", name, tag)
     if name is not None:
-      if name in self.__name__:
-        name = self.__name__[name]
-      elif name in self.__name__.values():
+      if name in names:
+        name = names[name]
+      elif name in names.values():
         name = name
       else:
-        print("returning name:", name)
+        log(1, "returning name:", name)
         return name
-      print("returning attribute", getattr(self.__module__, name))
-      return getattr(self.__module__, name)
+      attribute = getattr(module, name)
+      log(1, "returning attribute", attribute)
+      return attribute
     
     elif tag is not None:
       # recurse with the tag
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Spatial Grid
+============
+"""
+
+from math import hypot
+
+__all__ = [ "SpatialGrid" ]
+
+class SpatialGrid(object):
+  r""" An index of rectangles in a uniform grid of cells
+
+  Every rectangle is kept in the cells it touches, so the rectangles
+  near a point or a region are found by looking at a few cells instead
+  of all the rectangles: :func:`query` a region, :func:`point` and
+  :func:`nearest` take time in proportion to the cells they look at
+  and the rectangles found there.
+
+  Rectangles are tuples ``(x1, y1, x2, y2)`` with ``x1 <= x2`` and
+  ``y1 <= y2``, which include their left and top edges and exclude
+  their right and bottom edges.
+
+  Parameters
+  ----------
+  cell : :class:`int`
+    The size of the cells in pixels (default: ``64``)
+
+  Example
+  -------
+
+    >>> grid = SpatialGrid()
+    >>> grid.insert(obj, (10, 10, 60, 31))
+    >>> grid.overlaps((0, 0, 20, 20))
+    True
+
+  """
+  __slots__ = ('cell', 'cells', 'rects', 'bounds')
+
+  def __init__(self, cell=64):
+    self.cell = max(1, int(cell))
+    self.cells = {}
+    self.rects = {}
+    # a rectangle around all the rectangles inserted so far
+    # (it does not shrink when they are removed)
+    self.bounds = None
+
+  def __len__(self):
+    return len(self.rects)
+
+  def __contains__(self, key):
+    return key in self.rects
+
+  def __span__(self, rect):
+    """ Return the range of cells that ``rect`` touches """
+    c = self.cell
+    x1, y1, x2, y2 = rect
+    # an empty rectangle still has a cell
+    return (int(x1 // c), int(y1 // c),
+            int(max(x1, x2 - 1) // c), int(max(y1, y2 - 1) // c))
+
+  def insert(self, key, rect):
+    """ Add ``key`` with the rectangle ``rect``, or move it there """
+    if key in self.rects:
+      self.remove(key)
+    self.rects[key] = rect
+    if self.bounds is None:
+      self.bounds = rect
+    else:
+      b = self.bounds
+      self.bounds = (min(b[0], rect[0]), min(b[1], rect[1]), max(b[2], rect[2]), max(b[3], rect[3]))
+    i1, j1, i2, j2 = self.__span__(rect)
+    cells = self.cells
+    for i in range(i1, i2 + 1):
+      for j in range(j1, j2 + 1):
+        cell = cells.get((i, j))
+        if cell is None:
+          cells[(i, j)] = [key]
+        else:
+          cell.append(key)
+
+  def remove(self, key):
+    """ Remove ``key``, if it is in the grid """
+    rect = self.rects.pop(key, None)
+    if rect is None:
+      return
+    i1, j1, i2, j2 = self.__span__(rect)
+    cells = self.cells
+    for i in range(i1, i2 + 1):
+      for j in range(j1, j2 + 1):
+        cell = cells.get((i, j))
+        if cell is not None:
+          cell.remove(key)
+          if not cell:
+            del cells[(i, j)]
+
+  def query(self, rect):
+    """ Return the keys whose rectangles overlap ``rect``, in no particular order """
+    x1, y1, x2, y2 = rect
+    i1, j1, i2, j2 = self.__span__(rect)
+    found = []
+    seen = set()
+    rects, cells = self.rects, self.cells
+    for i in range(i1, i2 + 1):
+      for j in range(j1, j2 + 1):
+        for key in cells.get((i, j), ()):
+          if key in seen:
+            continue
+          seen.add(key)
+          a1, b1, a2, b2 = rects[key]
+          if a1 < x2 and x1 < a2 and b1 < y2 and y1 < b2:
+            found.append(key)
+    return found
+
+  def overlaps(self, rect):
+    """ Return ``True`` if ``rect`` overlaps any rectangle of the grid """
+    return bool(self.query(rect))
+
+  def point(self, x, y):
+    """ Return the keys whose rectangles contain the point ``x``, ``y`` """
+    c = self.cell
+    found = []
+    for key in self.cells.get((int(x // c), int(y // c)), ()):
+      a1, b1, a2, b2 = self.rects[key]
+      if a1 <= x < a2 and b1 <= y < b2:
+        found.append(key)
+    return found
+
+  def distance(self, key, x, y):
+    """ Return the distance from the point ``x``, ``y`` to the rectangle of ``key`` """
+    a1, b1, a2, b2 = self.rects[key]
+    return hypot(max(a1 - x, 0, x - a2), max(b1 - y, 0, y - b2))
+
+  def nearest(self, x, y, count=1):
+    """ Return the ``count`` keys whose rectangles are nearest to the point ``x``, ``y``
+
+    The keys are sorted by distance. The cells are looked at in rings
+    around the point, until the rings are farther than the keys found.
+    """
+    if not self.rects or count < 1:
+      return []
+    c = self.cell
+    ci, cj = int(x // c), int(y // c)
+    i1, j1, i2, j2 = self.__span__(self.bounds)
+    # the farthest ring that can have rectangles
+    last = max(abs(ci - i1), abs(ci - i2), abs(cj - j1), abs(cj - j2))
+    found = {}
+    r = 0
+    while r <= last:
+      if 8 * r > len(self.cells):
+        # the rings are larger than the occupied cells, look at all of them
+        for key in self.rects:
+          if key not in found:
+            found[key] = self.distance(key, x, y)
+        break
+      if r == 0:
+        ring = ((ci, cj),)
+      else:
+        ring = [ (ci + d, cj - r) for d in range(-r, r + 1) ]
+        ring += [ (ci + d, cj + r) for d in range(-r, r + 1) ]
+        ring += [ (ci - r, cj + d) for d in range(-r + 1, r) ]
+        ring += [ (ci + r, cj + d) for d in range(-r + 1, r) ]
+      for cell in ring:
+        for key in self.cells.get(cell, ()):
+          if key not in found:
+            found[key] = self.distance(key, x, y)
+      # the rectangles outside of the rings are farther than r cells
+      if len(found) >= count and sorted(found.values())[count - 1] <= r * c:
+        break
+      r += 1
+    return sorted(found, key=found.__getitem__)[:count]
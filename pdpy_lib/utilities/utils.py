@@ -11,18 +11,26 @@ Utilities
 
 import sys
 import re
+import mmap
+import logging
+from codecs import getincrementaldecoder, lookup, BOM_UTF8
 
 __all__ = [
   "log",
+  "logger",
+  "LOG_LEVELS",
   "splitAtChar",
   "splitByEscapedChar",
   "parsePdBinBuf",
   "parsePdFileLines",
+  "iterPdLines",
   "printer",
   "checknum",
   "quit_help",
   "loadPdData",
   "loadPdFile",
+  "detectEncoding",
+  "iterPdFile",
 ]
 
 def checknum(num):
@@ -51,7 +59,7 @@ def printer(func):
   def wrapper(*arg):
     # log(0, func.__name__)
     result = func(*arg)
-    if result:  
+    if result and logger.isEnabledFor(logging.INFO):
       # log(0, "="*80)
       log(0, func.__name__, repr(arg[1:] if 1 < len(arg) else arg))
     return result
@@ -67,33 +75,61 @@ def printer(func):
 #     return result
 #   return wrapper
 
+logger = logging.getLogger("pdpy_lib")
+""" The :mod:`logging` logger of pdpy, see :func:`log` """
+
+LOG_LEVELS = {
+  0 : logging.INFO,
+  1 : logging.DEBUG,
+  2 : logging.ERROR,
+}
+""" The :mod:`logging` level of each :func:`log` level, other levels are warnings """
+
+class LogMessage(object):
+  """ The arguments of a :func:`log` call, joined when a handler writes them """
+  __slots__ = ('argv',)
+
+  def __init__(self, argv):
+    self.argv = argv
+
+  def __str__(self):
+    return " ".join(map(repr, self.argv))
+
 def log(level, *argv):
   """ log utility with level and variable arguments
 
-  This function printt to console with the following `level`:
+  This function logs to the ``pdpy_lib`` :mod:`logging` logger
+  with the following `level`:
   
-  1. Normal
-  2. Warning
-  3. Error
+  0. Normal (``INFO``)
+  1. Debug (``DEBUG``)
+  2. Error (``ERROR``)
   
+  Negative levels are ignored and any other level is a ``WARNING``.
+  The level is checked first, so the arguments are only formatted
+  for the messages that are written. Without a logging configuration,
+  only the warnings and errors are written, to ``stderr``.
+
   Parameters
   ----------
 
   level : :class:`int`
     The log level (defaults: None)
 
+  Example
+  -------
+
+    >>> import logging
+    >>> logging.basicConfig(level=logging.DEBUG)
+    >>> log(1, "parsed", 3, "lines")
+    DEBUG:pdpy_lib:'parsed' 3 'lines'
+
   """
-  __repr__ = " ".join(map(repr, argv))
-  if 0 == level:
-    print("NORMAL", __repr__)
-  elif 1 == level:
-    print("DEBUG", __repr__)
-  elif 2 == level:
-    print("ERROR", __repr__)
-  elif level < 0:
-    pass
-  else:
-    print("WARNING", __repr__)
+  if level < 0:
+    return
+  level = LOG_LEVELS.get(level, logging.WARNING)
+  if logger.isEnabledFor(level):
+    logger.log(level, "%s", LogMessage(argv))
 
 def findIndices(data, cond_func):
   """ Find the start and stop slice indices 
@@ -206,44 +242,63 @@ def splitAtChar(line, char=",", escaped=True, double=False):
 
   return result
 
+PD_START = ('#X', '#N', '#A')
+""" The record prefixes that begin a pure data file line """
+
+PD_ATOM = re.compile(r"(?:[^ ,]|(?<=\\)[ ,])+|,")
+""" A pure data atom: runs of chars split at unescaped spaces or commas """
+
 def tokenize(line):
-  """ Return a list of tokens from a string """
-  # account for comma chararcter delimiting obj border box
-  line = splitAtChar(line, escaped=False)
-
-  if len(line) == 2:
-    tokens = []
-    for t in line:
-      tokens += splitAtChar(t, char=" ", escaped=False)
-  else:
-    tokens = splitAtChar(line[0], char=" ", escaped=False)
+  """ Return a list of tokens from a string 
 
-  # filter out empty tokens
-  tokens = list(filter(None,tokens))
-  # print(tokens)
+  Tokens are split at unescaped spaces in a single pass. An unescaped comma
+  delimits the object box border (eg, ``, f 80``) and is dropped, but if
+  there is more than one unescaped comma, only the tokens before the first
+  one are kept.
+  """
+  tokens = []
+  head = None # the token count before the first unescaped comma
+  for match in PD_ATOM.finditer(line):
+    token = match.group()
+    if token == ',':
+      if head is not None:
+        return tokens[:head]
+      head = len(tokens)
+    else:
+      tokens.append(token)
   return tokens
 
-def parsePdFileLines(file_lines):
-  """ Feed in file lines and return a list with pure data lines
+def iterPdLines(file_lines):
+  """ Feed in file lines and yield tokenized pure data lines
 
-  This function returns a nodes list containing
-  pure data lines split by the semicolon char,
-  accounting specially for lines that span multiple rows 
+  This generator reads an iterable of lines (eg, an open file object)
+  and yields one list of tokens for each pure data line, accounting
+  for lines that span multiple rows. Rows are only joined for the
+  line being tokenized, so the whole file is never held in memory.
   """
-  pd_start = re.compile(r"^#[XNA]", re.MULTILINE)  
-
-  lines = []
+  parts = []
   for line in file_lines:
     line = line.strip()
-    if re.search(pd_start, line): lines.append(line)
-    else:
+    if line[:2] in PD_START:
+      if parts:
+        yield tokenize(' '.join(parts)[:-1])
+      parts = [line]
+    elif line and parts:
       # line does not start in a pd-way
       # append to the last stored line
-      if len(line): lines[-1] += ' ' + line
+      parts.append(line)
+  if parts:
+    yield tokenize(' '.join(parts)[:-1])
 
-  nodes = [ tokenize(line[:-1]) for line in lines ]
+def parsePdFileLines(file_lines):
+  """ Feed in file lines and return a list with pure data lines
 
-  return  nodes
+  This function returns a nodes list containing
+  pure data lines split by the semicolon char,
+  accounting specially for lines that span multiple rows.
+  See :func:`iterPdLines` for the streaming version.
+  """
+  return list(iterPdLines(file_lines))
 
 def parsePdBinBuf(binbuf):
   """ Feed in a pd file string and return a list with pure data lines
@@ -275,24 +330,95 @@ def loadPdData(encoding, filename):
     lines = [line for line in fp.readlines()]
   return lines, encoding
 
+NON_ASCII = re.compile(rb"[\x80-\xff]")
+""" Any byte outside the 7-bit ascii range """
+
+NEWLINE = re.compile(rb"\r\n?|\n")
+""" A line ending: ``\\r\\n``, ``\\n`` or a lone ``\\r``, as with universal newlines """
+
+LONE_CR = re.compile(rb"\r(?!\n)")
+""" A ``\\r`` that ends a line by itself (old Mac line endings) """
+
+SCAN_SIZE = 1 << 20
+""" The chunk size (in bytes) used to validate the encoding of a buffer """
+
+def detectEncoding(buffer, encoding='utf-8'):
+  """ Detect the encoding of a bytes-like ``buffer`` with a single scan
+
+  Pure ascii buffers keep the given ``encoding``. Otherwise, the buffer is 
+  validated in chunks against ``encoding`` without storing the decoded text, 
+  and ``latin-1`` (which decodes any byte) is returned if that fails.
+
+  Return
+  ------
+  :class:`str`
+    The encoding to decode the buffer with
+  """
+  if NON_ASCII.search(buffer) is None:
+    return encoding
+  try:
+    decoder = getincrementaldecoder(encoding)()
+    with memoryview(buffer) as view:
+      for i in range(0, len(view), SCAN_SIZE):
+        decoder.decode(view[i:i+SCAN_SIZE])
+    decoder.decode(b'', final=True)
+    return encoding
+  except (UnicodeDecodeError, LookupError):
+    return 'latin-1'
+
+def iterPdFile(filename, encoding='utf-8'):
+  """ Memory-map a pd file and yield its lines
+
+  The file is mapped read-only and its encoding is detected once with
+  :func:`detectEncoding`. Each line is then decoded from a ``memoryview``
+  over the mapped bytes, so the file is neither copied nor read again 
+  when falling back to another encoding. Feed the result to :func:`iterPdLines`.
+
+  Lines end at ``\\r\\n``, ``\\n`` or a lone ``\\r``, as with universal
+  newlines, and keep their original line endings. The byte order mark
+  of utf-8 files is skipped.
+  """
+  with open(filename, "rb") as fp:
+    # an empty file cannot be mapped
+    if not fp.seek(0, 2):
+      return
+    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+      view = memoryview(mm)
+      try:
+        encoding = detectEncoding(mm, encoding)
+        start = 0
+        if mm[:len(BOM_UTF8)] == BOM_UTF8 and lookup(encoding).name == 'utf-8':
+          start = len(BOM_UTF8)
+        size = len(mm)
+        if LONE_CR.search(mm, start) is None:
+          # every line ends with a newline, find them without a regex
+          while start < size:
+            # the last line might not end with a newline
+            stop = mm.find(b"\n", start) + 1 or size
+            yield str(view[start:stop], encoding)
+            start = stop
+          return
+        for match in NEWLINE.finditer(mm, start):
+          stop = match.end()
+          yield str(view[start:stop], encoding)
+          start = stop
+        if start < size:
+          yield str(view[start:], encoding)
+      finally:
+        # release the view before the map is closed
+        view.release()
+
 def loadPdFile(filename, encoding='utf-8'):
-  """ Attempt to load a pd file with the correct encoding 
+  """ Load a pd file with the correct encoding 
   
+  The encoding is detected with a single read, see :func:`iterPdFile`.
+
   Return
   ------
   :class:`list`
     A list of pure data file lines
   """
   try:
-    pd_data, encoding = loadPdData(encoding, filename)
-  except UnicodeDecodeError:
-    try:
-      pd_data, encoding = loadPdData("ascii", filename)
-    except UnicodeDecodeError:
-      try:
-        pd_data, encoding = loadPdData("latin-1", filename)
-      except Exception as e:
-        pd_data = None
-        raise ValueError("Could not load input file", e)
-  finally:
-    return pd_data
+    return list(iterPdFile(filename, encoding))
+  except (OSError, ValueError) as e:
+    raise ValueError("Could not load input file", e)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+"""
+Wav Files
+=========
+"""
+
+import os
+import sys
+import wave
+from array import array
+from math import isfinite
+
+try:
+  import numpy
+  HAS_NUMPY = True
+except ModuleNotFoundError:
+  HAS_NUMPY = False
+
+__all__ = [
+  "readWav",
+  "writeWav",
+]
+
+TYPECODES = { 1 : 'B', 2 : 'h', 4 : 'i' }
+""" The :mod:`array` type codes of the integer samples, by sample width """
+
+def decodeFrames(raw, sampwidth):
+  """ Return the little-endian integer samples of ``raw`` as an :class:`array.array` """
+  if sampwidth == 3:
+    # 24 bit samples: move them into the upper bytes of 32 bit samples
+    padded = bytearray(len(raw) // 3 * 4)
+    padded[1::4] = raw[0::3]
+    padded[2::4] = raw[1::3]
+    padded[3::4] = raw[2::3]
+    raw, sampwidth = padded, 4
+  samples = array(TYPECODES[sampwidth])
+  samples.frombytes(raw)
+  if sys.byteorder == 'big' and sampwidth > 1:
+    samples.byteswap()
+  return samples
+
+def encodeFrames(samples, sampwidth):
+  """ Return the integer ``samples`` as little-endian bytes of ``sampwidth`` """
+  if sys.byteorder == 'big' and sampwidth > 1:
+    samples.byteswap()
+  raw = samples.tobytes()
+  if sampwidth == 3:
+    # drop the lowest byte of the 32 bit samples
+    packed = bytearray(len(raw) // 4 * 3)
+    packed[0::3] = raw[1::4]
+    packed[1::3] = raw[2::4]
+    packed[2::3] = raw[3::4]
+    raw = bytes(packed)
+  return raw
+
+def openWav(path, mode):
+  """ Open a wav file from a path or a binary file object """
+  if isinstance(path, os.PathLike):
+    path = os.fspath(path)
+  return wave.open(path, mode)
+
+def readWav(path, channel=0, blocksize=1000, dtype=None):
+  """ Read one channel of a PCM wav file, in blocks of floats
+
+  The file is read ``blocksize`` frames at a time, so the samples
+  of a long file are never all in memory. With ``numpy``, the samples
+  are scaled in bulk instead of one at a time.
+
+  Parameters
+  ----------
+  path : :class:`str`, :class:`os.PathLike` or file object
+    The wav file to read
+
+  channel : :class:`int`
+    The channel to read, starting from 0 (default: ``0``)
+
+  blocksize : :class:`int`
+    The amount of frames in each block (default: ``1000``)
+
+  dtype : :class:`str`
+    (optional) With ``numpy``, yield :class:`numpy.ndarray` blocks of this
+    data type instead of lists, eg.: for a :class:`pdpy_lib.memory.buffer.ArrayBuffer`
+    (default: ``None``)
+
+  Yields
+  ------
+  :class:`list`
+    The samples of each block, as floats between -1 and 1
+
+  """
+  with openWav(path, 'rb') as fp:
+    nchannels = fp.getnchannels()
+    sampwidth = fp.getsampwidth()
+    if not 0 <= channel < nchannels:
+      raise ValueError("Channel " + str(channel) + " is out of range, the file has " + str(nchannels) + " channels")
+    if sampwidth not in (1, 2, 3, 4):
+      raise ValueError("Unsupported sample width: " + str(sampwidth))
+    # 8 bit samples are unsigned
+    offset = 128 if sampwidth == 1 else 0
+    scale = 1.0 / (1 << (8 * (4 if sampwidth == 3 else sampwidth) - 1))
+    while True:
+      raw = fp.readframes(blocksize)
+      if not raw:
+        break
+      samples = decodeFrames(raw, sampwidth)
+      if HAS_NUMPY:
+        values = numpy.frombuffer(samples, dtype=samples.typecode)
+        if nchannels > 1:
+          values = values[channel::nchannels]
+        # the scale is a power of two, so this is as exact as the lists
+        values = values * scale
+        if offset:
+          values -= offset * scale
+        yield values.tolist() if dtype is None else values.astype(dtype, copy=False)
+        continue
+      if nchannels > 1:
+        samples = samples[channel::nchannels]
+      if offset:
+        yield [(x - offset) * scale for x in samples]
+      else:
+        yield [x * scale for x in samples]
+
+def writeWav(path, blocks, samplerate=44100, sampwidth=2):
+  """ Write blocks of floats into a mono PCM wav file
+
+  Values outside of the -1 to 1 range are clipped, and the values that
+  are not finite (``nan``, ``inf`` and ``-inf``) are written as silence.
+
+  Parameters
+  ----------
+  path : :class:`str`, :class:`os.PathLike` or file object
+    The wav file to write
+
+  blocks : iterable
+    The samples, as an iterable of sequences of floats
+
+  samplerate : :class:`int`
+    The sample rate of the file (default: ``44100``)
+
+  sampwidth : :class:`int`
+    The amount of bytes of each sample, from 1 to 4 (default: ``2``)
+
+  Return
+  ------
+  :class:`int`
+    The amount of frames written
+
+  """
+  if sampwidth not in (1, 2, 3, 4):
+    raise ValueError("Unsupported sample width: " + str(sampwidth))
+  full = 1 << (8 * sampwidth - 1)
+  top = full - 1
+  offset = 128 if sampwidth == 1 else 0
+  # 24 bit samples are written from the upper bytes of 32 bit samples
+  shift = 256 if sampwidth == 3 else 1
+  typecode = TYPECODES[4 if sampwidth == 3 else sampwidth]
+  nframes = 0
+  with openWav(path, 'wb') as fp:
+    fp.setnchannels(1)
+    fp.setsampwidth(sampwidth)
+    fp.setframerate(samplerate)
+    for block in blocks:
+      ints = [ 0 if not isfinite(x) else top if x * full >= top else -full if x <= -1.0 else round(x * full)
+               for x in block ]
+      if offset or shift != 1:
+        ints = [ (v + offset) * shift for v in ints ]
+      fp.writeframesraw(encodeFrames(array(typecode, ints), sampwidth))
+      nframes += len(ints)
+  return nframes
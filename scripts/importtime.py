@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+
+""" Import time regression benchmark
+
+Runs ``python -X importtime`` in fresh interpreters and reports the median
+cumulative import time of each statement. Fails when ``import pdpy_lib``
+takes longer than the budget, or imports a module it should leave alone,
+or when decoding a json patch imports :mod:`pdpy_lib.patching.patch`.
+
+Usage:
+
+  python scripts/importtime.py
+  python scripts/importtime.py -n 20 --budget 10
+"""
+
+import re
+import sys
+import argparse
+import subprocess
+from statistics import median
+
+STATEMENTS = [
+  "import pdpy_lib",
+  "from pdpy_lib import PdPy",
+  "from pdpy_lib import Translator",
+  "from pdpy_lib import Patch",
+]
+""" The statements that are timed """
+
+DEFERRED = [ "pyaudio", "pylibpd", "pdpy_lib.patching.patch" ]
+""" The modules that ``import pdpy_lib`` must not import """
+
+DECODE = """
+import sys, json
+from pdpy_lib import PdPy, PdPyEncoder
+pdpy = PdPy(name='decode')
+json.loads(pdpy.__json__(), object_hook=PdPyEncoder())
+sys.exit('pdpy_lib.patching.patch' in sys.modules)
+"""
+""" Decodes a json patch and fails if it imported :mod:`pdpy_lib.patching.patch` """
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+def importtime(statement, startup=()):
+  """ Return the cumulative microseconds of the top-level imports and the imported modules
+
+  The modules in ``startup``, imported by the interpreter itself, are not counted.
+  """
+  proc = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", statement],
+    capture_output=True, text=True, check=True)
+  total = 0
+  modules = set()
+  for line in proc.stderr.splitlines():
+    m = LINE.match(line)
+    if m is None:
+      continue
+    modules.add(m.group(4))
+    # only the top-level imports count, their children are included
+    if len(m.group(3)) == 1 and m.group(4) not in startup:
+      total += int(m.group(2))
+  return total, modules
+
+def main():
+  parser = argparse.ArgumentParser(description="Time the imports of pdpy_lib")
+  parser.add_argument("-n", "--runs", type=int, default=10, help="runs per statement")
+  parser.add_argument("-b", "--budget", type=float, default=15.0, help="milliseconds allowed for 'import pdpy_lib'")
+  args = parser.parse_args()
+
+  ok = True
+  startup = importtime("pass")[1]
+  for statement in STATEMENTS:
+    runs = [importtime(statement, startup) for _ in range(args.runs)]
+    ms = median(t for t, _ in runs) / 1000
+    print("{:8.1f} ms  {}".format(ms, statement))
+    if statement == "import pdpy_lib":
+      if ms > args.budget:
+        print("FAILED: over the budget of", args.budget, "ms")
+        ok = False
+      for name in DEFERRED:
+        if name in runs[0][1]:
+          print("FAILED: imports", name)
+          ok = False
+  if subprocess.run([sys.executable, "-c", DECODE]).returncode:
+    print("FAILED: decoding json imports pdpy_lib.patching.patch")
+    ok = False
+  else:
+    print("decoding json does not import pdpy_lib.patching.patch")
+  return 0 if ok else 1
+
+if __name__ == "__main__":
+  sys.exit(main())
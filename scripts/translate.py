@@ -4,10 +4,28 @@
 # This file is part of the pdpy project: https://github.com/pdpy-org
 # Copyright (C) 2021 Fede Camara Halac
 # **************************************************************************** #
+import sys
 import time
 import argparse
 import traceback
-from pdpy_lib import Translator, ArgumentException
+from pathlib import Path
+from pdpy_lib import Translator, Batch, ArgumentException
+
+def is_batch(args):
+  """ Check if the input is a directory or a glob pattern """
+  return args.jobs is not None or Path(args.input).is_dir() or any(c in args.input for c in "*?[")
+
+def batch(args, arguments):
+  """ Translate a directory or a glob pattern with a pool of workers """
+  report = open(args.report, 'w') if args.report else sys.stdout
+  try:
+    summary = Batch(arguments, jobs=args.jobs)(report=report)
+  finally:
+    if args.report: report.close()
+  print("Translated", summary['ok'], "of", summary['total'], "files.")
+  for f in summary['failed']:
+    print("FAILED:", f)
+  return len(summary['failed']) == 0
 
 def main():
   parser = argparse.ArgumentParser(
@@ -22,12 +40,28 @@ def main():
   parser.add_argument("-e", "--encoding", default='utf-8')
   parser.add_argument("-o", "--output", default=None)
   parser.add_argument("-int", "--internals", default="../pddb/pddb.json")
+  parser.add_argument("-j", "--jobs", type=int, default=None,
+    help="translate a directory or glob input with this many worker processes")
+  parser.add_argument("-c", "--cache", default=None,
+    help="cache parsed input files in this directory")
+  parser.add_argument("--dtype", default=None, choices=("float32", "float64"),
+    help="keep the array values of .pd inputs in a numpy buffer of this type")
+  parser.add_argument("--report", default=None,
+    help="write the per-file json lines report of a batch here (default: stdout)")
   # parser.add_argument("-v", "--verbose", action="store_true")
 
   # get the arguments as a dictionary
   args = parser.parse_args()
   arguments = vars(args)
 
+  if is_batch(args):
+    arguments = { k:v for k,v in arguments.items() if k not in ('jobs', 'report') }
+    try:
+      sys.exit(0 if batch(args, arguments) else 1)
+    except ArgumentException as e:
+      print("ERROR with arguments:", e)
+      sys.exit(1)
+
   # get time before translation
   start_time = time.process_time()
 
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Shared fixtures of the test suite """
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# run the tests against this tree, also when pdpy_lib is not installed
+if ROOT not in sys.path:
+  sys.path.insert(0, ROOT)
+
+PD_FILES = os.path.join(ROOT, 'tests', 'pd_files')
+
+def load(name, **kwargs):
+  """ Parse the pd file ``name`` of ``tests/pd_files`` into a PdPy instance """
+  from pdpy_lib import PdPy
+  from pdpy_lib.utilities.utils import loadPdFile, parsePdFileLines
+  lines = parsePdFileLines(loadPdFile(os.path.join(PD_FILES, name)))
+  return PdPy(name=os.path.splitext(name)[0], pd_lines=lines, **kwargs)
+
+def pd_files():
+  """ Return the names of the pd files of ``tests/pd_files`` """
+  return sorted(f for f in os.listdir(PD_FILES) if f.endswith('.pd'))
+
+@pytest.fixture
+def nested():
+  """ The ``nested.pd`` patch: a root canvas with nested subpatches """
+  return load('nested.pd')
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the batch translations """
+
+import io
+import json
+import shutil
+
+import pytest
+
+from conftest import PD_FILES
+from pdpy_lib import Batch, ArgumentException
+
+def arguments(input, output=None, **kwargs):
+  """ The arguments of scripts/translate.py """
+  args = { 'input' : str(input), 'fro' : 'pd', 'to' : 'json', 'reflect' : False,
+           'encoding' : 'utf-8', 'output' : output and str(output), 'internals' : None, 'cache' : None }
+  args.update(kwargs)
+  return args
+
+@pytest.fixture
+def tree(tmp_path):
+  """ Two directories with files of the same name """
+  for d in ('a', 'b', 'b/c'):
+    (tmp_path / 'in' / d).mkdir(parents=True)
+    shutil.copy(PD_FILES + '/oscillator.pd', tmp_path / 'in' / d / 'patch.pd')
+  return tmp_path
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_same_names(tree, jobs):
+  batch = Batch(arguments(tree / 'in' / '**' / '*.pd', tree / 'out'), jobs=jobs)
+  summary = batch()
+  assert summary['ok'] == summary['total'] == 3
+  for d in ('a', 'b', 'b/c'):
+    assert json.loads((tree / 'out' / d / 'patch.json').read_text())['__pdpy__'] == 'PdPy'
+
+def test_next_to_the_inputs(tree):
+  summary = Batch(arguments(tree / 'in' / '**' / '*.pd'), jobs=1)()
+  assert summary['ok'] == 3
+  assert (tree / 'in' / 'b' / 'c' / 'patch.json').exists()
+
+def test_collision(tmp_path):
+  (tmp_path / 'in').mkdir()
+  shutil.copy(PD_FILES + '/oscillator.pd', tmp_path / 'in' / 'patch.pd')
+  shutil.copy(PD_FILES + '/oscillator.pd', tmp_path / 'in' / 'patch.PD')
+  with pytest.raises(ArgumentException, match="would be written to"):
+    Batch(arguments(tmp_path / 'in' / 'patch.*', tmp_path / 'out'), jobs=1)
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_missing_internals(tree, jobs):
+  # the workers can not load the database: every file fails, the batch does not
+  batch = Batch(arguments(tree / 'in' / '**' / '*.pd', tree / 'out',
+                          internals=str(tree / 'missing.json')), jobs=jobs)
+  report = io.StringIO()
+  summary = batch(report=report)
+  assert summary['ok'] == 0 and len(summary['failed']) == 3
+  lines = [ json.loads(l) for l in report.getvalue().splitlines() ]
+  assert all('is missing' in l['error'] for l in lines[:-1])
+  assert lines[-1]['summary']['total'] == 3
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the pdpyb binary format """
+
+import io
+from struct import Struct
+
+import pytest
+
+from conftest import load, pd_files
+from pdpy_lib import BinWriter, BinReader
+from pdpy_lib.encoding.binformat import MAGIC
+
+U64 = Struct('<Q')
+
+def tree(data):
+  """ Return where the payload of the tree record starts and its size """
+  pos = len(MAGIC) + 1
+  while pos < len(data):
+    kind, size = data[pos:pos + 1], U64.unpack_from(data, pos + 1)[0]
+    if kind == b'T':
+      return pos + 9, size
+    pos += 9 + size
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['eager', 'lazy'])
+@pytest.mark.parametrize('name', pd_files())
+def test_roundtrip(name, lazy):
+  try:
+    pdpy = load(name, lazy=lazy)
+    pd, json = pdpy.__pd__(), pdpy.__json__()
+  except ValueError as e:
+    # the lazy #A values are only converted here
+    pytest.skip("pdpy does not read " + name + ": " + str(e))
+  copy = BinReader(BinWriter().dump(pdpy).getvalue()).load()
+  assert copy.__pd__() == pd
+  assert copy.__json__() == json
+
+def test_stream(nested):
+  fp = io.BytesIO()
+  BinWriter(fp).dump(nested)
+  fp.seek(0)
+  assert BinReader(fp).load().__pd__() == nested.__pd__()
+
+def test_not_pdpyb():
+  with pytest.raises(ValueError, match="Not a pdpyb file"):
+    BinReader(b'#N canvas 0 22 450 300 12;\n').load()
+
+def test_truncated(nested):
+  data = BinWriter().dump(nested).getvalue()
+  for size in range(len(data)):
+    with pytest.raises(ValueError, match="pdpyb"):
+      BinReader(data[:size]).load()
+
+def test_corrupt(nested):
+  data = bytearray(BinWriter().dump(nested).getvalue())
+  start, size = tree(data)
+  data[start] = ord('?')
+  with pytest.raises(ValueError, match="Unknown pdpyb tag"):
+    BinReader(bytes(data)).load()
+
+def test_corrupt_size(nested):
+  data = bytearray(BinWriter().dump(nested).getvalue())
+  start, size = tree(data)
+  # a tree record that is longer than its value
+  data[start - 8:start] = U64.pack(size + 1)
+  data[start + size:start + size] = b'N'
+  with pytest.raises(ValueError, match="left over"):
+    BinReader(bytes(data)).load()
+  # an object of a shape that was not defined
+  data = bytearray(BinWriter().dump(nested).getvalue())
+  data[start] = ord('o')
+  with pytest.raises(ValueError, match="corrupt"):
+    BinReader(bytes(data)).load()
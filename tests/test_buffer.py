@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the numpy buffers of the array values """
+
+import pytest
+
+from conftest import load
+from pdpy_lib import PdPy, ArrayBuffer, ArrayTokens, Base, Default
+
+numpy = pytest.importorskip('numpy')
+
+def values(pdpy):
+  """ The values of the ``#A`` lines of every array of a patch """
+  found = []
+  stack = [pdpy.root]
+  while stack:
+    canvas = stack.pop()
+    for o in getattr(canvas, 'nodes', []):
+      stack.append(o)
+      for d in getattr(o, 'data', []) if isinstance(getattr(o, 'data', None), list) else []:
+        if hasattr(d, 'header'):
+          found.append(d.data)
+  return found
+
+def test_list_methods():
+  values = [1.0, 2.5, -3.0, 0.0]
+  for make in (lambda v: ArrayBuffer(v), lambda v: ArrayTokens(list(map(str, v)))):
+    a, b = make(values), list(values)
+    for args in [(0, 9.0), (-1, 7.0), (100, 5.0), (-100, 4.0), (2, 1.5)]:
+      a.insert(*args)
+      b.insert(*args)
+    assert list(a) == b
+    for index in [(), (0,), (-2,), (3,)]:
+      assert a.pop(*index) == b.pop(*index)
+    assert list(a) == b
+    assert (-3.0 in a) and (8.0 not in a) and ('x' not in a)
+    assert list(a + [6.0]) == b + [6.0]
+    assert [0.0] + a == [0.0] + b
+    a.append(1.0)
+    a.extend([2.0, 3.0])
+    assert list(a) == b + [1.0, 2.0, 3.0]
+
+def test_pop_empty():
+  a = ArrayBuffer()
+  with pytest.raises(IndexError):
+    a.pop()
+  a.append(1)
+  with pytest.raises(IndexError):
+    a.pop(1)
+  assert a.pop() == 1.0 and len(a) == 0
+
+def test_add_keeps_the_dtype():
+  a = ArrayBuffer([1, 2], dtype='float32')
+  b = a + ArrayBuffer([3])
+  assert isinstance(b, ArrayBuffer) and b.dtype == 'float32'
+  assert b == [1.0, 2.0, 3.0] and a == [1.0, 2.0]
+
+@pytest.mark.parametrize('lazy', [False, True])
+@pytest.mark.parametrize('dtype', ['float64', 'float32'])
+def test_parse_with_dtype(dtype, lazy):
+  plain = load('arraytest.pd')
+  pdpy = load('arraytest.pd', array_dtype=dtype, lazy=lazy)
+  found = values(pdpy)
+  assert found
+  for v in found:
+    v = v.values if isinstance(v, ArrayTokens) else v
+    assert isinstance(v, ArrayBuffer) and v.dtype == dtype
+  # the other patches keep the lists
+  assert not any(isinstance(v, ArrayBuffer) for v in values(load('arraytest.pd')))
+  assert Base.__d__ is Default.shared() and Base.__d__.array['dtype'] is None
+  if dtype == 'float64':
+    assert pdpy.__pd__() == plain.__pd__()
+    assert pdpy.__json__() == plain.__json__()
+
+def test_gop_array_defaults():
+  plain = PdPy(name='gop', root=True)
+  plain.createGOPArray(length=4)
+  pdpy = PdPy(name='gop', root=True, array_dtype='float64')
+  array = pdpy.createGOPArray(length=4)
+  assert isinstance(array.data[0].data, ArrayBuffer)
+  assert pdpy.__pd__() == plain.__pd__()
+  assert pdpy.__json__() == plain.__json__()
+  assert '#A 0 0 0 0 0 0;' in pdpy.__pd__()
+
+@pytest.mark.parametrize('dtype', ['float16', 'int32', 'complex64'])
+def test_unsupported_dtype(dtype):
+  with pytest.raises(ValueError, match="Unsupported array dtype"):
+    ArrayBuffer([1, 2], dtype=dtype)
+
+@pytest.mark.parametrize('dtype', ['float64', 'float32'])
+def test_pdpyb_keeps_the_dtype(dtype):
+  from pdpy_lib import BinWriter, BinReader
+  pdpy = load('arraytest.pd', array_dtype=dtype)
+  copy = BinReader(BinWriter().dump(pdpy).getvalue()).load()
+  for a, b in zip(values(pdpy), values(copy)):
+    assert isinstance(b, ArrayBuffer) and b.dtype == dtype
+    assert list(a) == list(b)
+  assert copy.__pd__() == pdpy.__pd__()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the on-disk cache of parsed patches """
+
+import os
+import shutil
+
+import pytest
+
+from conftest import PD_FILES, load
+from pdpy_lib import ParseCache
+
+@pytest.fixture
+def patch(tmp_path):
+  """ A copy of ``nested.pd`` that the tests can change """
+  path = tmp_path / 'nested.pd'
+  shutil.copy(os.path.join(PD_FILES, 'nested.pd'), path)
+  return path
+
+@pytest.fixture
+def cache(tmp_path):
+  return ParseCache(tmp_path / 'cache')
+
+class Loader:
+  """ Count the parses of ``nested.pd`` """
+  def __init__(self):
+    self.calls = 0
+  def __call__(self):
+    self.calls += 1
+    return load('nested.pd')
+
+def test_hit_and_miss(cache, patch):
+  loader = Loader()
+  first = cache.load(patch, loader, source='pd')
+  second = cache.load(patch, loader, source='pd')
+  assert loader.calls == 1
+  assert second is not first and second.__pd__() == first.__pd__()
+  # another context is another entry
+  cache.load(patch, loader, source='pd', dtype='float32')
+  cache.load(patch, loader, source='pd', encoding='latin-1')
+  assert loader.calls == 3
+  assert len(cache.entries()) == 3
+  # a change of the content is a miss
+  with open(patch, 'a') as fp:
+    fp.write('#X obj 10 10 print;\n')
+  cache.load(patch, loader, source='pd')
+  assert loader.calls == 4
+
+def test_invalidate(cache, patch):
+  loader = Loader()
+  cache.load(patch, loader, source='pd')
+  cache.load(patch, loader, source='pd', dtype='float32')
+  assert len(cache.entries()) == 2
+  cache.invalidate(patch, 'pd', dtype='float32')
+  assert len(cache.entries()) == 1
+  cache.load(patch, loader, source='pd')
+  assert loader.calls == 2
+  cache.invalidate(patch, 'pd')
+  assert cache.entries() == []
+  cache.load(patch, loader, source='pd')
+  cache.invalidate()
+  assert cache.entries() == []
+
+def test_evict_the_least_recently_used(cache, tmp_path):
+  keys = []
+  for i in range(4):
+    key = 'k' + str(i)
+    cache.put(key, load('nested.pd'))
+    # one second apart, the oldest first
+    os.utime(cache.__entry__(key), (1000 + i, 1000 + i))
+    keys.append(key)
+  # a hit makes an entry the most recently used
+  assert cache.get('k0') is not None
+  size = cache.entries()[0][1]
+  cache.evict(limit=2 * size)
+  left = sorted(e[2].stem for e in cache.entries())
+  assert left == [ 'k0', 'k3' ]
+  assert cache.size() <= 2 * size
+
+def test_limit(tmp_path):
+  cache = ParseCache(tmp_path / 'cache', limit=1)
+  cache.put('k', load('nested.pd'))
+  # an entry larger than the limit does not stay
+  assert cache.entries() == []
+
+def test_corrupt_entry(cache, patch):
+  loader = Loader()
+  cache.load(patch, loader, source='pd')
+  entry = cache.entries()[0][2]
+  entry.write_bytes(b'not a cache entry')
+  pdpy = cache.load(patch, loader, source='pd')
+  # a corrupt entry is a miss, and is replaced
+  assert loader.calls == 2 and pdpy is not None
+  assert cache.load(patch, loader, source='pd').__pd__() == pdpy.__pd__()
+  assert loader.calls == 2
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the cached pd lines and layout of the canvases """
+
+from conftest import load
+
+def edit(pdpy):
+  """ Change a patch in place, without setting any attribute """
+  root = pdpy.root
+  another = root.nodes[2].nodes[1]
+  root.nodes[0].position.set_x(999)
+  root.dimension.set_width(640)
+  another.nodes[1].args.append('f')
+  another.nodes[3].position.set_y(7)
+
+def test_pd_sees_changes_in_place(nested):
+  before = nested.__pd__()
+  edit(nested)
+  fresh = load('nested.pd')
+  edit(fresh)
+  assert nested.__pd__() == fresh.__pd__() != before
+
+def test_write_sees_changes_in_place(nested, tmp_path):
+  nested.write(str(tmp_path / 'first.pd'))
+  edit(nested)
+  nested.write(str(tmp_path / 'second.pd'))
+  fresh = load('nested.pd')
+  edit(fresh)
+  fresh.write(str(tmp_path / 'fresh.pd'))
+  second = (tmp_path / 'second.pd').read_text()
+  assert second == (tmp_path / 'fresh.pd').read_text()
+  assert second != (tmp_path / 'first.pd').read_text()
+
+def test_cache_keeps_the_lines(tmp_path):
+  cached = load('nested.pd', cache=True)
+  assert cached.__pd__() == cached.__pd__() == load('nested.pd').__pd__()
+  cached.write(str(tmp_path / 'cached.pd'))
+  plain = load('nested.pd')
+  plain.write(str(tmp_path / 'plain.pd'))
+  assert (tmp_path / 'cached.pd').read_text() == (tmp_path / 'plain.pd').read_text()
+
+def test_cache_sees_tracked_changes():
+  cached = load('nested.pd', cache=True)
+  cached.__pd__()
+  another = cached.root.nodes[2].nodes[1]
+  another.nodes[1].args = another.nodes[1].args + ['f']
+  fresh = load('nested.pd')
+  fresh.root.nodes[2].nodes[1].nodes[1].args.append('f')
+  assert cached.__pd__() == fresh.__pd__()
+
+def test_cache_misses_changes_in_place_until_set(tmp_path):
+  cached = load('nested.pd', cache=True)
+  fresh = load('nested.pd')
+  cached.write(str(tmp_path / 'first.pd'))
+  fresh.write(str(tmp_path / 'fresh.pd'))
+  before = cached.__pd__()
+  obj = cached.root.nodes[2].nodes[1].nodes[1]
+  obj.args.append('f')
+  fresh.root.nodes[2].nodes[1].nodes[1].args.append('f')
+  # the documented contract: a change in place is not seen...
+  assert cached.__pd__() == before
+  cached.write(str(tmp_path / 'stale.pd'))
+  assert (tmp_path / 'stale.pd').read_text() == (tmp_path / 'first.pd').read_text()
+  # ...until the attribute is set again
+  obj.args = obj.args
+  cached.write(str(tmp_path / 'cached.pd'))
+  fresh.write(str(tmp_path / 'fresh.pd'))
+  assert (tmp_path / 'cached.pd').read_text() == (tmp_path / 'fresh.pd').read_text()
+  assert cached.__pd__() == fresh.__pd__() != before
+
+def test_cache_sees_touched_objects():
+  cached = load('nested.pd', cache=True)
+  before = cached.__pd__()
+  obj = cached.root.nodes[2].nodes[1].nodes[3]
+  obj.position.set_y(7)
+  obj.__touch__()
+  fresh = load('nested.pd')
+  fresh.root.nodes[2].nodes[1].nodes[3].position.set_y(7)
+  assert cached.__pd__() == fresh.__pd__() != before
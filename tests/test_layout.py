@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the layered layout """
+
+import random
+
+import pytest
+
+from conftest import load, pd_files
+from pdpy_lib import PdPy, Obj, Comment, Edge, Layout
+
+def patch(count):
+  """ A new patch with ``count`` objects, and the objects """
+  pdpy = PdPy(name='layout', root=True)
+  objs = [ Obj('+').addargs(i) for i in range(count) ]
+  pdpy.create(*objs)
+  return pdpy, objs
+
+def connect(pdpy, source, sink, outlet=0, inlet=0):
+  pdpy.root.edge(Edge(pd_lines=[source.id, outlet, sink.id, inlet]))
+
+def box(o, font):
+  w, h = o.__get_obj_size__(font=font)
+  return o.position.x, o.position.y, o.position.x + w, o.position.y + h
+
+def test_cycle():
+  pdpy, (f, plus, out) = patch(3)
+  connect(pdpy, f, plus)
+  # the feedback connection
+  connect(pdpy, plus, f, inlet=1)
+  connect(pdpy, f, out)
+  layout = Layout(pdpy.root)
+  assert layout.rank == [0, 1, 1]
+  assert sorted(i for layer in layout.layers for i in layer) == [0, 1, 2]
+  assert f.position.y < plus.position.y == out.position.y
+
+def test_cycle_without_sources():
+  pdpy, objs = patch(4)
+  for a, b in zip(objs, objs[1:] + objs[:1]):
+    connect(pdpy, a, b)
+  layout = Layout(pdpy.root)
+  # one connection is reversed, so every node has its own layer
+  assert sorted(layout.rank) == [0, 1, 2, 3]
+  assert all(len(layer) == 1 for layer in layout.layers)
+
+def test_large_canvas():
+  count = 10000
+  pdpy, objs = patch(count)
+  pdpy.connect(*objs)
+  rng = random.Random(1)
+  for _ in range(count):
+    connect(pdpy, objs[rng.randrange(count)], objs[rng.randrange(count)])
+  # deeper than the recursion limit
+  layout = Layout(pdpy.root)
+  assert len(layout.rank) == count
+  assert sum(len(layer) for layer in layout.layers) == count
+  assert all(o.position.x is not None for o in objs)
+
+def test_long_chain():
+  count = 10000
+  pdpy, objs = patch(count)
+  pdpy.connect(*objs)
+  layout = Layout(pdpy.root)
+  assert layout.rank == list(range(count))
+  ys = [ o.position.y for o in objs ]
+  assert ys == sorted(ys) and len(set(ys)) == count
+
+def test_self_and_duplicate_connections():
+  pdpy, (a, b) = patch(2)
+  connect(pdpy, a, a)
+  connect(pdpy, a, b)
+  connect(pdpy, a, b)
+  connect(pdpy, a, b, inlet=1)
+  layout = Layout(pdpy.root)
+  assert layout.succ == [[(1, 0)], []]
+  assert layout.pred == [[], [(0, 0)]]
+  assert layout.rank == [0, 1]
+  assert a.position.y < b.position.y
+
+def test_isolated_and_comments():
+  pdpy, objs = patch(5)
+  pdpy.connect(*objs[:3])
+  notes = pdpy.createComment('a comment', 'another comment')
+  layout = Layout(pdpy.root)
+  assert layout.isolated == [3, 4]
+  font = layout.font
+  right = max(box(o, font)[2] for o in objs[:3])
+  for o in objs[3:] + notes:
+    assert o.position.x >= right
+  # in a column, top to bottom
+  column = [ box(o, font) for o in objs[3:] + notes ]
+  for upper, lower in zip(column, column[1:]):
+    assert upper[3] <= lower[1]
+
+def test_no_overlaps():
+  pdpy, objs = patch(12)
+  pdpy.connect(*objs[:6])
+  pdpy.connect(objs[0], *objs[6:9])
+  pdpy.createComment('a comment')
+  layout = Layout(pdpy.root)
+  boxes = [ box(o, layout.font) for o in pdpy.root.nodes + pdpy.root.comments ]
+  for i, a in enumerate(boxes):
+    for b in boxes[i + 1:]:
+      assert not (a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3])
+
+def test_subpatch_without_font(nested):
+  # the subpatches of nested.pd have no font
+  canvas = nested.root.nodes[2].nodes[1]
+  assert not hasattr(canvas, 'font')
+  layout = Layout(canvas)
+  assert layout.font == nested.root.font
+  nested.root.font = 16
+  assert Layout(canvas).font == 16
+
+def test_canvas_without_any_font():
+  pdpy, objs = patch(2)
+  canvas = pdpy.root
+  del canvas.__dict__['font']
+  pdpy.connect(*objs)
+  layout = Layout(canvas)
+  assert layout.font == canvas.__d__.font['size']
+
+def test_empty_canvas():
+  pdpy = PdPy(name='empty', root=True)
+  Layout(pdpy.root)
+
+@pytest.mark.parametrize('name', pd_files())
+def test_pd_files(name):
+  try:
+    pdpy = load(name)
+  except ValueError as e:
+    pytest.skip("pdpy does not read " + name + ": " + str(e))
+  pdpy.arrangement(6)
+  pdpy.arrange()
+  pdpy.__pd__()
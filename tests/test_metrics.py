@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the box sizes of the pd fonts """
+
+import pytest
+
+from pdpy_lib import PdPy
+from pdpy_lib.utilities.metrics import BOX_WIDTH, MARGINS, boxSize, fontMetrics
+from pdpy_lib.utilities.utils import loadPdFile, parsePdFileLines
+
+PATCH = """#N canvas 0 22 450 300 10;
+#X obj 10 10 + 1;
+#X msg 10 40 hello \\, world \\; dest 1;
+#X text 10 70 some words here;
+"""
+
+def patch(tmp_path):
+  """ Return a patch with an object, a message with a target and a comment """
+  path = tmp_path / 'metrics.pd'
+  path.write_text(PATCH)
+  pdpy = PdPy(name='metrics', pd_lines=parsePdFileLines(loadPdFile(str(path))))
+  obj, msg = pdpy.root.nodes
+  return pdpy.root, obj, msg, pdpy.root.comments[0]
+
+@pytest.mark.parametrize('size, metrics', [
+  (8, (5, 11)),
+  (10, (6, 13)),
+  (11, (6, 13)),
+  (12, (7, 16)),
+  (23, (10, 19)),
+  (36, (22, 44)),
+  (100, (22, 44)),
+  # smaller than every font
+  (4, (5, 11)),
+  ('16', (10, 19)),
+])
+def test_font_metrics(size, metrics):
+  assert fontMetrics(size) == metrics
+
+def test_one_line():
+  width, height = fontMetrics(10)
+  assert boxSize(['+', '1'], 10) == (3 * width + MARGINS[0], height + MARGINS[1])
+  assert boxSize([], 10) == (MARGINS[0], height + MARGINS[1])
+
+def test_wrap():
+  width, height = fontMetrics(12)
+  # 12 words of 4 characters fill 59 of the 60 columns
+  per_line = (BOX_WIDTH + 1) // 5
+  assert boxSize(['abcd'] * per_line, 12) == (59 * width + MARGINS[0], height + MARGINS[1])
+  assert boxSize(['abcd'] * (per_line + 1), 12) == (59 * width + MARGINS[0], 2 * height + MARGINS[1])
+  assert boxSize(['abcd'] * (3 * per_line), 12) == (59 * width + MARGINS[0], 3 * height + MARGINS[1])
+
+def test_columns():
+  width, height = fontMetrics(10)
+  # ``, f 20`` sets the width, also for shorter text
+  assert boxSize(['f'], 10, columns=20) == (20 * width + MARGINS[0], height + MARGINS[1])
+  # 4 words of 4 characters fill 19 of the 20 columns
+  assert boxSize(['abcd'] * 5, 10, columns=20) == (20 * width + MARGINS[0], 2 * height + MARGINS[1])
+  assert boxSize(['abcd'] * 5, 10, columns='20') == boxSize(['abcd'] * 5, 10, columns=20)
+
+def test_long_words_are_cut():
+  width, height = fontMetrics(10)
+  assert boxSize(['x' * 130], 10) == (BOX_WIDTH * width + MARGINS[0], 3 * height + MARGINS[1])
+  assert boxSize(['a', 'x' * 25], 10, columns=10) == (10 * width + MARGINS[0], 4 * height + MARGINS[1])
+
+def test_box_sizes(tmp_path):
+  root, obj, msg, comment = patch(tmp_path)
+  width, height = fontMetrics(10)
+  for o in (obj, msg, comment):
+    assert o.__get_obj_size__(root) == boxSize(o.__box_text__(), 10)
+  assert comment.__get_obj_size__(root) == (len('some words here') * width + MARGINS[0], height + MARGINS[1])
+  # another font is measured again
+  assert comment.__get_obj_size__(font=16) == boxSize(comment.__box_text__(), 16)
+  assert comment.__get_obj_size__(root) == boxSize(comment.__box_text__(), 10)
+
+def test_metrics_are_kept(tmp_path):
+  root, obj, msg, comment = patch(tmp_path)
+  for o in (obj, msg, comment):
+    o.__get_obj_size__(root)
+    box = o.__dict__['__metrics__']
+    # moving a box does not change its size
+    o.position = o.position
+    assert o.__dict__['__metrics__'] is box
+
+def test_args_drop_the_metrics(tmp_path):
+  root, obj, msg, comment = patch(tmp_path)
+  before = obj.__get_obj_size__(root)
+  obj.args = obj.args + ['a', 'longer', 'box']
+  assert '__metrics__' not in obj.__dict__
+  assert obj.__get_obj_size__(root) == boxSize(obj.__box_text__(), 10) != before
+
+def test_text_drops_the_metrics(tmp_path):
+  root, obj, msg, comment = patch(tmp_path)
+  before = comment.__get_obj_size__(root)
+  comment.text = ['a'] * 40
+  assert '__metrics__' not in comment.__dict__
+  assert comment.__get_obj_size__(root) == boxSize(comment.__box_text__(), 10) != before
+
+def test_targets_drop_the_metrics(tmp_path):
+  root, obj, msg, comment = patch(tmp_path)
+  before = msg.__get_obj_size__(root)
+  msg.targets = msg.targets
+  assert '__metrics__' not in msg.__dict__
+  assert msg.__get_obj_size__(root) == before
+  # a new message of a target is part of the box of its message
+  msg.targets[0].add('and some more words')
+  assert '__metrics__' not in msg.__dict__
+  assert msg.__get_obj_size__(root) == boxSize(msg.__box_text__(), 10) != before
+  msg.addTarget('dest')
+  assert '__metrics__' not in msg.__dict__
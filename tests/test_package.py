@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the lazy attributes of the package """
+
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+def run(code):
+  """ Run ``code`` in a new interpreter, where nothing is imported yet """
+  done = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+  assert done.returncode == 0, done.stderr
+  return done.stdout
+
+@pytest.mark.parametrize('path', [
+  'pdpy_lib.utilities.utils.loadPdFile',
+  'pdpy_lib.utilities.wavfile.writeWav',
+  'pdpy_lib.core.base.Base',
+  'pdpy_lib.extra.cache.ParseCache',
+  'pdpy_lib.encoding.jsonwriter.JsonWriter',
+  'pdpy_lib.re.compile',
+])
+def test_subpackages_are_attributes(path):
+  assert run('import pdpy_lib; print(' + path + '.__name__)').strip() == path.rsplit('.', 1)[1]
+
+def test_submodules_after_other_imports():
+  # the subpackage is already imported, but not the submodule
+  code = 'import pdpy_lib.utilities.utils, pdpy_lib; print(pdpy_lib.utilities.spatial.SpatialGrid.__name__)'
+  assert run(code).strip() == 'SpatialGrid'
+
+def test_missing_names():
+  import pdpy_lib
+  with pytest.raises(AttributeError):
+    pdpy_lib.nothing
+  with pytest.raises(AttributeError):
+    pdpy_lib.utilities.nothing
+
+def test_namespace():
+  import pdpy_lib
+  names = dir(pdpy_lib)
+  assert 'importlib' not in names and '_importlib' not in names
+  assert 'utilities' in names and 'PdPy' in names
+  assert not [ n for n in pdpy_lib.__all__ if n.startswith('_') ]
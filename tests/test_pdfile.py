@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the reading of pd files: line endings and encodings """
+
+from codecs import BOM_UTF8
+
+import pytest
+
+from pdpy_lib import PdPy
+from pdpy_lib.utilities.utils import detectEncoding, iterPdFile, iterPdLines, loadPdFile, parsePdFileLines
+
+LINES = [
+  '#N canvas 0 22 450 300 12;',
+  '#X obj 30 30 osc~ 440;',
+  '#X text 30 60 café crème;',
+  '#X obj 30 90 dac~;',
+  '#X connect 0 0 1 0;',
+]
+
+def write(tmp_path, name, newline='\n', encoding='utf-8', bom=False):
+  path = tmp_path / name
+  data = newline.join(LINES).encode(encoding) + newline.encode()
+  path.write_bytes((BOM_UTF8 if bom else b'') + data)
+  return str(path)
+
+def parse(path):
+  return PdPy(name='file', pd_lines=parsePdFileLines(loadPdFile(path))).__pd__()
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n', '\r'])
+def test_line_endings(tmp_path, newline):
+  path = write(tmp_path, 'endings.pd', newline)
+  lines = list(iterPdFile(path))
+  assert len(lines) == len(LINES)
+  assert [ line.rstrip('\r\n') for line in lines ] == LINES
+  assert parse(path) == parse(write(tmp_path, 'plain.pd'))
+
+def test_last_line_without_newline(tmp_path):
+  for newline in ('\n', '\r'):
+    path = tmp_path / 'last.pd'
+    path.write_bytes(newline.join(LINES).encode())
+    assert [ line.rstrip('\r\n') for line in iterPdFile(str(path)) ] == LINES
+
+def test_latin1(tmp_path):
+  path = write(tmp_path, 'latin.pd', '\r\n', encoding='latin-1')
+  with open(path, 'rb') as fp:
+    assert detectEncoding(fp.read()) == 'latin-1'
+  assert parse(path) == parse(write(tmp_path, 'plain.pd', '\r\n'))
+
+def test_bom(tmp_path):
+  path = write(tmp_path, 'bom.pd', bom=True)
+  lines = list(iterPdFile(path))
+  assert lines[0] == LINES[0] + '\n'
+  assert len(list(iterPdLines(lines))) == len(LINES)
+  assert parse(path) == parse(write(tmp_path, 'plain.pd'))
+
+def test_detect_encoding():
+  assert detectEncoding(b'#X text 0 0 plain;') == 'utf-8'
+  assert detectEncoding('#X text 0 0 café;'.encode('utf-8')) == 'utf-8'
+  assert detectEncoding('#X text 0 0 café;'.encode('latin-1')) == 'latin-1'
+  # a multi-byte character is not split at the chunks of the scan
+  assert detectEncoding(('a' * 5 + 'é' * 3).encode('utf-8') * 300000) == 'utf-8'
+
+def test_empty_file(tmp_path):
+  path = tmp_path / 'empty.pd'
+  path.write_bytes(b'')
+  assert list(iterPdFile(str(path))) == []
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the incremental arrangement """
+
+import pytest
+
+from conftest import load
+from pdpy_lib import PdPy, Obj, Comment, Placement
+
+def positions(canvas, objects=None):
+  """ The positions of the objects and comments of ``canvas``, in order """
+  if objects is None:
+    objects = getattr(canvas, 'nodes', []) + getattr(canvas, 'comments', [])
+  return [ (o.position.x, o.position.y) for o in objects ]
+
+# create numbers the new objects after the nodes, not after the comments:
+# these patches have no comments on their root canvas, so the ids are right
+@pytest.mark.parametrize('name', ['oscillator.pd', 'beat-maker.pd', 'messages.pd', 'nested.pd'])
+def test_place_new_objects(name):
+  pdpy = load(name)
+  pdpy.arrangement(6, incremental=True)
+  canvas = pdpy.root
+  placed = canvas.nodes + getattr(canvas, 'comments', [])
+  old = positions(canvas, placed)
+  first = canvas.nodes[0]
+  new = [ Obj('osc~').addargs(220), Obj('*~').addargs(0.5), Obj('dac~'), Obj('print') ]
+  note = Comment('placed by the incremental arrangement')
+  canvas.create(*new, note)
+  # below an object of the patch, then a chain, then alone
+  canvas.connect(first, new[0], new[1], new[2])
+  pdpy.arrange()
+  assert positions(canvas, placed) == old
+  for o in new + [note]:
+    assert o.position.x is not None and o.position.y is not None
+    assert canvas.overlapping(o) == []
+  # the children are placed below their parents
+  assert new[0].position.y > first.position.y
+  assert new[1].position.y > new[0].position.y
+  assert new[2].position.y > new[1].position.y
+
+def test_place_again():
+  pdpy = load('oscillator.pd')
+  pdpy.arrangement(6, incremental=True)
+  pdpy.arrange()
+  old = positions(pdpy.root)
+  pdpy.arrange()
+  assert positions(pdpy.root) == old
+  moved = pdpy.root.nodes[1].unplace()
+  pdpy.arrange()
+  assert positions(pdpy.root)[0::2] == old[0::2]
+  assert pdpy.root.overlapping(moved) == []
+
+def build():
+  pdpy = PdPy(name='unplaced', root=True)
+  objs = [ Obj('osc~').addargs(440), Obj('*~').addargs(0.1), Obj('dac~'), Obj('print') ]
+  pdpy.root.create(*objs)
+  pdpy.root.connect(*objs[:3])
+  return pdpy
+
+def test_fallback_to_arrange():
+  # without any placed object, the canvas is arranged in full
+  incremental = build()
+  incremental.arrangement(6, incremental=True)
+  incremental.arrange()
+  full = build()
+  full.arrangement(6)
+  full.arrange()
+  assert positions(incremental.root) == positions(full.root)
+
+def test_fallback_calls_arrange():
+  pdpy = build()
+  called = []
+  Placement(pdpy.root, arrange=called.append)
+  assert called == [pdpy.root]
+  # with a placed object, only the others are placed
+  pdpy.root.nodes[0].addpos(10, 10)
+  called.clear()
+  Placement(pdpy.root, arrange=called.append)
+  assert called == []
+  assert all(o.position.x is not None for o in pdpy.root.nodes)
+
+@pytest.mark.parametrize('cache', [False, True])
+def test_placing_one_object_measures_one_box(monkeypatch, cache):
+  import pdpy_lib.core.base as base
+  from pdpy_lib.utilities.spatial import SpatialGrid
+  counts = {}
+  for size in (200, 800):
+    pdpy = PdPy(name='large', root=True, cache=cache)
+    pdpy.arrangement(6, incremental=True)
+    canvas = pdpy.root
+    canvas.create(*[ Obj('+').addargs(i) for i in range(size) ])
+    pdpy.arrange()
+    # the first placement builds the spatial index
+    canvas.create(Obj('print'))
+    pdpy.arrange()
+    # count the boxes measured and indexed to place one more object
+    calls = { 'measured' : 0, 'indexed' : 0 }
+    boxSize, insert = base.boxSize, SpatialGrid.insert
+    def measure(*args, **kwargs):
+      calls['measured'] += 1
+      return boxSize(*args, **kwargs)
+    def index(grid, key, rect):
+      calls['indexed'] += 1
+      return insert(grid, key, rect)
+    with monkeypatch.context() as m:
+      m.setattr(base, 'boxSize', measure)
+      m.setattr(SpatialGrid, 'insert', index)
+      new = Obj('print')
+      canvas.create(new)
+      canvas.connect(canvas.nodes[0], new)
+      pdpy.arrange()
+    assert new.position.x is not None
+    counts[size] = calls
+  # the same work for a canvas four times as large
+  assert counts[200] == counts[800]
+  assert counts[800]['measured'] <= 2 and counts[800]['indexed'] <= 2
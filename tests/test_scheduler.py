@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the order in which the canvases are arranged """
+
+from pdpy_lib import PdPy
+from pdpy_lib.extra.scheduler import Scheduler
+from pdpy_lib.utilities.utils import loadPdFile, parsePdFileLines
+
+def voices(path, count=6):
+  """ Write a patch with ``count`` subpatches of different sizes, one of them nested """
+  lines = [ '#N canvas 0 22 450 300 12;' ]
+  for v in range(count):
+    lines.append('#N canvas 0 22 450 300 voice%d 0;' % v)
+    size = 5 + 7 * v
+    for i in range(size):
+      lines.append('#X obj 0 0 + %d;' % i)
+    if v == 1:
+      lines.append('#N canvas 0 22 450 300 inner 0;')
+      lines.append('#X obj 0 0 inlet;')
+      lines.append('#X obj 0 0 outlet;')
+      lines.append('#X connect 0 0 1 0;')
+      lines.append('#X restore 0 0 pd inner;')
+    for i in range(size - 1):
+      lines.append('#X connect %d 0 %d %d;' % (i, i + 1, i % 2))
+    lines.append('#X text 0 0 voice %d;' % v)
+    lines.append('#X restore 10 %d pd voice%d;' % (10 + 20 * v, v))
+  lines.append('#X obj 0 0 dac~;')
+  with open(path, 'w') as fp:
+    fp.write('\r\n'.join(lines) + '\r\n')
+  return path
+
+def test_subpatches_first_and_only_once(tmp_path):
+  path = voices(str(tmp_path / 'voices.pd'))
+  pdpy = PdPy(name='voices', pd_lines=parsePdFileLines(loadPdFile(path)))
+  order = []
+  scheduler = Scheduler(6)
+  arrange = scheduler.arrange
+  def spy(canvas):
+    order.append(canvas)
+    arrange(canvas)
+  scheduler.arrange = spy
+  scheduler(pdpy.root)
+  # every canvas once, each after the canvases inside it
+  assert len(order) == len(set(map(id, order))) == 1 + 6 + 1
+  assert order[-1] is pdpy.root
+  for canvas in order:
+    for child in canvas.nodes:
+      if hasattr(child, 'nodes'):
+        assert order.index(child) < order.index(canvas)
+  # the arranged canvases are skipped, a changed one is arranged again
+  # with the canvases that contain it
+  del order[:]
+  scheduler(pdpy.root)
+  assert order == []
+  inner = pdpy.root.nodes[1].nodes[-1]
+  inner.__changed__()
+  scheduler(pdpy.root)
+  assert order == [ inner, pdpy.root.nodes[1], pdpy.root ]
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the spatial index, against a brute-force search """
+
+import random
+
+import pytest
+
+from pdpy_lib import SpatialGrid
+
+def overlap(a, b):
+  return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def distance(r, x, y):
+  return max(r[0] - x, 0, x - r[2]) ** 2 + max(r[1] - y, 0, y - r[3]) ** 2
+
+def randomRect(rng, size=400, box=80):
+  x, y = rng.randrange(-size, size), rng.randrange(-size, size)
+  return (x, y, x + rng.randrange(0, box), y + rng.randrange(0, box))
+
+@pytest.fixture
+def grid():
+  """ A grid of random rectangles, some moved and removed, and the rectangles left """
+  rng = random.Random(7)
+  grid = SpatialGrid(cell=32)
+  rects = {}
+  for key in range(500):
+    rects[key] = randomRect(rng)
+    grid.insert(key, rects[key])
+  for key in rng.sample(sorted(rects), 100):
+    rects[key] = randomRect(rng)
+    grid.insert(key, rects[key])
+  for key in rng.sample(sorted(rects), 100):
+    del rects[key]
+    grid.remove(key)
+  grid.remove('missing')
+  return grid, rects
+
+def test_contents(grid):
+  grid, rects = grid
+  assert len(grid) == len(rects)
+  assert all(key in grid for key in rects)
+  assert grid.rects == rects
+
+def test_query(grid):
+  grid, rects = grid
+  rng = random.Random(1)
+  for _ in range(300):
+    r = randomRect(rng, box=200)
+    assert sorted(grid.query(r)) == sorted(k for k, v in rects.items() if overlap(v, r))
+    assert grid.overlaps(r) == any(overlap(v, r) for v in rects.values())
+
+def test_point(grid):
+  grid, rects = grid
+  rng = random.Random(2)
+  for _ in range(300):
+    x, y = rng.uniform(-450, 450), rng.uniform(-450, 450)
+    found = [ k for k, r in rects.items() if r[0] <= x < r[2] and r[1] <= y < r[3] ]
+    assert sorted(grid.point(x, y)) == sorted(found)
+
+@pytest.mark.parametrize('count', [1, 3, 20])
+def test_nearest(grid, count):
+  grid, rects = grid
+  rng = random.Random(3)
+  for _ in range(200):
+    # also far outside of the rectangles
+    x, y = rng.uniform(-2000, 2000), rng.uniform(-2000, 2000)
+    found = grid.nearest(x, y, count)
+    best = sorted(distance(r, x, y) for r in rects.values())[:count]
+    assert len(found) == len(best)
+    assert [distance(rects[k], x, y) for k in found] == pytest.approx(best)
+
+def test_empty():
+  grid = SpatialGrid()
+  assert grid.query((0, 0, 10, 10)) == []
+  assert grid.point(0, 0) == []
+  assert grid.nearest(0, 0) == []
+  grid.insert('a', (0, 0, 10, 10))
+  assert grid.nearest(0, 0, 0) == []
+  grid.remove('a')
+  assert grid.nearest(0, 0) == []
+
+def boxes(canvas, font=None):
+  """ The boxes of the placed objects and comments of ``canvas``, found one by one """
+  font = font or getattr(canvas, 'font', None) or canvas.__font__()
+  found = {}
+  for o in getattr(canvas, 'nodes', []) + getattr(canvas, 'comments', []):
+    p = getattr(o, 'position', None)
+    if getattr(p, 'x', None) is None or getattr(p, 'y', None) is None:
+      continue
+    w, h = o.__get_obj_size__(font=font)
+    found[id(o)] = (p.x, p.y, p.x + w, p.y + h)
+  return found
+
+def check(canvas, font=None):
+  """ Compare the index of ``canvas`` and its lookups with the boxes found one by one """
+  expected = boxes(canvas, font)
+  grid = canvas.__spatial__()
+  assert { id(o): r for o, r in grid.rects.items() } == expected
+  for r in list(expected.values()) + [(0, 0, 1000, 1000), (100, 50, 300, 120)]:
+    assert sorted(map(id, canvas.region(*r))) == sorted(k for k, v in expected.items() if overlap(v, r))
+  for x, y in [(0, 0), (80, 40), (100, 60), (240, 110)]:
+    assert sorted(map(id, canvas.at(x, y))) == sorted(
+      k for k, v in expected.items() if v[0] <= x < v[2] and v[1] <= y < v[3])
+    best = sorted(distance(v, x, y) for v in expected.values())[:3]
+    assert [distance(expected[id(o)], x, y) for o in canvas.nearest(x, y, 3)] == pytest.approx(best)
+
+@pytest.fixture
+def canvas(nested):
+  """ The innermost subpatch of ``nested.pd``, with its index built """
+  canvas = nested.root.nodes[2].nodes[1]
+  check(canvas)
+  return canvas
+
+def test_region_inside(canvas):
+  expected = boxes(canvas)
+  r = (90, 40, 400, 200)
+  found = canvas.region(*r, inside=True)
+  assert sorted(map(id, found)) == sorted(
+    k for k, v in expected.items() if r[0] <= v[0] and r[1] <= v[1] and v[2] <= r[2] and v[3] <= r[3])
+  # top to bottom, then left to right
+  assert found == sorted(found, key=lambda o: (o.position.y, o.position.x))
+
+def test_overlapping(canvas):
+  a, b = canvas.nodes[0], canvas.nodes[1]
+  assert a not in canvas.overlapping(a)
+  b.addpos(a.position.x + 3, a.position.y + 3)
+  assert canvas.overlapping(a) == [b]
+  assert canvas.overlapping(b) == [a]
+  a.unplace()
+  assert canvas.overlapping(a) == []
+  assert canvas.overlapping(b) == []
+
+def test_addpos(canvas):
+  o = canvas.nodes[2]
+  o.addpos(500, 400)
+  check(canvas)
+  assert canvas.at(501, 401) == [o]
+
+def test_move(canvas):
+  o = canvas.nodes[3]
+  o.move(x=600)
+  check(canvas)
+  o.move(y=5)
+  check(canvas)
+  assert canvas.at(601, 6) == [o]
+
+def test_unplace(canvas):
+  o = canvas.nodes[0]
+  x, y = o.position.x, o.position.y
+  o.unplace()
+  check(canvas)
+  assert o not in canvas.at(x + 1, y + 1)
+  o.addpos(x, y)
+  check(canvas)
+
+def test_remove(canvas):
+  o = canvas.nodes[1]
+  x, y = o.position.x, o.position.y
+  assert canvas.remove(o)
+  check(canvas)
+  assert o not in canvas.at(x + 1, y + 1)
+
+def test_create(canvas):
+  from pdpy_lib import Obj, Comment
+  o, c = Obj('metro').addargs(100), Comment('a new comment')
+  canvas.create(o, c)
+  o.addpos(300, 300)
+  c.addpos(300, 340)
+  check(canvas)
+  assert canvas.at(301, 301) == [o]
+  assert canvas.at(301, 341) == [c]
+
+def test_resize(canvas):
+  o = canvas.nodes[1]
+  width = canvas.__spatial__().rects[o][2]
+  o.args = o.args + ['and', 'a', 'much', 'longer', 'text']
+  check(canvas)
+  assert canvas.__spatial__().rects[o][2] > width
+
+def test_font(canvas):
+  rects = dict(canvas.__spatial__().rects)
+  canvas.font = 24
+  check(canvas, 24)
+  assert all(canvas.__spatial__().rects[o][2] > r[2] for o, r in rects.items())
+
+def test_parent_font(nested, canvas):
+  # the subpatches of nested.pd have no font, they use the font of the root
+  assert not hasattr(canvas, 'font')
+  check(canvas, nested.root.font)
+  nested.root.font = 36
+  check(canvas, 36)
+
+def test_replaced_lists(canvas):
+  removed = canvas.nodes[2:]
+  canvas.nodes = canvas.nodes[:2]
+  check(canvas)
+  assert not any(o in canvas.__spatial__() for o in removed)
+  canvas.comments = []
+  check(canvas)
+  canvas.nodes = canvas.nodes + removed
+  check(canvas)
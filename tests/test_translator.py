@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the json and pickle targets of the translator """
+
+import os
+from json import loads
+from pickle import load as pickle_load
+
+import pytest
+
+from conftest import PD_FILES
+from pdpy_lib.encoding.pdpyencoder import PdPyEncoder
+from pdpy_lib.extra.translator import Translator
+
+def translator(tmp_path, to, reflect=False):
+  return Translator({
+    'input' : os.path.join(PD_FILES, 'nested.pd'),
+    'output' : str(tmp_path / ('nested.' + to)),
+    'to' : to,
+    'fro' : 'pd',
+    'encoding' : 'utf-8',
+    'reflect' : reflect,
+  })
+
+def decode(text):
+  pdpy = loads(text, object_hook=PdPyEncoder())
+  pdpy.__jsontree__()
+  return pdpy
+
+def test_json_is_streamed(tmp_path, monkeypatch):
+  def whole(self, indent=4):
+    raise AssertionError("the json target built the whole document")
+  translate = translator(tmp_path, 'json')
+  expected = translate.pdpy.__json__()
+  monkeypatch.setattr(type(translate.pdpy), '__json__', whole)
+  translate()
+  assert (tmp_path / 'nested.json').read_text(encoding='utf-8') == expected
+
+def test_json_file(tmp_path):
+  translate = translator(tmp_path, 'json')
+  translate()
+  assert translate.json_file == tmp_path / 'nested.json'
+  # the json attribute is only ever the json string
+  assert not hasattr(translate, 'json') or isinstance(translate.json, str)
+  translate('pkl')
+  assert isinstance(translate.json, str)
+  translate('json')
+  assert isinstance(translate.json, str)
+
+@pytest.mark.parametrize('to', ['json', 'pkl'])
+def test_reflect(tmp_path, to):
+  translate = translator(tmp_path, to, reflect=True)
+  translate()
+  text = translate.pdpy.__json__()
+  if to == 'json':
+    assert (tmp_path / 'nested.json').read_text(encoding='utf-8') == text
+  else:
+    with open(tmp_path / 'nested.pkl', 'rb') as fp:
+      assert pickle_load(fp) == text
+  reflected = (tmp_path / 'nested_ref.pd').read_bytes().decode('utf-8')
+  assert reflected == translate.pd_ref == decode(text).__pd__()
+
+def test_reflect_pdpyb(tmp_path):
+  translate = translator(tmp_path, 'pdpyb', reflect=True)
+  translate()
+  reflected = (tmp_path / 'nested_ref.pd').read_bytes().decode('utf-8')
+  assert reflected == translate.pd_ref == translate.pdpy.__pd__()
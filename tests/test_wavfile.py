@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# **************************************************************************** #
+# This file is part of the pdpy project: https://github.com/pdpy-org
+# Copyright (C) 2022 Fede Camara Halac
+# **************************************************************************** #
+""" Tests of the wav files and of the arrays that read and write them """
+
+import pytest
+
+from pdpy_lib.patching.pdpy import PdPy
+from pdpy_lib.utilities.wavfile import readWav, writeWav
+
+@pytest.mark.parametrize('sampwidth', [1, 2, 3, 4])
+def test_not_finite_is_silence(tmp_path, sampwidth):
+  path = str(tmp_path / 'out.wav')
+  nan, inf = float('nan'), float('inf')
+  assert writeWav(path, [[nan, inf, 0.5], [-inf, 2.0, -2.0]], sampwidth=sampwidth) == 6
+  values = [ x for block in readWav(path) for x in block ]
+  assert values[0] == values[1] == values[3] == 0
+  assert values[2] == pytest.approx(0.5, abs=1e-2)
+  assert values[4] == pytest.approx(1.0, abs=1e-2)
+  assert values[5] == -1.0
+
+def test_readwav_is_tracked(tmp_path):
+  path = str(tmp_path / 'ramp.wav')
+  writeWav(path, [[ i / 10 for i in range(10) ]])
+  pdpy = PdPy(name='wav', root=True, cache=True)
+  table = pdpy.root.createGOPArray(name='ramp', length=4)
+  before = pdpy.__pd__()
+  table.readwav(path)
+  after = pdpy.__pd__()
+  assert after != before
+  assert table.length == 10
+  assert ' 0.5 ' in after
+
+def test_readwav_of_an_empty_file_is_tracked(tmp_path):
+  path = str(tmp_path / 'empty.wav')
+  writeWav(path, [])
+  pdpy = PdPy(name='wav', root=True, cache=True)
+  table = pdpy.root.createGOPArray(name='empty', length=4)
+  before = pdpy.__pd__()
+  table.readwav(path)
+  assert table.length == 0
+  assert pdpy.__pd__() != before
+
+def stereo(path, left, right, sampwidth=2):
+  """ Write a stereo file with the python ``wave`` module """
+  import wave
+  from array import array
+  frames = array('h', [ v for pair in zip(left, right) for v in pair ])
+  with wave.open(path, 'wb') as fp:
+    fp.setnchannels(2)
+    fp.setsampwidth(sampwidth)
+    fp.setframerate(44100)
+    fp.writeframes(frames.tobytes())
+
+def test_channels(tmp_path):
+  path = str(tmp_path / 'stereo.wav')
+  stereo(path, [0, 16384, -16384], [8192, -8192, 32767])
+  left = [ x for b in readWav(path, channel=0) for x in b ]
+  right = [ x for b in readWav(path, channel=1, blocksize=2) for x in b ]
+  assert left == [0.0, 0.5, -0.5]
+  assert right == [0.25, -0.25, 32767 / 32768]
+  with pytest.raises(ValueError, match="out of range"):
+    next(readWav(path, channel=2))
+
+@pytest.mark.parametrize('sampwidth', [1, 2, 3, 4])
+def test_numpy_and_lists_agree(tmp_path, monkeypatch, sampwidth):
+  import pdpy_lib.utilities.wavfile as wavfile
+  path = str(tmp_path / 'ramp.wav')
+  writeWav(path, [[ i / 50 - 1 for i in range(100) ]], sampwidth=sampwidth)
+  fast = [ list(b) for b in readWav(path, blocksize=30) ]
+  monkeypatch.setattr(wavfile, 'HAS_NUMPY', False)
+  slow = [ b for b in readWav(path, blocksize=30) ]
+  assert fast == slow
+  assert [ len(b) for b in slow ] == [30, 30, 30, 10]
+  assert all(isinstance(x, float) for b in slow for x in b)
+
+@pytest.mark.parametrize('dtype', [None, 'float32', 'float64'])
+def test_chunks_and_roundtrip(tmp_path, dtype):
+  if dtype is not None:
+    pytest.importorskip('numpy')
+  path = str(tmp_path / 'long.wav')
+  samples = [ ((i * 37) % 200 - 100) / 128 for i in range(2500) ]
+  writeWav(path, [samples])
+  pdpy = PdPy(name='wav', root=True, array_dtype=dtype)
+  table = pdpy.root.createGOPArray(name='long', length=4)
+  table.readwav(path)
+  chunk = table.__d__.array['chunk']
+  heads = [ int(d.__cls__) for d in table.data ]
+  assert heads == list(range(0, 2500, chunk))
+  assert [ len(d.data) for d in table.data ][:-1] == [chunk] * (len(heads) - 1)
+  text = pdpy.__pd__()
+  for head in heads:
+    assert '#A ' + str(head) + ' ' in text
+  # the samples are multiples of 1/128, which 16 bits keep exactly
+  copy = str(tmp_path / 'copy.wav')
+  assert table.writewav(copy) == 2500
+  assert [ x for b in readWav(copy) for x in b ] == samples
+  with open(path, 'rb') as a, open(copy, 'rb') as b:
+    assert a.read() == b.read()